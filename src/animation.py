@@ -0,0 +1,85 @@
+"""
+Token animation module
+
+Game logic moves a token to its destination in one step; the view animates
+the path separately. A move queues the squares the token passes through,
+looked up in a list of square centers computed once from the board, and each
+frame shows the token one hop further along. Animating a move therefore costs
+one frame per hop, and moves that are never drawn (headless games, skipped
+animations) cost nothing beyond the position arithmetic.
+"""
+
+# Milliseconds each hop stays on screen
+HOP_MS = 200
+
+
+class TokenAnimator:
+    """
+    Hop-by-hop paths of the tokens that are moving on screen.
+    """
+
+    def __init__(self, centers, hop_ms=HOP_MS):
+        """
+        Initializes the animator with the pixel center of every square, indexed by position.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.centers = centers
+        self.hop_ms = hop_ms
+        self.paths = {}  # Player -> [positions still to show, index of the shown one]
+
+    def start(self, player, start, steps, direction=1):
+        """
+        Queues the path of a token moving steps squares from start, forward or
+        backward (direction -1). A new move replaces an unfinished one.
+        - Worst-case O(S): Where S is the number of steps.
+        - Average-case O(S): Same as worst-case.
+        """
+        if steps <= 0 or self.hop_ms <= 0:
+            self.paths.pop(player, None)
+            return
+        size = len(self.centers)
+        path = [(start + direction * hop) % size for hop in range(1, steps + 1)]
+        self.paths[player] = [path, 0]
+
+    def busy(self):
+        """
+        Checks whether any token still has hops to show.
+        - Worst-case O(1): Checking the dictionary.
+        - Average-case O(1): Same as worst-case.
+        """
+        return bool(self.paths)
+
+    def step(self):
+        """
+        Moves every animated token one hop further and drops finished paths.
+        Returns whether any token is still animating.
+        - Worst-case O(P): Where P is the number of animated tokens.
+        - Average-case O(1): Usually only the current player moves.
+        """
+        for player in list(self.paths):
+            entry = self.paths[player]
+            entry[1] += 1
+            if entry[1] >= len(entry[0]):
+                del self.paths[player]
+        return bool(self.paths)
+
+    def center(self, player, position):
+        """
+        Returns the pixel center where a token is drawn: its current hop while
+        it is animating, otherwise the square it stands on.
+        - Worst-case O(1): Two lookups.
+        - Average-case O(1): Same as worst-case.
+        """
+        entry = self.paths.get(player)
+        if entry is not None:
+            position = entry[0][entry[1]]
+        return self.centers[position]
+
+    def clear(self):
+        """
+        Stops every animation, showing all tokens on their squares.
+        - Worst-case O(P): Clearing the paths.
+        - Average-case O(P): Same as worst-case.
+        """
+        self.paths.clear()
@@ -0,0 +1,117 @@
+"""
+Asset management module
+
+Loads images and fonts once, converts images to the display pixel format so
+blits do not pay a per-frame conversion, and caches scaled variants and
+rendered text. Paths are resolved relative to the package directory, so the
+game can be started from any working directory.
+"""
+
+import os
+import pygame
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Assets loaded up front by Game so the first frame does not hit the disk
+BOARD_IMAGE = "img/upd_monopoly_board.png"
+DEFAULT_FONT_SIZE = 36
+
+
+class AssetManager:
+    """
+    Cache of display-ready surfaces and fonts.
+    """
+
+    def __init__(self, base_dir=PACKAGE_DIR):
+        """
+        Initializes an empty asset cache rooted at the given directory.
+        - Worst-case O(1): Creating empty dictionaries.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.base_dir = base_dir
+        self.images = {}
+        self.scaled_images = {}
+        self.fonts = {}
+        self.texts = {}
+
+    def path(self, name):
+        """
+        Resolves an asset name relative to the package directory.
+        - Worst-case O(L): Where L is the length of the path.
+        - Average-case O(L): Same as worst-case.
+        """
+        return os.path.join(self.base_dir, name)
+
+    def image(self, name, alpha=False):
+        """
+        Returns the image converted to the display format, loading it on first use.
+        Conversion needs a display mode to be set; without one the raw image is kept.
+        - Worst-case O(S): Where S is the number of pixels, on the first call.
+        - Average-case O(1): Dictionary lookup.
+        """
+        surface = self.images.get(name)
+        if surface is None:
+            surface = pygame.image.load(self.path(name))
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[name] = surface
+        return surface
+
+    def scaled(self, name, size, alpha=False):
+        """
+        Returns the image scaled to the given size, caching each size.
+        - Worst-case O(S): Where S is the number of pixels, on the first call per size.
+        - Average-case O(1): Dictionary lookup.
+        """
+        key = (name, size)
+        surface = self.scaled_images.get(key)
+        if surface is None:
+            surface = pygame.transform.smoothscale(self.image(name, alpha), size)
+            self.scaled_images[key] = surface
+        return surface
+
+    def font(self, size=DEFAULT_FONT_SIZE, name=None):
+        """
+        Returns a font of the given size, creating it on first use.
+        - Worst-case O(1): Loading the font file on the first call.
+        - Average-case O(1): Dictionary lookup.
+        """
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(
+                self.path(name) if name else None, size
+            )
+        return font
+
+    def fitted_text(self, font, text, color, max_width):
+        """
+        Returns rendered text scaled down to fit max_width, caching the result.
+        Only static labels should go through here, as every distinct text is kept.
+        - Worst-case O(L): Where L is the length of the text, on the first call.
+        - Average-case O(1): Dictionary lookup.
+        """
+        key = (id(font), text, color, max_width)
+        surface = self.texts.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            width, height = surface.get_size()
+            if width > max_width:
+                scale_factor = max_width / width
+                surface = pygame.transform.scale(
+                    surface, (int(width * scale_factor), int(height * scale_factor))
+                )
+            self.texts[key] = surface
+        return surface
+
+    def preload(self, images=(BOARD_IMAGE,), font_sizes=(DEFAULT_FONT_SIZE,)):
+        """
+        Loads and converts the given images and fonts ahead of the first frame.
+        - Worst-case O(S): Where S is the total number of pixels loaded.
+        - Average-case O(S): Same as worst-case.
+        """
+        for name in images:
+            self.image(name)
+        for size in font_sizes:
+            self.font(size)
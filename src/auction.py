@@ -0,0 +1,184 @@
+"""
+Auction module
+
+When a player lands on an unowned property and does not buy it, the property
+is auctioned to all players. Human players bid through the game window in
+either an ascending (open outcry) or a sealed-bid auction. All-bot auctions in
+headless simulations skip the bidding rounds: the outcome of an ascending
+auction between bidders with known valuations is computed directly with NumPy.
+"""
+
+import numpy as np
+
+
+ASCENDING = "ascending"
+SEALED = "sealed"
+AUCTION_MODES = (ASCENDING, SEALED)
+
+MINIMUM_BID = 10
+BID_INCREMENTS = (10, 50, 100)
+
+
+class Auction:
+    """
+    State of one auction of an estate between human bidders.
+    """
+
+    def __init__(self, estate, bidders, mode=ASCENDING, minimum_bid=MINIMUM_BID):
+        """
+        Initializes an auction. Bidders are asked in the given order.
+        - Worst-case O(P): Where P is the number of bidders.
+        - Average-case O(P): Same as worst-case.
+        """
+        if mode not in AUCTION_MODES:
+            raise ValueError(f"Unknown auction mode '{mode}'")
+        self.estate = estate
+        self.bidders = list(bidders)
+        self.mode = mode
+        self.minimum_bid = minimum_bid
+        self.active = list(bidders)  # Bidders who have not passed yet
+        self.turn = 0
+        self.high_bid = 0
+        self.high_bidder = None
+        self.sealed_bids = []
+
+    def fork(self, players, estate):
+        """
+        Returns a copy of the auction for a forked game, where players maps the
+        bidders to their copies and estate is the copy of the estate.
+        - Worst-case O(P): Where P is the number of bidders.
+        - Average-case O(P): Same as worst-case.
+        """
+        bidders = [players[bidder] for bidder in self.bidders]
+        twin = Auction(estate, bidders, self.mode, self.minimum_bid)
+        twin.active = [players[bidder] for bidder in self.active]
+        twin.turn = self.turn
+        twin.high_bid = self.high_bid
+        twin.high_bidder = players.get(self.high_bidder)
+        twin.sealed_bids = list(self.sealed_bids)
+        return twin
+
+    def current_bidder(self):
+        """
+        Returns the player whose turn it is to bid, or None once the auction is over.
+        - Worst-case O(1): Index arithmetic.
+        - Average-case O(1): Same as worst-case.
+        """
+        if self.finished():
+            return None
+        if self.mode == SEALED:
+            return self.bidders[len(self.sealed_bids)]
+        return self.active[self.turn % len(self.active)]
+
+    def min_bid(self):
+        """
+        Returns the lowest bid the current bidder may make.
+        - Worst-case O(1): A comparison.
+        - Average-case O(1): Same as worst-case.
+        """
+        if self.mode == SEALED or self.high_bidder is None:
+            return self.minimum_bid
+        return self.high_bid + BID_INCREMENTS[0]
+
+    def finished(self):
+        """
+        Checks whether the auction is over.
+        - Worst-case O(1): Length checks.
+        - Average-case O(1): Same as worst-case.
+        """
+        if self.mode == SEALED:
+            return len(self.sealed_bids) == len(self.bidders)
+        if not self.active:
+            return True
+        return len(self.active) == 1 and self.active[0] is self.high_bidder
+
+    def next_turn(self):
+        """
+        Moves to the next bidder, skipping the current high bidder.
+        - Worst-case O(1): At most two steps around the active list.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.turn = (self.turn + 1) % len(self.active)
+        if self.active[self.turn] is self.high_bidder and len(self.active) > 1:
+            self.turn = (self.turn + 1) % len(self.active)
+
+    def bid(self, amount):
+        """
+        Places an ascending bid for the current bidder. Returns False if the
+        bid is below the minimum or above the bidder's balance.
+        - Worst-case O(1): Updating the high bid.
+        - Average-case O(1): Same as worst-case.
+        """
+        bidder = self.current_bidder()
+        if bidder is None or amount < self.min_bid() or amount > bidder.balance:
+            return False
+        self.high_bid = amount
+        self.high_bidder = bidder
+        if not self.finished():
+            self.next_turn()
+        return True
+
+    def pass_turn(self):
+        """
+        Withdraws the current bidder from an ascending auction.
+        - Worst-case O(P): Removing the bidder from the active list.
+        - Average-case O(P): Same as worst-case.
+        """
+        bidder = self.current_bidder()
+        if bidder is None:
+            return
+        del self.active[self.turn]
+        if self.active:
+            self.turn %= len(self.active)
+            if self.active[self.turn] is self.high_bidder and len(self.active) > 1:
+                self.next_turn()
+
+    def submit_sealed(self, amount):
+        """
+        Records the sealed bid of the current bidder; 0 means no bid. Returns
+        False if the amount is negative or above the bidder's balance.
+        - Worst-case O(1): Appending a bid.
+        - Average-case O(1): Same as worst-case.
+        """
+        bidder = self.current_bidder()
+        if bidder is None or amount < 0 or amount > bidder.balance:
+            return False
+        if 0 < amount < self.minimum_bid:
+            return False
+        self.sealed_bids.append(amount)
+        if amount > self.high_bid:  # Ties go to the earlier bidder
+            self.high_bid = amount
+            self.high_bidder = bidder
+        return True
+
+    def result(self):
+        """
+        Returns (winner, price) of a finished auction, or (None, 0) if nobody bid.
+        - Worst-case O(1): Reading the high bid.
+        - Average-case O(1): Same as worst-case.
+        """
+        if self.high_bidder is None:
+            return None, 0
+        return self.high_bidder, self.high_bid
+
+
+def resolve_bot_auction(valuations, balances, increment=1, minimum_bid=1):
+    """
+    Resolves an ascending auction between bots in one vectorized step. Each bot
+    stays in until the price passes the lower of its valuation and its balance,
+    so the highest bidder wins at the second-highest limit plus one increment.
+    Bots that cannot take part should be given a valuation of 0.
+    Returns (winner index, price), or (-1, 0) if nobody reaches the minimum bid.
+    - Worst-case O(P): Where P is the number of bots.
+    - Average-case O(P): Same as worst-case.
+    """
+    limits = np.minimum(valuations, balances)
+    winner = int(np.argmax(limits))
+    if limits[winner] < minimum_bid:
+        return -1, 0
+    if len(limits) > 1:
+        runner_up = np.partition(limits, -2)[-2]
+    else:
+        runner_up = 0
+    price = max(minimum_bid, min(int(runner_up) + increment, int(limits[winner])))
+    return winner, price
@@ -0,0 +1,157 @@
+"""
+Bankruptcy module
+
+When a player owes more than they hold, their assets are liquidated to cover
+the debt: first unimproved properties are mortgaged, cheapest income first,
+then buildings are sold evenly across each group, then the remaining
+properties are mortgaged. A player who still cannot pay is bankrupt: their
+cash, properties and Get Out of Jail Free cards go to the creditor (or back to
+the bank) and they leave the turn rotation.
+"""
+
+from board_data import HOTEL_LEVEL
+from expected_income import expected_rent_per_opponent_turn
+from trade_engine import jail_cards, transfer_estate
+from utils import quick_sorts
+
+
+def building_level(estate):
+    """
+    Returns the number of building levels on an estate (a hotel counts as five).
+    - Worst-case O(1): Reading two attributes.
+    - Average-case O(1): Same as worst-case.
+    """
+    return HOTEL_LEVEL if estate.hotel else estate.houses
+
+
+def sell_building(estate):
+    """
+    Sells one building level back to the bank and returns the cash raised:
+    half of what it cost. A hotel is traded back for four houses.
+    - Worst-case O(1): Updating the estate.
+    - Average-case O(1): Same as worst-case.
+    """
+    if estate.hotel:
+        estate.hotel = False
+        estate.houses = HOTEL_LEVEL - 1
+        return estate.house_cost  # The hotel cost two houses
+    estate.houses -= 1
+    return estate.house_cost // 2
+
+
+def mortgage_order(game, estates):
+    """
+    Orders estates so that the ones losing the least expected income per dollar
+    of mortgage value come first.
+    - Worst-case O(h log h): Where h is the number of estates.
+    - Average-case O(h log h): Same as worst-case.
+    """
+    income = expected_rent_per_opponent_turn(game.board, game.rules)
+    return quick_sorts(
+        estates,
+        key=lambda estate: income[estate.index, 0] / max(1, estate.price // 2),
+    )
+
+
+def raise_funds(game, player, amount):
+    """
+    Liquidates the player's assets until they have raised at least amount or
+    run out of assets. Returns the cash raised, which is added to their balance.
+    - Worst-case O(h log h): Where h is the number of estates the player owns; every
+      building sale and mortgage is constant time, and mortgage candidates are sorted once.
+    - Average-case O(h log h): Same as worst-case.
+    """
+    raised = 0
+    groups = {}
+    for estate in player.estates:
+        groups.setdefault(estate.group, []).append(estate)
+    # A list in the order of the player's estates, so liquidation does not depend on string hashing
+    built_groups = [
+        group for group, estates in groups.items() if any(map(building_level, estates))
+    ]
+
+    # 1. Mortgage properties of groups without buildings
+    candidates = [
+        estate
+        for estate in player.estates
+        if not estate.mortgaged and estate.group not in built_groups
+    ]
+    for estate in mortgage_order(game, candidates):
+        if raised >= amount:
+            break
+        estate.mortgage()
+        raised += estate.price // 2
+
+    # 2. Sell buildings evenly: always from the most built estate of the group
+    for group in built_groups:
+        estates = groups[group]
+        while raised < amount:
+            estate = max(estates, key=building_level)
+            if not building_level(estate):
+                break
+            raised += sell_building(estate)
+
+    # 3. Mortgage what is left
+    candidates = [
+        estate
+        for estate in player.estates
+        if not estate.mortgaged and not building_level(estate)
+    ]
+    for estate in mortgage_order(game, candidates):
+        if raised >= amount:
+            break
+        estate.mortgage()
+        raised += estate.price // 2
+
+    game.bank_transfer(player, raised)
+    return raised
+
+
+def declare_bankruptcy(game, player, creditor=None):
+    """
+    Hands all of a bankrupt player's assets to the creditor, or back to the bank
+    if the debt is owed to the bank, and removes the player from the game.
+    - Worst-case O(h * n): Where h is the number of estates moved and n the size of the creditor's list.
+    - Average-case O(h * n): Same as worst-case.
+    """
+    if creditor is not None:
+        creditor.update_balance(max(0, player.balance))
+        for estate in list(player.estates):
+            transfer_estate(game, estate, player, creditor)
+        for card in jail_cards(player):
+            creditor.community_chest_cards.append(card)
+    else:
+        game.bank_transfer(player, -player.balance)
+        for card in jail_cards(player):
+            game.return_card(card)
+        for estate in player.estates:
+            estate.owner = None
+            estate.mortgaged = False
+            estate.houses = 0
+            estate.hotel = False
+        if player.estates:
+            game.players_with_estates -= 1
+    player.estates = []
+    player.community_chest_cards = []
+    player.balance = 0
+    game.remove_player(player)
+
+
+def settle_debt(game, player, amount, creditor=None):
+    """
+    Makes the player pay amount to the creditor (the bank if None), liquidating
+    assets if needed. Returns False if the player went bankrupt.
+    - Worst-case O(h log h): Liquidation of the player's estates.
+    - Average-case O(1): The player can usually pay from cash.
+    """
+    if player.balance < amount:
+        raise_funds(game, player, amount - player.balance)
+    if player.balance < amount:
+        declare_bankruptcy(game, player, creditor)
+        return False
+    if creditor is not None:
+        player.update_balance(-amount)
+        creditor.update_balance(amount)
+    else:
+        game.bank_transfer(player, -amount)
+    return True
@@ -0,0 +1,70 @@
+"""
+Startup benchmark
+
+Measures how long it takes until the game window is interactive and how much
+a full-board background blit costs with and without display-format conversion.
+Runs offscreen with the dummy video driver unless SDL_VIDEODRIVER is set.
+
+Usage:
+    python src/benchmark_startup.py [--blits N]
+"""
+
+import argparse
+import os
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # pylint: disable=wrong-import-position
+from assets import BOARD_IMAGE  # pylint: disable=wrong-import-position
+from main import Game  # pylint: disable=wrong-import-position
+from player_management import Player  # pylint: disable=wrong-import-position
+
+
+def time_blits(screen, surface, count):
+    """
+    Returns the average time in microseconds of blitting a surface to the screen.
+    - Worst-case O(N * S): Where N is the number of blits and S the surface size.
+    - Average-case O(N * S): Same as worst-case.
+    """
+    start = perf_counter()
+    for _ in range(count):
+        screen.blit(surface, (0, 0))
+    return (perf_counter() - start) / count * 1e6
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    - Worst-case O(N * S): Dominated by the blit loops.
+    - Average-case O(N * S): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Monopoly startup benchmark")
+    parser.add_argument("--blits", type=int, default=500, help="blits per measurement")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    game = Game()
+    init_done = perf_counter()
+    game.players = [Player("Player 1", "red"), Player("Player 2", "blue")]
+    game.setup_phase = False
+    game.update_board()
+    first_frame = perf_counter()
+
+    print(f"Game() initialisation:    {(init_done - start) * 1000:8.2f} ms")
+    print(f"First board frame:        {(first_frame - init_done) * 1000:8.2f} ms")
+    print(f"Time to interactive:      {(first_frame - start) * 1000:8.2f} ms")
+
+    raw = pygame.image.load(game.assets.path(BOARD_IMAGE))
+    converted = game.assets.image(BOARD_IMAGE)
+    raw_us = time_blits(game.screen, raw, args.blits)
+    converted_us = time_blits(game.screen, converted, args.blits)
+    print(f"Background blit (raw):    {raw_us:8.1f} us")
+    print(f"Background blit (convert):{converted_us:8.1f} us")
+    if converted_us:
+        print(f"Blit speedup:             {raw_us / converted_us:8.2f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Board data module
+
+Boards and their card decks are defined in JSON data files (see
+data/classic_board.json). A definition is compiled once into compact
+position-indexed tables, and the compiled form is cached on disk next to the
+data file so later runs load it without recompiling. The compiled tables
+include a topology index (nearest station and utility from every square), so
+card movement never searches the board. Synthetic boards of any size (a
+multiple of four, at least 40 squares) can be generated to stress-test the
+engine beyond the classic 40 squares.
+
+Usage:
+    python src/board_data.py --generate 2000 --output big_board.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CLASSIC_BOARD = os.path.join(DATA_DIR, "classic_board.json")
+
+# Bump when the compiled layout changes so stale caches are ignored
+COMPILER_VERSION = 2
+
+# Square kinds, used as handler ids by the rules
+KIND_NONE = 0
+KIND_GO = 1
+KIND_PROPERTY = 2
+KIND_STATION = 3
+KIND_UTILITY = 4
+KIND_TAX = 5
+KIND_CHANCE = 6
+KIND_COMMUNITY_CHEST = 7
+KIND_JAIL = 8
+KIND_FREE_PARKING = 9
+KIND_GO_TO_JAIL = 10
+
+KIND_NAMES = {
+    "none": KIND_NONE,
+    "go": KIND_GO,
+    "property": KIND_PROPERTY,
+    "station": KIND_STATION,
+    "utility": KIND_UTILITY,
+    "tax": KIND_TAX,
+    "chance": KIND_CHANCE,
+    "community_chest": KIND_COMMUNITY_CHEST,
+    "jail": KIND_JAIL,
+    "free_parking": KIND_FREE_PARKING,
+    "go_to_jail": KIND_GO_TO_JAIL,
+}
+KIND_LABELS = {kind: name for name, kind in KIND_NAMES.items()}
+
+# Card targets that are not a square name
+SPECIAL_TARGETS = ("nearest Utility", "nearest Railroad", "back 3 spaces", "Jail")
+
+# Rent levels: 0-4 houses, then a hotel
+RENT_LEVELS = 6
+HOTEL_LEVEL = 5
+
+_loaded_boards = {}
+
+
+class BoardTables:
+    """
+    Compiled, position-indexed form of a board definition.
+    """
+
+    def __init__(self, name, size):
+        """
+        Initializes empty tables for a board with the given number of squares.
+        - Worst-case O(N): Where N is the number of squares.
+        - Average-case O(N): Same as worst-case.
+        """
+        self.name = name
+        self.size = size
+        self.names = []
+        self.name_index = {}
+        self.group_names = []
+        self.group_members = []
+        self.price = np.zeros(size, dtype=np.int32)
+        self.rent = np.zeros(size, dtype=np.int32)
+        self.rent_table = np.zeros((size, RENT_LEVELS), dtype=np.int32)
+        self.group_id = np.zeros(size, dtype=np.int16)
+        self.kind = np.zeros(size, dtype=np.int8)
+        self.buyable = np.zeros(size, dtype=np.bool_)
+        self.pixels = []
+        self.chance = []
+        self.community_chest = []
+        self.go_position = 0
+        self.jail_position = 0
+        # Topology index: next square of a kind going forward, -1 if there is none
+        self.nearest_station = []
+        self.nearest_utility = []
+
+    def position_of(self, name):
+        """
+        Returns the position of the square with the given name.
+        - Worst-case O(1): Dictionary lookup.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.name_index[name]
+
+    def steps_to(self, position, target):
+        """
+        Returns the number of steps forward from position to target.
+        - Worst-case O(1): Modular arithmetic.
+        - Average-case O(1): Same as worst-case.
+        """
+        return (target - position) % self.size
+
+    def passes_go(self, position, steps):
+        """
+        Checks whether moving steps forward from position passes or lands on Go.
+        - Worst-case O(1): Modular arithmetic.
+        - Average-case O(1): Same as worst-case.
+        """
+        return steps > 0 and (position - self.go_position) % self.size + steps >= self.size
+
+
+def square_kind(square):
+    """
+    Returns the kind of a square definition, derived from its name and group
+    unless the definition sets "kind" explicitly.
+    - Worst-case O(1): A few comparisons.
+    - Average-case O(1): Same as worst-case.
+    """
+    if "kind" in square:
+        return KIND_NAMES[square["kind"]]
+    name, group = square["name"], square["group"]
+    if group == "Tax":
+        return KIND_TAX
+    if group == "Chance":
+        return KIND_CHANCE
+    if group == "Community Chest":
+        return KIND_COMMUNITY_CHEST
+    if group == "Station":
+        return KIND_STATION
+    if group == "Utility":
+        return KIND_UTILITY
+    if square["buyable"]:
+        return KIND_PROPERTY
+    if name == "Go":
+        return KIND_GO
+    if name == "Jail":
+        return KIND_JAIL
+    if name == "Free Parking":
+        return KIND_FREE_PARKING
+    if name == "Go to Jail":
+        return KIND_GO_TO_JAIL
+    return KIND_NONE
+
+
+def nearest_of_kind(kinds, kind):
+    """
+    Returns, for every square, the position of the next square of the given kind
+    going forward (the square itself is skipped), or -1 if the board has none.
+    - Worst-case O(N): Two backward passes over the board.
+    - Average-case O(N): Same as worst-case.
+    """
+    size = len(kinds)
+    nearest = [-1] * size
+    following = -1
+    for _ in range(2):  # The second pass wraps around past Go
+        for position in range(size - 1, -1, -1):
+            nearest[position] = following
+            if kinds[position] == kind:
+                following = position
+    return nearest
+
+
+def layout_positions(size, layout):
+    """
+    Computes the pixel position of every square around a square board.
+    Each side starts with a corner, which is 1.5 squares wide.
+    - Worst-case O(N): Where N is the number of squares.
+    - Average-case O(N): Same as worst-case.
+    """
+    side = size // 4
+    board_size = layout.get("board_size", 700)
+    offset = layout.get("offset", 30)
+    estate_width = layout.get("estate_width", board_size / (side + 2))
+    corner_width = estate_width * 1.5
+    far = board_size - corner_width + offset
+
+    positions = []
+    for i in range(side):  # Bottom row, right to left
+        positions.append((far - i * estate_width, far))
+    for i in range(side):  # Left column, bottom to top
+        positions.append((offset, far - i * estate_width))
+    positions.append((offset, offset))
+    for i in range(1, side):  # Top row, left to right
+        positions.append((corner_width + (i - 1) * estate_width + offset, offset))
+    positions.append((far, offset))
+    for i in range(1, side):  # Right column, top to bottom
+        positions.append((far, corner_width + (i - 1) * estate_width + offset))
+    return positions
+
+
+def compile_cards(cards, name_index):
+    """
+    Compiles card definitions, resolving square-name targets to positions.
+    - Worst-case O(C): Where C is the number of cards.
+    - Average-case O(C): Same as worst-case.
+    """
+    compiled = []
+    for card in cards:
+        move_to = card.get("move_to")
+        target = None
+        if move_to is not None and move_to not in SPECIAL_TARGETS:
+            if move_to not in name_index:
+                raise ValueError(
+                    f"Card '{card['description']}' targets unknown square '{move_to}'"
+                )
+            target = name_index[move_to]
+        compiled.append(
+            (
+                card["description"],
+                card.get("value", 0),
+                card.get("get_out_of_jail", False),
+                move_to,
+                target,
+            )
+        )
+    return compiled
+
+
+def compile_board(definition):
+    """
+    Compiles a board definition into BoardTables.
+    - Worst-case O(N + C): Where N is the number of squares and C the number of cards.
+    - Average-case O(N + C): Same as worst-case.
+    """
+    squares = definition["squares"]
+    size = len(squares)
+    if size % 4:
+        raise ValueError(f"Board size must be a multiple of 4, got {size}")
+
+    tables = BoardTables(definition.get("name", "board"), size)
+    group_index = {}
+    for position, square in enumerate(squares):
+        name = square["name"]
+        tables.names.append(name)
+        # Repeated names (Chance, Community Chest) resolve to their first square
+        tables.name_index.setdefault(name, position)
+
+        group = square["group"]
+        if group not in group_index:
+            group_index[group] = len(tables.group_names)
+            tables.group_names.append(group)
+            tables.group_members.append([])
+        tables.group_id[position] = group_index[group]
+        tables.group_members[group_index[group]].append(position)
+
+        rent = square.get("rent", 0)
+        tables.price[position] = square.get("price", 0)
+        tables.rent[position] = rent
+        tables.rent_table[position] = [rent, rent, rent * 2, rent * 3, rent * 4, rent * 5]
+        tables.buyable[position] = square["buyable"]
+        tables.kind[position] = square_kind(square)
+
+    tables.group_members = [tuple(members) for members in tables.group_members]
+    tables.pixels = layout_positions(size, definition.get("layout", {}))
+    tables.go_position = tables.name_index.get("Go", 0)
+    tables.jail_position = tables.name_index.get("Jail", 0)
+    kinds = tables.kind.tolist()
+    tables.nearest_station = nearest_of_kind(kinds, KIND_STATION)
+    tables.nearest_utility = nearest_of_kind(kinds, KIND_UTILITY)
+    tables.chance = compile_cards(definition.get("chance", []), tables.name_index)
+    tables.community_chest = compile_cards(
+        definition.get("community_chest", []), tables.name_index
+    )
+    return tables
+
+
+def cache_path(path, digest):
+    """
+    Returns the path of the compiled cache for a data file and content digest.
+    - Worst-case O(L): Where L is the length of the path.
+    - Average-case O(L): Same as worst-case.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "__pycache__", f"{stem}.{digest[:16]}.pickle")
+
+
+def load_board(path=CLASSIC_BOARD):
+    """
+    Loads a board data file, compiling it only if no up-to-date cache exists.
+    Compiled boards are also kept in memory, so every game in a process shares them.
+    - Worst-case O(N + C): Compiling the definition on a cache miss.
+    - Average-case O(1): In-memory lookup after the first load.
+    """
+    path = os.path.abspath(path)
+    with open(path, "rb") as file:
+        raw = file.read()
+    digest = hashlib.sha256(raw + str(COMPILER_VERSION).encode()).hexdigest()
+    tables = _loaded_boards.get((path, digest))
+    if tables is not None:
+        return tables
+
+    cached = cache_path(path, digest)
+    try:
+        with open(cached, "rb") as file:
+            tables = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        tables = compile_board(json.loads(raw.decode("utf-8")))
+        try:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            temp_path = f"{cached}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                pickle.dump(tables, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cached)
+        except OSError:
+            pass  # A read-only install just compiles on every start
+    _loaded_boards[(path, digest)] = tables
+    return tables
+
+
+def generate_board(num_squares, base_path=CLASSIC_BOARD):
+    """
+    Generates a board definition with the given number of squares by repeating
+    each side of the base board. Repeated squares get a lap suffix in their
+    name and group, so colour groups keep their classic size, and keep the kind
+    of the square they repeat, so every lap has its own stations and utilities.
+    - Worst-case O(N): Where N is the number of squares.
+    - Average-case O(N): Same as worst-case.
+    """
+    if num_squares % 4 or num_squares < 40:
+        raise ValueError("Generated boards need a multiple of 4 squares, at least 40")
+    with open(base_path, encoding="utf-8") as file:
+        base = json.load(file)
+
+    base_squares = base["squares"]
+    base_side = len(base_squares) // 4
+    side = num_squares // 4
+    squares = []
+    for side_index in range(4):
+        corner_square = base_squares[side_index * base_side]
+        edge_squares = base_squares[side_index * base_side + 1 : (side_index + 1) * base_side]
+        squares.append(dict(corner_square))
+        for i in range(side - 1):
+            square = dict(edge_squares[i % len(edge_squares)])
+            lap = i // len(edge_squares)
+            if lap:
+                square["kind"] = KIND_LABELS[square_kind(square)]
+                square["name"] = f"{square['name']} {lap + 1}"
+                if square["buyable"]:
+                    square["group"] = f"{square['group']} {lap + 1}"
+            squares.append(square)
+
+    layout = dict(base.get("layout", {}))
+    layout.pop("estate_width", None)
+    return {
+        "name": f"generated-{num_squares}",
+        "layout": layout,
+        "squares": squares,
+        "chance": base.get("chance", []),
+        "community_chest": base.get("community_chest", []),
+    }
+
+
+def main():
+    """
+    Command line entry point for writing generated boards to a data file.
+    - Worst-case O(N): Generating and writing the board.
+    - Average-case O(N): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Generate a Monopoly board data file")
+    parser.add_argument("--generate", type=int, required=True, help="number of squares")
+    parser.add_argument("--output", required=True, help="path of the JSON file to write")
+    args = parser.parse_args()
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(generate_board(args.generate), file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
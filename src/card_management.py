@@ -2,16 +2,41 @@
 Card management module
 """
 
-import random
 from utils import Queue
+from board_data import load_board
+from rng import GameRandom
+from turn_fsm import card_opcode
 
 
 class Card:
+    __slots__ = (
+        "description",
+        "value",
+        "is_get_out_of_jail",
+        "move_to",
+        "multiplier",
+        "target",
+        "opcode",
+        "deck",
+        "index",
+    )
+
     def __init__(
-        self, description, value=0, is_get_out_of_jail=False, move_to=None, multiplier=1
+        self,
+        description,
+        value=0,
+        is_get_out_of_jail=False,
+        move_to=None,
+        multiplier=1,
+        target=None,
+        index=None,
     ):
         """
         Initializes a Card object with specific attributes.
+        target is the board position of move_to, resolved when the board is compiled,
+        and opcode the compiled effect of move_to (see turn_fsm). deck is the deck
+        the card goes back to after use, set when it is added to one, and index
+        the card's position in its deck definition, which identifies it in saved games.
         - Worst-case O(1): Assigning attributes during initialization.
         - Average-case O(1): Same as worst-case.           
         """
@@ -20,6 +45,10 @@ class Card:
         self.is_get_out_of_jail = is_get_out_of_jail
         self.move_to = move_to
         self.multiplier = multiplier
+        self.target = target
+        self.opcode = card_opcode(move_to)
+        self.deck = None
+        self.index = index
 
     def __str__(self):
         """
@@ -38,13 +67,19 @@ class CardDeck:
         - Average-case O(1): Same as worst-case.
         """
         self.deck = Queue()
+        self.origin = self  # Deck the cards were dealt into, which forks keep (see fork)
+        self.shared = False
 
     def add_card(self, card):
         """
-        Adds a card to the deck.
-        - Worst-case O(1): Queuing a card into the deck.
-        - Average-case O(1): Same as worst-case.
+        Adds a card to the bottom of the deck, which also returns a used card.
+        A new card is marked as belonging to the deck.
+        - Worst-case O(N): Copying a deck shared with a fork first.
+        - Average-case O(1): Queuing a card into the deck.
         """
+        if card.deck is None:
+            card.deck = self
+        self.own()
         self.deck.enqueue(card)
 
     def draw_card(self):
@@ -54,22 +89,51 @@ class CardDeck:
         - Average-case O(1): Same as worst-case.
         """
         if not self.deck.is_empty():
+            self.own()
             return self.deck.dequeue()
         else:
             raise IndexError("The deck is empty")
 
-    def shuffle(self):
+    def shuffle(self, rng=None):
         """
-        Shuffles the deck randomly.
+        Shuffles the deck with the game's random source (a fresh unseeded one if None).
         - Worst-case O(N): Where N is the number of cards in the deck; shuffling involves iterating over all cards.
         - Average-case O(N): Same as worst-case.
         """
         cards = self.deck.display()
-        random.shuffle(cards)
+        (rng or GameRandom()).shuffle(cards)
         self.deck = Queue()
+        self.shared = False
         for card in cards:
             self.deck.enqueue(card)
 
+    def fork(self):
+        """
+        Returns a deck with the same cards in the same order, for a forked game.
+        Both decks share the queue until either one changes it and copies it first.
+        The cards themselves are shared and keep pointing to the original deck.
+        - Worst-case O(1): The queue is not copied yet.
+        - Average-case O(1): Same as worst-case.
+        """
+        twin = CardDeck()
+        twin.deck = self.deck
+        twin.origin = self.origin
+        self.shared = twin.shared = True
+        return twin
+
+    def own(self):
+        """
+        Gives the deck its own copy of a queue shared with a fork, before it is changed.
+        - Worst-case O(N): Copying the queue.
+        - Average-case O(1): The queue is not shared.
+        """
+        if self.shared:
+            queue = Queue()
+            for card in self.deck.display():
+                queue.enqueue(card)
+            self.deck = queue
+            self.shared = False
+
     def __len__(self):
         """
         Returns the number of cards in the deck.
@@ -79,136 +143,59 @@ class CardDeck:
         return len(self.deck)
 
 
-def initialize_chance_cards():
+def build_cards(compiled_cards):
     """
-    Creates and returns a list of predefined Chance cards.
-    - Worst-case O(1): Creating a list with a fixed number of cards.
-    - Average-case O(1): Same as worst-case.
+    Creates Card objects from compiled card records.
+    - Worst-case O(N): Where N is the number of cards.
+    - Average-case O(N): Same as worst-case.
     """
     return [
-        # Each card has a description and optional effects.
-
-        Card("Advance to Go. Collect $200", 0, False, "Go"),
-        Card(
-            "Advance to Pentonville Rd. If you pass Go, collect $200",
-            0,
-            False,
-            "Pentonville Rd",
-        ),
-        Card(
-            "Advance to Bond Street. If you pass Go, collect $200",
-            0,
-            False,
-            "Bond Street",
-        ),
-        Card(
-            "Advance token to nearest Utility. If unowned, you may buy it from the Bank. If owned, throw dice and pay owner a total ten times the amount thrown.",
-            0,
-            False,
-            "nearest Utility",
-        ),
-        Card(
-            "Advance token to the nearest Railroad and pay owner twice the rental to which they are otherwise entitled. If Railroad is unowned, you may buy it from the Bank.",
-            0,
-            False,
-            "nearest Railroad",
-        ),
-        Card("Bank pays you dividend of $50", 50, False, None),
-        Card("Get out of Jail Free", 0, True, None),
-        Card("Go Back 3 Spaces", 0, False, "back 3 spaces"),
-        Card("Go to Jail", 0, False, "Jail"),
-        Card(
-            "Make general repairs on all your property: For each house pay $25, For each hotel $100",
-            0,
-            False,
-            None,
-        ),
-        Card("Pay poor tax of $15", -15, False, None),
-        Card(
-            "Take a trip to Kings Cross Station. If you pass Go, collect $200",
-            0,
-            False,
-            "Kings Cross Station",
-        ),
-        Card(
-            "Take a walk on the Vine Street. Advance token to Vine Street",
-            0,
-            False,
-            "Vine Street",
-        ),
-        Card(
-            "You have been elected Chairman of the Board. Pay each player $50",
-            -50,
-            False,
-            None,
-        ),
-        Card("Your building loan matures. Collect $150", 150, False, None),
-        Card("You have won a crossword competition. Collect $100", 100, False, None),
+        Card(description, value, is_get_out_of_jail, move_to, target=target, index=index)
+        for index, (description, value, is_get_out_of_jail, move_to, target) in enumerate(
+            compiled_cards
+        )
     ]
 
 
-def create_chance_deck():
+def initialize_chance_cards(board=None):
+    """
+    Creates and returns the Chance cards defined by the board data.
+    - Worst-case O(N): Where N is the number of cards in the deck.
+    - Average-case O(N): Same as worst-case.
+    """
+    return build_cards((board or load_board()).chance)
+
+
+def create_chance_deck(board=None, rng=None):
     """
     Creates and returns a shuffled Chance card deck.
     - Worst-case O(N): Where N is the number of cards in the deck; shuffling involves iterating over all cards.
     - Average-case O(N): Same as worst-case.
     """
     chance_deck = CardDeck()
-    for card in initialize_chance_cards():
+    for card in initialize_chance_cards(board):
         chance_deck.add_card(card)
-    chance_deck.shuffle()
+    chance_deck.shuffle(rng)
     return chance_deck
 
 
-def initialize_community_chest_cards():
+def initialize_community_chest_cards(board=None):
     """
-    Creates and returns a list of predefined Community Chest cards.
-    - Worst-case O(1): Creating a list with a fixed number of cards.
-    - Average-case O(1): Same as worst-case.
+    Creates and returns the Community Chest cards defined by the board data.
+    - Worst-case O(N): Where N is the number of cards in the deck.
+    - Average-case O(N): Same as worst-case.
     """
-    return [
-        Card("Advance to Go.", 0, False, "Go"),
-        Card("Bank error in your favor. Collect $200", 200, False, None),
-        Card("Doctor's fees. Pay $50", -50, False, None),
-        Card("From sale of stock you get $50", 50, False, None),
-        Card("Get Out of Jail Free", 0, True, None),
-        Card("Go to Jail", 0, False, "Jail"),
-        Card(
-            "Grand Opera Night. Collect $50 from every player for opening night seats",
-            0,
-            False,
-            None,
-        ),
-        Card("Holiday Fund matures. Receive $100", 100, False, None),
-        Card("Income tax refund. Collect $20", 20, False, None),
-        Card("It is your birthday. Collect $10 from every player", 0, False, None),
-        Card("Life insurance matures – Collect $100", 100, False, None),
-        Card("Hospital Fees. Pay $50", -50, False, None),
-        Card("School fees. Pay $50", -50, False, None),
-        Card("Receive $25 consultancy fee", 25, False, None),
-        Card(
-            "You are assessed for street repairs: Pay $40 per house and $115 per hotel you own",
-            0,
-            False,
-            None,
-        ),
-        Card(
-            "You have won second prize in a beauty contest. Collect $10",
-            10,
-            False,
-            None,
-        ),
-    ]
+    return build_cards((board or load_board()).community_chest)
 
 
-def create_community_chest_deck():
+def create_community_chest_deck(board=None, rng=None):
     """
     Creates and returns a shuffled Community Chest card deck.
     - Worst-case O(N): Where N is the number of cards in the deck; shuffling involves iterating over all cards.
     - Average-case O(N): Same as worst-case.
     """
     community_chest_deck = CardDeck()
-    for card in initialize_community_chest_cards():
+    for card in initialize_community_chest_cards(board):
         community_chest_deck.add_card(card)
-    community_chest_deck.shuffle()
+    community_chest_deck.shuffle(rng)
     return community_chest_deck
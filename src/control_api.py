@@ -0,0 +1,430 @@
+"""
+Control API module
+
+A small HTTP/JSON server, bound to localhost, for dashboards and test
+harnesses that poll and drive a running game:
+
+    GET  /state     public table state, the turn phase and the legal actions
+    GET  /actions   the legal actions only
+    POST /actions   one action object or a list of them, applied in order
+
+Every response carries the state version as its ETag. A GET with a matching
+If-None-Match header is answered with 304 Not Modified and no body, and a
+POST with an If-Match header that no longer matches is refused with 412, so
+a client only acts on the state it has seen. Connections are kept alive.
+
+The server runs an asyncio loop on its own thread. The game loop publishes
+its state at most once per interval and bumps the version only when the
+state changed; each version is encoded once, so polling an unchanged game
+costs a header comparison. Posted actions are queued and applied by the game
+loop between frames, one batch at a time.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from auction import SEALED
+from spectator import public_view
+
+
+DEFAULT_PORT = 7421
+# Seconds between state publications by the game loop
+PUBLISH_INTERVAL = 0.05
+# Largest request body accepted
+MAX_BODY = 1 << 20
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    412: "Precondition Failed",
+    413: "Payload Too Large",
+}
+
+# Actions backed by a button, in the order of the game's buttons
+BUTTON_ACTIONS = ("roll", "buy", "build", None, None, "end_turn")
+
+
+def legal_actions(game):
+    """
+    Returns the actions the current player (or bidder) may take, as a list of
+    {"action": name, ...} objects with the allowed arguments.
+    - Worst-case O(h + P): Where h is the number of estates the current player owns.
+    - Average-case O(h): Same as worst-case without an auction.
+    """
+    if game.setup_phase or game.winner is not None or not game.players:
+        return []
+    auction = game.auction
+    if auction is not None:
+        bidder = auction.current_bidder()
+        if bidder is None:
+            return []
+        return [
+            {
+                "action": "bid",
+                "bidder": bidder.name,
+                "min": auction.min_bid(),
+                "max": bidder.balance,
+            },
+            {"action": "pass", "bidder": bidder.name},
+        ]
+    actions = [
+        {"action": name}
+        for name, button in zip(BUTTON_ACTIONS, game.buttons)
+        if name is not None and button["enabled"]
+    ]
+    player = game.players[game.current_player_index]
+    mortgageable = [
+        estate.index
+        for estate in player.estates
+        if not estate.mortgaged and not estate.houses and not estate.hotel
+    ]
+    if mortgageable:
+        actions.append({"action": "mortgage", "positions": mortgageable})
+    redeemable = [
+        estate.index
+        for estate in player.estates
+        if estate.mortgaged and player.balance >= estate.price
+    ]
+    if redeemable:
+        actions.append({"action": "unmortgage", "positions": redeemable})
+    return actions
+
+
+def perform_action(game, request):
+    """
+    Applies one action request if it is legal. Returns None on success or
+    the reason it was refused.
+    - Worst-case O(N): The action itself, e.g. a move of N steps.
+    - Average-case O(1): Most actions are single state changes.
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("action"), str):
+        return "an action is an object with an 'action' name"
+    name = request["action"]
+    allowed = {action["action"]: action for action in legal_actions(game)}
+    if name not in allowed:
+        return f"'{name}' is not allowed now"
+    legal = allowed[name]
+    if name == "roll":
+        game.roll_dice()
+    elif name == "buy":
+        game.handle_buy()
+    elif name == "build":
+        game.handle_build_house()
+    elif name == "end_turn":
+        game.end_turn()
+    elif name in ("mortgage", "unmortgage"):
+        position = request.get("position")
+        if position not in legal["positions"]:
+            return f"cannot {name} position {position}"
+        player = game.players[game.current_player_index]
+        if name == "mortgage":
+            game.mortgage_property(player, game.estates[position])
+        else:
+            game.unmortgage_property(player, game.estates[position])
+        game.update_buttons()
+    elif name == "bid":
+        amount = request.get("amount")
+        if not isinstance(amount, int) or not legal["min"] <= amount <= legal["max"]:
+            return f"bids must be between {legal['min']} and {legal['max']}"
+        if game.auction.mode == SEALED:
+            game.auction.submit_sealed(amount)
+        else:
+            game.auction.bid(amount)
+        game.continue_auction()
+    elif name == "pass":
+        if game.auction.mode == SEALED:
+            game.auction.submit_sealed(0)
+        else:
+            game.auction.pass_turn()
+        game.continue_auction()
+    return None
+
+
+def perform_batch(game, requests):
+    """
+    Applies a batch of action requests in order, stopping at the first one
+    that is refused; the ones after it are skipped.
+    - Worst-case O(A * N): Where A is the number of actions.
+    - Average-case O(A): Same as worst-case for single state changes.
+    """
+    results = []
+    failed = False
+    for request in requests:
+        if failed:
+            results.append({"ok": False, "error": "skipped"})
+            continue
+        error = perform_action(game, request)
+        failed = error is not None
+        results.append({"ok": True} if error is None else {"ok": False, "error": error})
+    return results
+
+
+class ControlServer:
+    """
+    Asyncio HTTP server exposing a game, running on its own thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, interval=PUBLISH_INTERVAL):
+        """
+        Starts the server thread and waits until it listens. Port 0 picks a
+        free port, available as self.port.
+        - Worst-case O(1): Starting the thread.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.pending = queue.SimpleQueue()  # (requests, future) batches for the game loop
+        self.current = (0, None)  # (version, state), replaced as one reference
+        self.encoded = {}  # Version -> {path: body}, encoded once on the server thread
+        self.last_publish = 0.0
+        self.loop = None
+        self.server = None
+        self.connections = {}  # Writer -> handler task of each open connection
+        self.started = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self.serve, name="control-api", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+
+    def serve(self):
+        """
+        Runs the event loop of the server thread until close.
+        - Worst-case O(R): Where R is the number of requests served.
+        - Average-case O(R): Same as worst-case.
+        """
+        self.loop = asyncio.new_event_loop()
+        try:
+            server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle, self.host, self.port)
+            )
+        except OSError as error:
+            self.error = error
+            self.started.set()
+            return
+        self.server = server
+        self.port = server.sockets[0].getsockname()[1]
+        self.started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            self.loop.run_until_complete(server.wait_closed())
+            self.loop.close()
+
+    def publish(self, game, force=False):
+        """
+        Takes the game's state, at most once per interval unless forced, and
+        bumps the version if it changed. Called by the game loop.
+        - Worst-case O(P + N + h): Building and comparing the state.
+        - Average-case O(1): Between intervals.
+        """
+        now = monotonic()
+        if not force and now - self.last_publish < self.interval:
+            return
+        self.last_publish = now
+        state = {
+            "state": public_view(game),
+            "phase": "setup" if game.setup_phase else game.turn.phase,
+            "auction": game.auction.estate.index if game.auction is not None else None,
+            "actions": legal_actions(game),
+        }
+        version, current = self.current
+        if state != current:
+            # One reference swap, so the server thread reads the pair without a lock
+            self.current = (version + 1, state)
+
+    def run_pending(self, game):
+        """
+        Applies the action batches posted since the last frame. Called by the game loop.
+        - Worst-case O(A * N): Where A is the number of queued actions.
+        - Average-case O(1): Usually nothing is queued.
+        """
+        while True:
+            try:
+                requests, future = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue  # The client is gone
+            try:
+                results = perform_batch(game, requests)
+            except Exception as error:  # Report the failure instead of leaving the client waiting
+                future.set_exception(error)
+                continue
+            self.publish(game, force=True)
+            future.set_result(results)
+
+    def body(self, version, snapshot, path):
+        """
+        Returns the encoded body of a GET path for a version, encoding it once.
+        - Worst-case O(L): Encoding the state.
+        - Average-case O(1): Cached.
+        """
+        bodies = self.encoded.get(version)
+        if bodies is None:
+            bodies = {
+                "/state": encode({"version": version, **snapshot}),
+                "/actions": encode({"version": version, "actions": snapshot["actions"]}),
+            }
+            self.encoded = {version: bodies}  # Older versions are never served again
+        return bodies[path]
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of one keep-alive connection.
+        - Worst-case O(R): Where R is the number of requests on the connection.
+        - Average-case O(R): Same as worst-case.
+        """
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    await self.send(writer, 400, error="malformed request line")
+                    break
+                method, target, protocol = parts
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY:
+                    await self.send(writer, 413, error="request body too large")
+                    break
+                body = await reader.readexactly(length) if length else b""
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (
+                    protocol == "HTTP/1.1" and connection != "close"
+                )
+                await self.respond(writer, method, target.split("?")[0], headers, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+    async def respond(self, writer, method, path, headers, body, keep_alive):
+        """
+        Answers one request.
+        - Worst-case O(L + A * N): Encoding the state, or waiting for a batch of actions.
+        - Average-case O(1): A conditional GET of an unchanged state.
+        """
+        if path not in ("/state", "/actions"):
+            await self.send(writer, 404, keep_alive, error=f"no such endpoint {path}")
+            return
+        version, snapshot = self.current
+        if snapshot is None:
+            await self.send(writer, 404, keep_alive, error="the game has not started")
+            return
+        etag = f'"{version}"'
+        if method == "GET":
+            if headers.get("if-none-match") == etag:
+                await self.send(writer, 304, keep_alive, etag=etag)
+            else:
+                await self.send(writer, 200, keep_alive, self.body(version, snapshot, path), etag)
+            return
+        if method != "POST" or path != "/actions":
+            await self.send(writer, 405, keep_alive, error=f"{method} is not supported on {path}")
+            return
+        if "if-match" in headers and headers["if-match"] != etag:
+            await self.send(writer, 412, keep_alive, etag=etag, error="the state has changed")
+            return
+        try:
+            requests = json.loads(body or b"null")
+        except ValueError:
+            await self.send(writer, 400, keep_alive, error="the body is not JSON")
+            return
+        if isinstance(requests, dict):
+            requests = [requests]
+        if not isinstance(requests, list):
+            await self.send(writer, 400, keep_alive, error="post an action or a list of actions")
+            return
+        future = Future()
+        self.pending.put((requests, future))
+        results = await asyncio.wrap_future(future)
+        version = self.current[0]
+        await self.send(
+            writer,
+            200,
+            keep_alive,
+            encode({"version": version, "results": results}),
+            f'"{version}"',
+        )
+
+    async def send(self, writer, status, keep_alive=False, payload=b"", etag=None, error=None):
+        """
+        Writes a response.
+        - Worst-case O(L): Where L is the size of the payload.
+        - Average-case O(L): Same as worst-case.
+        """
+        if error is not None:
+            payload = encode({"error": error})
+        lines = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+            "Cache-Control: no-cache",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if etag is not None:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+    async def shutdown(self):
+        """
+        Stops accepting connections, fails the action batches the game loop has
+        not applied, closes the open connections and stops the loop once their
+        handlers have finished.
+        - Worst-case O(C + B): Where C is the number of open connections and B of queued batches.
+        - Average-case O(C): Usually nothing is queued.
+        """
+        self.server.close()
+        while True:
+            try:
+                _, future = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ConnectionError("the control server is closing"))
+        # Waiting readers see the end of the stream; handlers exit and close their writers
+        for writer in self.connections:
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        self.loop.stop()
+
+    def close(self):
+        """
+        Stops the server thread, closing keep-alive connections.
+        - Worst-case O(C + B): Where C is the number of open connections and B of queued batches.
+        - Average-case O(C): Usually nothing is queued.
+        """
+        if self.loop is not None and self.thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+            self.thread.join(5)
+
+
+def encode(message):
+    """
+    Returns a message as a JSON body.
+    - Worst-case O(L): Where L is the size of the message.
+    - Average-case O(L): Same as worst-case.
+    """
+    return json.dumps(message, separators=(",", ":")).encode("utf-8")
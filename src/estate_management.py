@@ -1,39 +1,112 @@
+import weakref
+from board_data import KIND_PROPERTY, KIND_STATION, KIND_UTILITY, load_board
+from rules import DEFAULT_RULES
+
+
+# Static estate data by board and house cost ratio, shared by every game of the process
+STATIC_ESTATES = weakref.WeakKeyDictionary()
+
+
+class EstateInfo:
+    """
+    The fixed data of a square: everything about it that no game changes.
+    Shared by the estates of every game on the same board and rules.
+    """
+
+    __slots__ = (
+        "name", "price", "rent", "position", "group", "buyable", "index", "house_cost", "kind"
+    )
+
+    def __init__(
+        self, name, price, rent, position, group, buyable, index=None, house_cost=None,
+        kind=KIND_PROPERTY,
+    ):
+        """
+        Initializes the data; index is the square number on the board and kind
+        its board_data kind.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        house_cost = price // 2 if house_cost is None else house_cost
+        for field, value in zip(
+            self.__slots__, (name, price, rent, position, group, buyable, index, house_cost, kind)
+        ):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Estate data is shared between games and cannot be changed ({name})")
+
+
+def static_field(name):
+    """
+    Returns a read-only property of Estate reading a field of its shared EstateInfo.
+    - Worst-case O(1): Building the property.
+    - Average-case O(1): Same as worst-case.
+    """
+    return property(lambda estate: getattr(estate.info, name))
+
+
 class Estate:
-    # Represents a property on the game board
-    def __init__(self, name, price, rent, position, group, buyable):
-        # Initialize the estate's attributes
-        self.name = name
-        self.price = price
-        self.group = group
-        self.rent = rent
-        self.house_cost = price // 2
+    """
+    A square of one game: the shared static data plus the state the game changes.
+    """
+
+    __slots__ = ("info", "owner", "houses", "hotel", "mortgaged")
+
+    name = static_field("name")
+    price = static_field("price")
+    rent = static_field("rent")
+    position = static_field("position")  # Pixel position of the square
+    group = static_field("group")
+    buyable = static_field("buyable")
+    index = static_field("index")
+    house_cost = static_field("house_cost")
+    kind = static_field("kind")
+
+    def __init__(self, info):
+        """
+        Initializes an unowned, unbuilt estate on the square described by info.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.info = info
         self.owner = None
         self.houses = 0
         self.hotel = False
         self.mortgaged = False
-        self.position = position
-        self.buyable = buyable
+
+    def fork(self):
+        """
+        Returns an unowned copy of the estate for a forked game, sharing its static data.
+        - Worst-case O(1): Copying four fields.
+        - Average-case O(1): Same as worst-case.
+        """
+        twin = Estate(self.info)
+        twin.houses = self.houses
+        twin.hotel = self.hotel
+        twin.mortgaged = self.mortgaged
+        return twin
 
     def get_current_rent(self, game):
         """Calculate the current rent based on estate type.
-        - Worst-case O(n): Iterating through all estates to find the owner.
-        - Average-case O(n): Same as worst-case.
+        - Worst-case O(g): Iterating through the estates of the group to count the owner's.
+        - Average-case O(g): Same as worst-case.
         """
-        if self.group == "Utility":
+        if self.kind == KIND_UTILITY:
             # Rent is 4 times dice roll if one utility owned, 10 times if both
             utilities_owned = [
-                estate for estate in game.estates
-                if estate.group == "Utility" and estate.owner == self.owner
+                estate for estate in game.group_estates[self.group]
+                if estate.owner == self.owner
             ]
             # Use average dice roll of 7 for estimation
             dice_roll_estimate = 7
             multiplier = 4 if len(utilities_owned) == 1 else 10
             rent = multiplier * dice_roll_estimate
-        elif self.group == "Station":
+        elif self.kind == KIND_STATION:
             # Rent depends on number of stations owned
             stations_owned = [
-                estate for estate in game.estates
-                if estate.group == "Station" and estate.owner == self.owner
+                estate for estate in game.group_estates[self.group]
+                if estate.owner == self.owner
             ]
             rent = 25 * len(stations_owned)
         else:
@@ -44,6 +117,19 @@ class Estate:
                 rent *= self.houses
         return rent
 
+    def rent_due(self):
+        """
+        Rent owed by a player landing on the estate, based on its buildings.
+        - Worst-case O(1): Arithmetic on the base rent.
+        - Average-case O(1): Same as worst-case.
+        """
+        rent = self.rent
+        if self.hotel:
+            rent *= 5
+        elif self.houses > 0:
+            rent *= self.houses
+        return rent
+
     def pay_rent(self, player):
         """
         Pay rent to the owner of the estate.
@@ -52,12 +138,8 @@ class Estate:
         """
         # Handles the payment of rent when a player lands on the estate
         if self.owner is not None and self.owner != player and not self.mortgaged:
-            rent_to_pay = self.rent
-            if self.hotel:
-                rent_to_pay *= 5
-            elif self.houses > 0:
-                rent_to_pay *= self.houses
-            
+            rent_to_pay = self.rent_due()
+
             # Check if the player can afford the rent
             if player.balance >= rent_to_pay:
                 player.balance -= rent_to_pay
@@ -71,11 +153,11 @@ class Estate:
     def build_house(self, game):
         """
         Build a house or hotel on the estate.
-        - Worst-case O(n): Iterating through all estates in the group.
-        - Average-case O(n): Same as worst-case.
+        - Worst-case O(g): Iterating through the estates in the group.
+        - Average-case O(g): Same as worst-case.
         """
-        group_estates = [estate for estate in game.estates if estate.group == self.group]
-        
+        group_estates = game.group_estates[self.group]
+
         # Check if the owner owns all estates in the group
         if all(estate.owner == self.owner for estate in group_estates):
             if self.houses < 4 and not self.hotel:
@@ -121,390 +203,42 @@ class Estate:
         return f"{self.name} - Price: {self.price}, Rent: {self.rent}, Houses: {self.houses}, Hotel: {self.hotel}, Owner: {self.owner.name if self.owner else 'None'}"
 
 
-def initialize_estates():
+def static_estates(board, rules=DEFAULT_RULES):
     """
-    Initialize the list of estates on the board.
-    - Worst-case O(1): Creating a list of estates with their properties.
-    - Average-case O(1): Same as worst-case.
+    Returns the static data of the board's squares under the rules, built once
+    per process and shared by every game on them.
+    - Worst-case O(N): Where N is the number of squares, on first use.
+    - Average-case O(1): Dictionary lookup.
     """
-    # Creates a list of estates with their respective properties
-    board_size = 700
-    estate_width = 58  # Width of each estate
-    corner_width = estate_width * 1.5  # Width of corner estates
-    offset = 30  # Small offset for x and y coordinates
+    by_ratio = STATIC_ESTATES.setdefault(board, {})
+    infos = by_ratio.get(rules.house_cost_ratio)
+    if infos is None:
+        infos = by_ratio[rules.house_cost_ratio] = [
+            EstateInfo(
+                board.names[i],
+                int(board.price[i]),
+                int(board.rent[i]),
+                board.pixels[i],
+                group=board.group_names[board.group_id[i]],
+                buyable=bool(board.buyable[i]),
+                index=i,
+                house_cost=rules.house_cost(int(board.price[i])),
+                kind=int(board.kind[i]),
+            )
+            for i in range(board.size)
+        ]
+    return infos
+
 
-    # List of estate objects with details such as name, price, rent, position, etc.
-    estates = [
-        Estate(
-            "Go",
-            0,
-            0,
-            (board_size - corner_width + offset, board_size - corner_width + offset),
-            group="Corner",
-            buyable=False,
-        ),
-        Estate(
-            "Old Kent Road",
-            60,
-            2,
-            (
-                board_size - corner_width - estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Brown",
-            buyable=True,
-        ),
-        Estate(
-            "Community Chest",
-            0,
-            0,
-            (
-                board_size - corner_width - 2 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Community Chest",
-            buyable=False,
-        ),
-        Estate(
-            "Whitechapel Road",
-            60,
-            4,
-            (
-                board_size - corner_width - 3 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Brown",
-            buyable=True,
-        ),
-        Estate(
-            "Income Tax",
-            200,
-            0,
-            (
-                board_size - corner_width - 4 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Tax",
-            buyable=False,
-        ),
-        Estate(
-            "Kings Cross Station",
-            200,
-            25,
-            (
-                board_size - corner_width - 5 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Station",
-            buyable=True,
-        ),
-        Estate(
-            "The Angel Islington",
-            100,
-            6,
-            (
-                board_size - corner_width - 6 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Light Blue",
-            buyable=True,
-        ),
-        Estate(
-            "Chance",
-            0,
-            0,
-            (
-                board_size - corner_width - 7 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Chance",
-            buyable=False,
-        ),
-        Estate(
-            "Euston Road",
-            100,
-            6,
-            (
-                board_size - corner_width - 8 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Light Blue",
-            buyable=True,
-        ),
-        Estate(
-            "Pentonville Road",
-            120,
-            8,
-            (
-                board_size - corner_width - 9 * estate_width + offset,
-                board_size - corner_width + offset,
-            ),
-            group="Light Blue",
-            buyable=True,
-        ),
-        Estate(
-            "Jail",
-            0,
-            0,
-            (0 + offset, board_size - corner_width + offset),
-            group="Corner",
-            buyable=False,
-        ),
-        Estate(
-            "Pall Mall",
-            140,
-            10,
-            (0 + offset, board_size - corner_width - estate_width + offset),
-            group="Pink",
-            buyable=True,
-        ),
-        Estate(
-            "Electric Company",
-            150,
-            0,
-            (0 + offset, board_size - corner_width - 2 * estate_width + offset),
-            group="Utility",
-            buyable=True,
-        ),
-        Estate(
-            "Whitehall",
-            140,
-            10,
-            (0 + offset, board_size - corner_width - 3 * estate_width + offset),
-            group="Pink",
-            buyable=True,
-        ),
-        Estate(
-            "Northumberland Avenue",
-            160,
-            12,
-            (0 + offset, board_size - corner_width - 4 * estate_width + offset),
-            group="Pink",
-            buyable=True,
-        ),
-        Estate(
-            "Marylebone Station",
-            200,
-            25,
-            (0 + offset, board_size - corner_width - 5 * estate_width + offset),
-            group="Station",
-            buyable=True,
-        ),
-        Estate(
-            "Bow Street",
-            180,
-            14,
-            (0 + offset, board_size - corner_width - 6 * estate_width + offset),
-            group="Orange",
-            buyable=True,
-        ),
-        Estate(
-            "Community Chest",
-            0,
-            0,
-            (0 + offset, board_size - corner_width - 7 * estate_width + offset),
-            group="Community Chest",
-            buyable=False,
-        ),
-        Estate(
-            "Marlborough Street",
-            180,
-            14,
-            (0 + offset, board_size - corner_width - 8 * estate_width + offset),
-            group="Orange",
-            buyable=True,
-        ),
-        Estate(
-            "Vine Street",
-            200,
-            16,
-            (0 + offset, board_size - corner_width - 9 * estate_width + offset),
-            group="Orange",
-            buyable=True,
-        ),
-        Estate(
-            "Free Parking",
-            0,
-            0,
-            (0 + offset, 0 + offset),
-            group="Corner",
-            buyable=False,
-        ),
-        Estate(
-            "Strand",
-            220,
-            18,
-            (corner_width + offset, 0 + offset),
-            group="Red",
-            buyable=True,
-        ),
-        Estate(
-            "Chance",
-            0,
-            0,
-            (corner_width + estate_width + offset, 0 + offset),
-            group="Chance",
-            buyable=False,
-        ),
-        Estate(
-            "Fleet Street",
-            220,
-            18,
-            (corner_width + 2 * estate_width + offset, 0 + offset),
-            group="Red",
-            buyable=True,
-        ),
-        Estate(
-            "Trafalgar Square",
-            240,
-            20,
-            (corner_width + 3 * estate_width + offset, 0 + offset),
-            group="Red",
-            buyable=True,
-        ),
-        Estate(
-            "Fenchurch St. Station",
-            200,
-            25,
-            (corner_width + 4 * estate_width + offset, 0 + offset),
-            group="Station",
-            buyable=True,
-        ),
-        Estate(
-            "Leicester Square",
-            260,
-            22,
-            (corner_width + 5 * estate_width + offset, 0 + offset),
-            group="Yellow",
-            buyable=True,
-        ),
-        Estate(
-            "Coventry Street",
-            260,
-            22,
-            (corner_width + 6 * estate_width + offset, 0 + offset),
-            group="Yellow",
-            buyable=True,
-        ),
-        Estate(
-            "Water Works",
-            150,
-            0,
-            (corner_width + 7 * estate_width + offset, 0 + offset),
-            group="Utility",
-            buyable=True,
-        ),
-        Estate(
-            "Piccadilly",
-            280,
-            24,
-            (corner_width + 8 * estate_width + offset, 0 + offset),
-            group="Yellow",
-            buyable=True,
-        ),
-        Estate(
-            "Go to Jail",
-            0,
-            0,
-            (board_size - corner_width + offset, 0 + offset),
-            group="Corner",
-            buyable=False,
-        ),
-        Estate(
-            "Regent Street",
-            300,
-            26,
-            (board_size - corner_width + offset, corner_width + offset),
-            group="Green",
-            buyable=True,
-        ),
-        Estate(
-            "Oxford Street",
-            300,
-            26,
-            (board_size - corner_width + offset, corner_width + estate_width + offset),
-            group="Green",
-            buyable=True,
-        ),
-        Estate(
-            "Community Chest",
-            0,
-            0,
-            (
-                board_size - corner_width + offset,
-                corner_width + 2 * estate_width + offset,
-            ),
-            group="Community Chest",
-            buyable=False,
-        ),
-        Estate(
-            "Bond Street",
-            320,
-            28,
-            (
-                board_size - corner_width + offset,
-                corner_width + 3 * estate_width + offset,
-            ),
-            group="Green",
-            buyable=True,
-        ),
-        Estate(
-            "Liverpool St. Station",
-            200,
-            25,
-            (
-                board_size - corner_width + offset,
-                corner_width + 4 * estate_width + offset,
-            ),
-            group="Station",
-            buyable=True,
-        ),
-        Estate(
-            "Chance",
-            0,
-            0,
-            (
-                board_size - corner_width + offset,
-                corner_width + 5 * estate_width + offset,
-            ),
-            group="Chance",
-            buyable=False,
-        ),
-        Estate(
-            "Park Lane",
-            350,
-            35,
-            (
-                board_size - corner_width + offset,
-                corner_width + 6 * estate_width + offset,
-            ),
-            group="Dark Blue",
-            buyable=True,
-        ),
-        Estate(
-            "Super Tax",
-            100,
-            0,
-            (
-                board_size - corner_width + offset,
-                corner_width + 7 * estate_width + offset,
-            ),
-            group="Tax",
-            buyable=False,
-        ),
-        Estate(
-            "Mayfair",
-            400,
-            50,
-            (
-                board_size - corner_width + offset,
-                corner_width + 8 * estate_width + offset,
-            ),
-            group="Dark Blue",
-            buyable=True,
-        ),
-    ]
-    return estates
+def initialize_estates(board=None, rules=DEFAULT_RULES):
+    """
+    Initialize the list of estates on the board, one per square, over the shared static data.
+    - Worst-case O(N): Where N is the number of squares on the board.
+    - Average-case O(N): Same as worst-case.
+    """
+    if board is None:
+        board = load_board()
+    return [Estate(info) for info in static_estates(board, rules)]
 
 
 def initialize_estate_dict(estate_lib):
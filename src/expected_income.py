@@ -0,0 +1,230 @@
+"""
+Expected income module
+
+Tables of the rent a square is expected to earn from one opponent turn, by
+build level, and of how many turns a purchase or a house takes to pay for
+itself. They let bots, the trade evaluator and the mortgage advice value
+properties without simulating games.
+
+Landing probabilities come from a Markov chain over board positions plus the
+turns spent in jail: each turn the token moves by the sum of two dice, "Go to
+Jail" and Jail cards send it to jail for the number of turns set by the rules,
+and Chance and Community Chest squares redistribute it over the targets of
+their cards. The stationary distribution of the chain gives the share of
+opponent turns that end on each square. Doubles and Get Out of Jail Free cards
+are not modelled.
+"""
+
+import weakref
+import numpy as np
+from board_data import (
+    KIND_PROPERTY,
+    KIND_STATION,
+    KIND_UTILITY,
+    KIND_CHANCE,
+    KIND_COMMUNITY_CHEST,
+    KIND_GO_TO_JAIL,
+    RENT_LEVELS,
+    HOTEL_LEVEL,
+)
+from rules import DEFAULT_RULES
+from turn_fsm import CARD_JAIL, card_destination, compile_cards
+
+
+STATION_RENT = 25
+AVERAGE_DICE_ROLL = 7
+
+# Sums of two dice and their probabilities
+DICE_TOTALS = np.arange(2, 13)
+DICE_PROBABILITIES = (6 - np.abs(DICE_TOTALS - 7)) / 36
+
+# Power iteration stops once the distribution moves less than this in total
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 10000
+
+# Tables per board, then per rules key
+_income_tables = weakref.WeakKeyDictionary()
+
+
+def card_destinations(board, deck, position):
+    """
+    Returns (destination, probability) pairs for drawing a card of the deck on
+    a square; destination is None for cards that send the player to jail.
+    - Worst-case O(C): Where C is the number of cards in the deck.
+    - Average-case O(C): Same as worst-case.
+    """
+    probability = 1.0 / len(deck)
+    destinations = []
+    for opcode, target, _, _ in compile_cards(deck):
+        if opcode == CARD_JAIL:
+            destination = None
+        else:
+            destination = card_destination(board, opcode, target, position)
+            if destination < 0:
+                destination = position  # No square of that kind on this board
+        destinations.append((destination, probability))
+    return destinations
+
+
+def resolution_table(board):
+    """
+    Returns (sources, destinations, weights) arrays describing where a token that
+    lands on each square ends its turn; destination board.size stands for jail.
+    - Worst-case O(N + K * C): Where K is the number of card squares.
+    - Average-case O(N + K * C): Same as worst-case.
+    """
+    jail = board.size
+    sources, destinations, weights = [], [], []
+    for position, kind in enumerate(board.kind.tolist()):
+        if kind == KIND_GO_TO_JAIL:
+            outcomes = [(None, 1.0)]
+        elif kind == KIND_CHANCE and board.chance:
+            outcomes = card_destinations(board, board.chance, position)
+        elif kind == KIND_COMMUNITY_CHEST and board.community_chest:
+            outcomes = card_destinations(board, board.community_chest, position)
+        else:
+            outcomes = [(position, 1.0)]
+        for destination, probability in outcomes:
+            sources.append(position)
+            destinations.append(jail if destination is None else destination)
+            weights.append(probability)
+    return np.array(sources), np.array(destinations), np.array(weights)
+
+
+def landing_probabilities(board, rules=DEFAULT_RULES):
+    """
+    Returns the probability of an opponent turn ending with a move onto each
+    square, from the stationary distribution of the movement Markov chain.
+    Turns spent in jail end on no square, so the total is below 1.
+    - Worst-case O(I * N): Where I is the number of power iterations (about a hundred).
+    - Average-case O(I * N): Same as worst-case.
+    """
+    size = board.size
+    jail_turns = rules.jail_turns
+    sources, destinations, weights = resolution_table(board)
+    states = size + jail_turns
+    free = np.full(size, 1.0 / states)  # Tokens that move this turn
+    jailed = np.full(jail_turns, 1.0 / states)  # jailed[k]: k turns already served
+    landings = free
+    for _ in range(MAX_ITERATIONS):
+        # Moving by two dice is a circular shift per total
+        rolled = np.zeros(size)
+        for total, probability in zip(DICE_TOTALS.tolist(), DICE_PROBABILITIES.tolist()):
+            rolled += probability * np.roll(free, total % size)
+        landings = np.bincount(
+            destinations, weights=rolled[sources] * weights, minlength=size + 1
+        )
+        next_free = landings[:size].copy()
+        next_free[board.jail_position] += jailed[-1]  # Released after the last jail turn
+        next_jailed = np.empty(jail_turns)
+        next_jailed[0] = landings[size]
+        next_jailed[1:] = jailed[:-1]
+        change = np.abs(next_free - free).sum() + np.abs(next_jailed - jailed).sum()
+        free, jailed = next_free, next_jailed
+        if change < TOLERANCE:
+            break
+    return landings[:size]
+
+
+def rent_by_level(board):
+    """
+    Returns rent[position, level] for every square and build level. For stations
+    and utilities the level is the number of squares of the group the owner holds.
+    - Worst-case O(N): Where N is the number of squares.
+    - Average-case O(N): Same as worst-case.
+    """
+    rent = board.rent_table.astype(np.float64)
+    counts = np.arange(RENT_LEVELS)
+    rent[board.kind == KIND_STATION] = STATION_RENT * counts
+    utility_rent = np.where(counts == 1, 4, 10) * AVERAGE_DICE_ROLL
+    utility_rent[0] = 0
+    rent[board.kind == KIND_UTILITY] = utility_rent
+    rent[~np.isin(board.kind, (KIND_PROPERTY, KIND_STATION, KIND_UTILITY))] = 0
+    return rent
+
+
+def cached_tables(board, rules):
+    """
+    Returns the cached tables of a board under the given rules, computing the
+    income table on the first call.
+    - Worst-case O(I * N): Solving the Markov chain on the first call.
+    - Average-case O(1): Cached lookup.
+    """
+    per_rules = _income_tables.get(board)
+    if per_rules is None:
+        per_rules = _income_tables[board] = {}
+    tables = per_rules.get(rules.key())
+    if tables is None:
+        income = landing_probabilities(board, rules)[:, None] * rent_by_level(board)
+        income.setflags(write=False)
+        tables = per_rules[rules.key()] = {"income": income}
+    return tables
+
+
+def expected_rent_per_opponent_turn(board, rules=DEFAULT_RULES):
+    """
+    Returns the expected rent earned per opponent turn, indexed [position, level].
+    Tables are computed once per board and rule set.
+    - Worst-case O(I * N): Building the table on the first call.
+    - Average-case O(1): Cached lookup.
+    """
+    return cached_tables(board, rules)["income"]
+
+
+def building_costs(board, rules=DEFAULT_RULES):
+    """
+    Returns cost[position, level] of building from level to level + 1; the
+    hotel (the last level) costs two houses.
+    - Worst-case O(N): Where N is the number of squares.
+    - Average-case O(N): Same as worst-case.
+    """
+    house_cost = np.array([rules.house_cost(int(price)) for price in board.price], dtype=np.float64)
+    costs = np.repeat(house_cost[:, None], HOTEL_LEVEL, axis=1)
+    costs[:, HOTEL_LEVEL - 1] *= 2
+    return costs
+
+
+def payback_turns(board, rules=DEFAULT_RULES, opponents=1):
+    """
+    Returns (purchase, building) payback periods in opponent turns per opponent:
+    purchase[position] is the price over the expected income of the square
+    on its own, building[position, level] the cost of the next building level
+    over the income it adds. Squares that earn nothing get infinity.
+    The tables are cached per board, rule set and number of opponents.
+    - Worst-case O(I * N): Building the income table on the first call.
+    - Average-case O(1): Cached lookup.
+    """
+    tables = cached_tables(board, rules)
+    key = ("payback", opponents)
+    if key not in tables:
+        income = expected_rent_per_opponent_turn(board, rules) * opponents
+        # A lone station or utility earns its level 1 rent
+        owned_level = np.where(board.kind == KIND_PROPERTY, 0, 1)
+        purchase_income = income[np.arange(board.size), owned_level]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            purchase = np.where(
+                purchase_income > 0, board.price / purchase_income, np.inf
+            )
+            gain = np.diff(income, axis=1)
+            building = np.where(
+                (gain > 0) & (board.kind == KIND_PROPERTY)[:, None],
+                building_costs(board, rules) / gain,
+                np.inf,
+            )
+        purchase.setflags(write=False)
+        building.setflags(write=False)
+        tables[key] = (purchase, building)
+    return tables[key]
+
+
+def income_level(estate, owned_in_group):
+    """
+    Returns the level of the income table that applies to an estate: its
+    building level for properties, the number of group squares its owner
+    holds for stations and utilities.
+    - Worst-case O(1): Reading the estate.
+    - Average-case O(1): Same as worst-case.
+    """
+    if estate.kind in (KIND_STATION, KIND_UTILITY):
+        return owned_in_group
+    return HOTEL_LEVEL if estate.hotel else estate.houses
@@ -0,0 +1,302 @@
+"""
+Frame export module
+
+Renders game states to PNG files without opening a window, for reports on
+many simulated games. States come from replay recordings (one frame every
+few turns) or from headless engine games played here (their final table).
+Each state is drawn with the game's own draw_tokens and draw_player_info on
+SDL's dummy video driver, and written either as one PNG per state or as
+thumbnails on contact sheets.
+
+Rendering is spread over a process pool. Every worker builds one game view
+and keeps it for all of its frames: the board image is loaded and converted
+once, and rendered text (estate names, labels, buttons) is cached, so a frame
+only redraws the tokens, houses and the changing numbers. States are handed
+to workers in chunks to amortize the inter-process overhead.
+
+Usage:
+    python src/frame_export.py --replay game.ndjson --every 10 --output frames
+    python src/frame_export.py --games 1000 --players 6 --sheet --output sheets
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from board_data import load_board
+from large_table import LargeTableEngine
+from replay import Replay, apply_view, engine_view
+from rng import GameRandom
+
+
+# States are handed to workers in chunks to amortize the inter-process overhead
+CHUNK_FRAMES = 16
+# Thumbnail width on contact sheets; the height keeps the window's aspect ratio
+THUMBNAIL_WIDTH = 250
+SHEET_COLUMNS = 8
+SHEET_ROWS = 6
+# Rendered texts kept per worker before the cache is emptied
+TEXT_CACHE_SIZE = 4096
+
+WINDOW_SIZE = (1000, 700)
+CAPTION_HEIGHT = 24
+
+renderer = None  # FrameRenderer of this worker process, built on first use
+
+
+class CachedFont:
+    """
+    Font wrapper that renders every distinct text once and reuses the surface.
+    """
+
+    def __init__(self, font, limit=TEXT_CACHE_SIZE):
+        """
+        Initializes the wrapper with an empty cache.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.font = font
+        self.limit = limit
+        self.texts = {}
+
+    def render(self, text, antialias, color, background=None):
+        """
+        Returns the rendered text, rendering it on first use.
+        - Worst-case O(L): Where L is the length of the text, on a miss.
+        - Average-case O(1): Dictionary lookup.
+        """
+        key = (text, antialias, str(color), str(background))
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) >= self.limit:
+                self.texts.clear()  # Changing numbers would otherwise grow it without bound
+            surface = self.texts[key] = self.font.render(text, antialias, color, background)
+        return surface
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+
+class FrameRenderer:
+    """
+    Offscreen game view that draws public game states onto its screen surface.
+    """
+
+    def __init__(self, board_path=None):
+        """
+        Builds the game view on the dummy video driver.
+        - Worst-case O(N + S): Setting up the game and loading the board image of S pixels.
+        - Average-case O(N + S): Same as worst-case.
+        """
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        from main import Game  # Imported here so only workers set up pygame's display
+
+        self.board = load_board(board_path) if board_path else load_board()
+        self.game = Game(board=self.board)
+        self.game.setup_phase = False
+        self.game.font = CachedFont(self.game.font)
+        self.caption_font = CachedFont(self.game.assets.font(CAPTION_HEIGHT - 4))
+        self.thumbnail = None
+        self.replays = {}  # Recordings loaded by this worker, by path
+
+    def render(self, state):
+        """
+        Draws a state and returns the screen surface, valid until the next render.
+        - Worst-case O(P + N): Applying the state and drawing the tokens and houses.
+        - Average-case O(P + N): Same as worst-case.
+        """
+        game = self.game
+        apply_view(game, state)
+        game.blit(game.background, (0, 0))
+        if game.players:
+            game.draw_tokens()
+            game.draw_player_info()
+        return game.screen
+
+    def render_thumbnail(self, state, caption, width):
+        """
+        Draws a state scaled down to width with a caption underneath and returns it
+        as raw RGB bytes.
+        - Worst-case O(P + N + S): Where S is the number of pixels of the frame.
+        - Average-case O(P + N + S): Same as worst-case.
+        """
+        height = round(width * WINDOW_SIZE[1] / WINDOW_SIZE[0])
+        size = (width, height + CAPTION_HEIGHT)
+        if self.thumbnail is None or self.thumbnail.get_size() != size:
+            self.thumbnail = pygame.Surface(size)
+        self.thumbnail.fill((255, 255, 255))
+        frame = self.render(state)
+        self.thumbnail.blit(pygame.transform.smoothscale(frame, (width, height)), (0, 0))
+        text = self.caption_font.render(caption, True, (0, 0, 0))
+        self.thumbnail.blit(text, (4, height + (CAPTION_HEIGHT - text.get_height()) // 2))
+        return pygame.image.tobytes(self.thumbnail, "RGB")
+
+
+def worker_renderer(board_path):
+    """
+    Returns this process's renderer, building it on first use.
+    - Worst-case O(N + S): Building the renderer once per process.
+    - Average-case O(1): Already built.
+    """
+    global renderer
+    if renderer is None:
+        renderer = FrameRenderer(board_path)
+    return renderer
+
+
+def final_state(board, seed, game, num_players, turns):
+    """
+    Plays headless game g on random stream g of seed and returns its final
+    public state and a caption.
+    - Worst-case O(T * P): Where T is the turn budget.
+    - Average-case O(T * P): Same as worst-case.
+    """
+    engine = LargeTableEngine(board, num_players, rng=GameRandom.stream(seed, game))
+    winner = engine.run(turns)
+    names = [f"Player {player + 1}" for player in range(num_players)]
+    caption = f"Game {game}: {engine.turn} turns"
+    caption += f", {names[winner]} wins" if winner >= 0 else ", unfinished"
+    return engine_view(engine, names), caption
+
+
+def render_chunk(board_path, items, output, sheet, width):
+    """
+    Renders a chunk of states. Each item is ("replay", path, turn) or
+    ("game", seed, game, players, turns). Frames are written to output as
+    PNG files; for contact sheets the thumbnails are returned instead.
+    - Worst-case O(F * (P + N + S)): Where F is the number of frames in the chunk.
+    - Average-case O(F * (P + N + S)): Same as worst-case, plus T * P per played game.
+    """
+    frame_renderer = worker_renderer(board_path)
+    replays = frame_renderer.replays
+    results = []
+    for item in items:
+        if item[0] == "replay":
+            _, path, turn = item
+            if path not in replays:
+                replays[path] = Replay(path)
+            state = replays[path].state_at(turn)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            name, caption = f"{stem}-{turn:06d}", f"{stem}: turn {turn}"
+        else:
+            _, seed, game, num_players, turns = item
+            state, caption = final_state(frame_renderer.board, seed, game, num_players, turns)
+            name = f"game-{game:06d}"
+        if sheet:
+            results.append((caption, frame_renderer.render_thumbnail(state, caption, width)))
+        else:
+            filename = os.path.join(output, f"{name}.png")
+            pygame.image.save(frame_renderer.render(state), filename)
+            results.append((caption, filename))
+    return results
+
+
+def save_sheets(thumbnails, output, width, columns=SHEET_COLUMNS, rows=SHEET_ROWS):
+    """
+    Lays thumbnails out on contact sheets of columns x rows and saves them as
+    PNG files. Returns the sheet files and the sheet and cell of every thumbnail.
+    - Worst-case O(F * S): Where F is the number of thumbnails and S their size.
+    - Average-case O(F * S): Same as worst-case.
+    """
+    height = round(width * WINDOW_SIZE[1] / WINDOW_SIZE[0]) + CAPTION_HEIGHT
+    per_sheet = columns * rows
+    files, index = [], []
+    for start in range(0, len(thumbnails), per_sheet):
+        page = thumbnails[start : start + per_sheet]
+        used_rows = (len(page) + columns - 1) // columns
+        surface = pygame.Surface((columns * width, used_rows * height))
+        surface.fill((255, 255, 255))
+        for cell, (caption, data) in enumerate(page):
+            thumbnail = pygame.image.frombytes(data, (width, height), "RGB")
+            surface.blit(thumbnail, ((cell % columns) * width, (cell // columns) * height))
+            index.append({"caption": caption, "sheet": len(files), "cell": cell})
+        filename = os.path.join(output, f"sheet-{len(files):04d}.png")
+        pygame.image.save(surface, filename)
+        files.append(filename)
+    return files, index
+
+
+def export_frames(
+    items, output, board_path=None, sheet=False, width=THUMBNAIL_WIDTH, workers=None
+):
+    """
+    Renders the given states (see render_chunk) on a process pool into output,
+    as PNG frames or contact sheets, and writes an index.json describing them.
+    Returns the files written.
+    - Worst-case O(F * (P + N + S) / W): Where F is the number of frames and W the number of workers.
+    - Average-case O(F * (P + N + S) / W): Same as worst-case.
+    """
+    os.makedirs(output, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                render_chunk,
+                board_path,
+                items[start : start + CHUNK_FRAMES],
+                output,
+                sheet,
+                width,
+            )
+            for start in range(0, len(items), CHUNK_FRAMES)
+        ]
+        results = [result for future in futures for result in future.result()]
+    if sheet:
+        files, index = save_sheets(results, output, width)
+    else:
+        files = [filename for _, filename in results]
+        index = [{"caption": caption, "file": filename} for caption, filename in results]
+    with open(os.path.join(output, "index.json"), "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=1)
+    return files
+
+
+def replay_items(paths, every=1):
+    """
+    Returns the render items of every few turns of each recording, including its last turn.
+    - Worst-case O(R * T / every): Where R is the number of recordings and T their length.
+    - Average-case O(R * T / every): Same as worst-case.
+    """
+    items = []
+    for path in paths:
+        last = len(Replay(path)) - 1
+        turns = list(range(0, last + 1, every))
+        if turns[-1] != last:
+            turns.append(last)
+        items.extend(("replay", path, turn) for turn in turns)
+    return items
+
+
+def main(argv=None):
+    """
+    Command line entry point for exporting frames and contact sheets.
+    - Worst-case O(F * (P + N + S) / W): The export itself.
+    - Average-case O(F * (P + N + S) / W): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Render Monopoly game states to PNG files")
+    parser.add_argument("--replay", nargs="+", metavar="PATH", help="recordings to render")
+    parser.add_argument("--every", type=int, default=1, help="render every EVERY-th turn")
+    parser.add_argument("--games", type=int, help="play and render the end of this many games")
+    parser.add_argument("--players", type=int, default=4, help="players per played game")
+    parser.add_argument("--max-turns", type=int, default=2000, help="turn budget per played game")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the played games")
+    parser.add_argument("--board", metavar="PATH", help="board data file")
+    parser.add_argument("--sheet", action="store_true", help="write contact sheets of thumbnails")
+    parser.add_argument("--width", type=int, default=THUMBNAIL_WIDTH, help="thumbnail width")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default="frames", help="directory to write the images to")
+    args = parser.parse_args(argv)
+    if not args.replay and not args.games:
+        parser.error("give recordings with --replay or a number of --games to play")
+    items = replay_items(args.replay or [], args.every)
+    items += [
+        ("game", args.seed, game, args.players, args.max_turns) for game in range(args.games or 0)
+    ]
+    files = export_frames(
+        items, args.output, args.board, args.sheet, args.width, args.workers
+    )
+    print(f"Rendered {len(items)} states to {len(files)} files in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,769 @@
+"""
+Fuzz module
+
+Randomized checking of the game rules. A fuzz case plays random legal
+actions on a headless Game: rolls, purchases, building, mortgages, trades
+(random ones, and the best deal TradeEvaluator finds for the player), and
+auction bids and passes. After every action the invariants are
+checked incrementally, on the players and estates the action could have
+touched:
+
+- money: cash is conserved between the players and the bank (which holds the
+  Free Parking jackpot): every change of a player's cash goes through
+  update_balance, the bank's side of every payment through
+  Game.bank_transfer, and the changes of all players and the bank sum to
+  zero. Rent paid to another player is the rent due and is received in full,
+  and actions with a fixed price (buying, building, mortgaging, trades,
+  auctions) move exactly that amount;
+- ownership: an estate's owner lists it in their estates, in board order, and
+  nobody lists an estate they do not own;
+- monopoly: houses and hotels only stand in a group owned by a single player;
+- mortgaged rent: nobody is paid rent for a mortgaged estate.
+
+A case is a seed (dice and decks come from stream `case` of it, as in
+sweep.py) and its list of actions. A failing case is shrunk by replaying it
+with chunks of actions removed, keeping every removal after which the same
+invariant still fails, and written as a JSON file that --replay runs again.
+Cases are spread over a process pool; each worker builds one game and resets
+it between cases.
+
+Usage:
+    python src/fuzz.py --cases 1000 --actions 2000 --seed 0
+    python src/fuzz.py --replay fuzz_failures/case-12.json
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # The fuzzer never opens a window
+
+from auction import SEALED
+from card_management import create_chance_deck, create_community_chest_deck
+from main import GameFork
+from player_management import Player
+from rng import GameRandom
+from trade_engine import TradeEvaluator, TradeProposal, execute_trade
+
+
+# Relative chance of each kind of action when it is legal
+ACTION_WEIGHTS = {
+    "roll": 6,
+    "end_turn": 6,
+    "buy": 4,
+    "build": 3,
+    "mortgage": 1,
+    "unmortgage": 1,
+    "trade": 1,
+}
+# Cases are handed to workers in chunks to amortize the inter-process overhead
+CHUNK_CASES = 10
+# Every estate is checked this often, in case a change slipped past the incremental checks
+FULL_CHECK_INTERVAL = 256
+MAX_TRADE_CASH = 300
+# Chance that a trade is the evaluator's best deal rather than a random one
+EVALUATED_TRADE_CHANCE = 0.5
+# Account of the bank's side of payments in the journal
+BANK = "bank"
+
+game = None  # FuzzGame of this worker process, built on first use
+
+
+class NullWriter:
+    """
+    Output stream that discards everything, to silence the game's log while fuzzing.
+    """
+
+    def write(self, text):
+        """
+        Discards the text.
+        - Worst-case O(1): Nothing is kept.
+        - Average-case O(1): Same as worst-case.
+        """
+        return len(text)
+
+    def flush(self):
+        """
+        Does nothing, as nothing is buffered.
+        - Worst-case O(1): Nothing to flush.
+        - Average-case O(1): Same as worst-case.
+        """
+
+
+class LedgerPlayer(Player):
+    """
+    Player that records every change of their cash in a shared journal.
+    """
+
+    __slots__ = ("journal",)
+
+    def __init__(self, name, color, initial_balance, journal):
+        """
+        Initializes the player with the journal their payments are recorded in.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().__init__(name, color, initial_balance)
+        self.journal = journal
+
+    def update_balance(self, amount):
+        """
+        Updates the balance and records the change.
+        - Worst-case O(1): Appending to the journal.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.balance += amount
+        self.journal.append((self, amount))
+
+
+class FuzzGame(GameFork):
+    """
+    Headless game whose players and the bank journal every payment.
+    """
+
+    def __init__(self):
+        """
+        Sets up the game and the trade evaluator of its board.
+        - Worst-case O(N + S): Where S is the size of the assets.
+        - Average-case O(N + S): Same as worst-case.
+        """
+        super().__init__()
+        self.evaluator = TradeEvaluator(self)
+
+    def fork(self):
+        """
+        Returns a fork of the game (see Game.fork) with its own journal, seats
+        and trade evaluator, so payments in the fork are journaled there only.
+        - Worst-case O(N + P + C): Forking the game.
+        - Average-case O(N + P): Same as worst-case.
+        """
+        child = super().fork()
+        twins = dict(zip(self.players, child.players))
+        child.journal = []
+        child.seats = [twins[seat] if seat in twins else seat.fork() for seat in self.seats]
+        for seat in child.seats:
+            seat.journal = child.journal
+        child.evaluator = copy.copy(self.evaluator)
+        child.evaluator.game = child
+        return child
+
+    def bank_transfer(self, player, amount):
+        """
+        Pays between the bank and a player, recording the bank's side in the journal.
+        - Worst-case O(1): Two journal entries.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().bank_transfer(player, amount)
+        self.journal.append((BANK, -amount))
+
+    def reset(self, seed, case, num_players):
+        """
+        Starts a new game of num_players on random stream case of seed.
+        - Worst-case O(P + N + C): Resetting the players, estates and decks.
+        - Average-case O(P + N + C): Same as worst-case.
+        """
+        self.journal = []
+        self.seats = [
+            LedgerPlayer(f"P{seat}", f"color{seat}", self.rules.starting_balance, self.journal)
+            for seat in range(num_players)
+        ]
+        self.players = list(self.seats)
+        for estate in self.estates:
+            estate.owner = None
+            estate.houses, estate.hotel, estate.mortgaged = 0, False, False
+        self.random = GameRandom.stream(seed, case)
+        self.chance_deck = create_chance_deck(self.board, self.random)
+        self.community_chest_deck = create_community_chest_deck(self.board, self.random)
+        self.players_with_estates = 0
+        self.current_player_index = 0
+        self.dice_rolled = False
+        self.declined_estate = None
+        self.auction = None
+        self.winner = None
+        self.jackpot = 0
+        self.last_dice = None
+        self.current_card = None
+        self.setup_phase = False
+        self.turn.start_turn(self.players[0])
+        self.update_buttons()
+
+
+def worker_game():
+    """
+    Returns this process's fuzz game, building it on first use.
+    - Worst-case O(N + S): Setting up the game and its assets once per process.
+    - Average-case O(1): Already built.
+    """
+    global game
+    if game is None:
+        game = FuzzGame()
+    return game
+
+
+def legal_kinds(game):
+    """
+    Returns the kinds of action the current player may take outside auctions.
+    - Worst-case O(h + P): Where h is the number of estates the player owns.
+    - Average-case O(h): Same as worst-case.
+    """
+    buttons = game.buttons
+    kinds = [
+        kind
+        for kind, button in (
+            ("roll", buttons[0]),
+            ("buy", buttons[1]),
+            ("build", buttons[2]),
+            ("end_turn", buttons[5]),
+        )
+        if button["enabled"]
+    ]
+    player = game.players[game.current_player_index]
+    if any(not estate.mortgaged and not estate.houses and not estate.hotel for estate in player.estates):
+        kinds.append("mortgage")
+    if any(estate.mortgaged and player.balance >= estate.price for estate in player.estates):
+        kinds.append("unmortgage")
+    if game.players_with_estates and len(game.players) > 1:
+        kinds.append("trade")
+    return kinds
+
+
+def tradeable(game, player, chooser, count):
+    """
+    Returns up to count random positions of the player's estates in groups without buildings.
+    - Worst-case O(h * g): Where h is the number of estates the player owns and g the size of their groups.
+    - Average-case O(h * g): Same as worst-case.
+    """
+    positions = [
+        estate.index
+        for estate in player.estates
+        if not any(other.houses or other.hotel for other in game.group_estates[estate.group])
+    ]
+    return sorted(chooser.sample(positions, min(count, len(positions))))
+
+
+def random_action(game, chooser):
+    """
+    Returns a random legal action as a JSON-serializable list.
+    - Worst-case O(P * n + n * k * g): Searching the player's trades, see TradeEvaluator.find_trades.
+    - Average-case O(h): Listing the legal actions.
+    """
+    auction = game.auction
+    if auction is not None:
+        bidder = auction.current_bidder()
+        low = auction.min_bid()
+        if bidder.balance >= low and chooser.random() < 0.6:
+            return ["bid", chooser.randint(low, min(bidder.balance, low + 200))]
+        return ["pass"]
+    kinds = legal_kinds(game)
+    kind = chooser.choices(kinds, [ACTION_WEIGHTS[kind] for kind in kinds])[0]
+    player = game.players[game.current_player_index]
+    if kind == "mortgage":
+        return [kind, chooser.choice([e.index for e in player.estates if not e.mortgaged and not e.houses and not e.hotel])]
+    if kind == "unmortgage":
+        return [kind, chooser.choice([e.index for e in player.estates if e.mortgaged and player.balance >= e.price])]
+    if kind == "trade":
+        if chooser.random() < EVALUATED_TRADE_CHANCE:
+            trades = game.evaluator.find_trades([player])
+            if trades:
+                proposal = trades[0][0]
+                return [
+                    kind,
+                    game.seats.index(proposal.responder),
+                    [estate.index for estate in proposal.give_estates],
+                    [estate.index for estate in proposal.take_estates],
+                    proposal.give_cash,
+                    proposal.take_cash,
+                ]
+        responder = chooser.choice([other for other in game.players if other is not player])
+        cash = chooser.randint(-MAX_TRADE_CASH, MAX_TRADE_CASH)
+        return [
+            kind,
+            game.seats.index(responder),
+            tradeable(game, player, chooser, chooser.randint(0, 2)),
+            tradeable(game, responder, chooser, chooser.randint(0, 2)),
+            max(0, cash),
+            max(0, -cash),
+        ]
+    return [kind]
+
+
+def apply_action(game, action):
+    """
+    Applies an action if it is legal in the current state, as the game's
+    buttons and popups would. Returns whether it was applied; shrunk cases
+    contain actions that are no longer legal and are skipped.
+    - Worst-case O(N + h log h): A roll moving and liquidating a player.
+    - Average-case O(1): Most actions are single state changes.
+    """
+    kind = action[0]
+    if game.winner is not None:
+        return False
+    auction = game.auction
+    if (auction is not None) != (kind in ("bid", "pass")):
+        return False
+    if auction is not None:
+        if auction.mode == SEALED:
+            if not auction.submit_sealed(action[1] if kind == "bid" else 0):
+                return False
+        elif kind == "pass":
+            auction.pass_turn()
+        elif not auction.bid(action[1]):
+            return False
+        game.continue_auction()
+        return True
+    player = game.players[game.current_player_index]
+    if kind in ("roll", "buy", "build", "end_turn"):
+        button = game.buttons[("roll", "buy", "build", None, None, "end_turn").index(kind)]
+        if not button["enabled"]:
+            return False
+        button["action"]()
+        return True
+    if kind in ("mortgage", "unmortgage"):
+        estate = game.estates[action[1]]
+        if estate.owner is not player:
+            return False
+        if kind == "mortgage":
+            if estate.mortgaged or estate.houses or estate.hotel:
+                return False
+            game.mortgage_property(player, estate)
+        else:
+            if not estate.mortgaged or player.balance < estate.price:
+                return False
+            game.unmortgage_property(player, estate)
+        game.update_buttons()
+        return True
+    if kind == "trade":
+        _, seat, give, take, give_cash, take_cash = action
+        responder = game.seats[seat]
+        if responder is player or responder not in game.players:
+            return False
+        proposal = TradeProposal(
+            player,
+            responder,
+            give_estates=[game.estates[position] for position in give],
+            take_estates=[game.estates[position] for position in take],
+            give_cash=give_cash,
+            take_cash=take_cash,
+        )
+        if not execute_trade(game, proposal):
+            return False
+        game.update_buttons()
+        return True
+    return False
+
+
+class InvariantChecker:
+    """
+    Checks the rule invariants after every action, on what the action could have changed.
+    """
+
+    def __init__(self, game):
+        """
+        Records the current state of a game, freshly reset or forked.
+        - Worst-case O(P + N): Copying the balances and estates.
+        - Average-case O(P + N): Same as worst-case.
+        """
+        self.game = game
+        self.balances = {player: player.balance for player in game.seats}
+        self.positions = {player: player.position for player in game.seats}
+        self.estates = [estate_state(estate) for estate in game.estates]
+        self.players = len(game.players)
+        self.auction = game.auction
+        self.steps = 0
+
+    def check(self, action, actor):
+        """
+        Checks the invariants after actor took an action and returns the name
+        and description of the first one violated, or None.
+        - Worst-case O(P + N * g): A full check of every estate and group.
+        - Average-case O(P + h): The players and the estates the action touched.
+        """
+        game = self.game
+        self.steps += 1
+        changed = []
+        for position in self.touched_positions(action):
+            state = estate_state(game.estates[position])
+            if state != self.estates[position]:
+                changed.append((position, self.estates[position]))
+                self.estates[position] = state
+        violation = self.check_money(action, actor, changed)
+        if violation is None and changed:
+            violation = self.check_ownership(changed) or self.check_monopolies(changed)
+        if violation is None and action[0] == "roll":
+            violation = self.check_rent(actor) or self.check_mortgaged_rent()
+        self.balances = {player: player.balance for player in game.seats}
+        self.positions = {player: player.position for player in game.seats}
+        self.players = len(game.players)
+        self.auction = game.auction
+        return violation
+
+    def touched_positions(self, action):
+        """
+        Returns the positions of the estates an action could have changed.
+        - Worst-case O(N): Every estate, after a bankruptcy and every FULL_CHECK_INTERVAL actions.
+        - Average-case O(h): The estates of the players who paid or were paid.
+        """
+        game = self.game
+        kind = action[0]
+        if len(game.players) != self.players or self.steps % FULL_CHECK_INTERVAL == 0:
+            return range(len(game.estates))  # A bankruptcy can move every estate
+        if kind in ("mortgage", "unmortgage"):
+            return [action[1]]
+        if kind == "trade":
+            return action[2] + action[3]
+        if kind in ("bid", "pass"):
+            return [self.auction.estate.index]
+        if kind == "end_turn":
+            return []
+        # Buying and building change the estate the player stands on; paying a
+        # debt can mortgage estates and sell buildings of whoever paid
+        positions = {player.position for player in game.players}
+        for player, _ in game.journal:
+            if player is not BANK:
+                positions.update(estate.index for estate in player.estates)
+        return positions
+
+    def check_money(self, action, actor, changed):
+        """
+        Checks that cash only changed through update_balance, that no money was
+        created or destroyed between the players and the bank, that players who
+        left the game have none, and that actions with a fixed price paid exactly that.
+        - Worst-case O(P + J): Where J is the number of payments in the journal.
+        - Average-case O(P): A few payments per action.
+        """
+        game = self.game
+        paid = {}
+        for player, amount in game.journal:
+            paid[player] = paid.get(player, 0) + amount
+        total = paid.get(BANK, 0) + sum(
+            player.balance - self.balances[player] for player in game.seats
+        )
+        if total:
+            return "money", f"{action[0]} created ${total} (bank paid ${-paid.get(BANK, 0)})"
+        for player in game.seats:
+            if player not in game.players:
+                if player.balance:
+                    return "money", f"{player.name} left the game with ${player.balance}"
+            elif player.balance - self.balances[player] != paid.get(player, 0):
+                return "money", (
+                    f"{player.name}'s cash changed by ${player.balance - self.balances[player]}"
+                    f" but ${paid.get(player, 0)} was paid"
+                )
+        expected = self.expected_payments(action, actor, changed)
+        if expected is not None:
+            paid = {
+                player: amount for player, amount in paid.items() if amount and player is not BANK
+            }
+            if paid != expected:
+                return "money", (
+                    f"{action[0]} paid {payments_by_name(paid)},"
+                    f" expected {payments_by_name(expected)}"
+                )
+        return None
+
+    def expected_payments(self, action, actor, changed):
+        """
+        Returns the net payment by player that an action with a fixed price
+        must make, or None for rolls, whose payments depend on dice and cards.
+        - Worst-case O(C): Where C is the number of changed estates.
+        - Average-case O(1): At most one changed estate.
+        """
+        game = self.game
+        kind = action[0]
+        if kind == "roll":
+            return None
+        if kind == "trade":
+            _, seat, _, _, give_cash, take_cash = action
+            payments = {actor: take_cash - give_cash, game.seats[seat]: give_cash - take_cash}
+            return {player: amount for player, amount in payments.items() if amount}
+        expected = {}
+        for position, (owner, houses, hotel, mortgaged) in changed:
+            estate = game.estates[position]
+            if kind in ("buy", "bid", "pass") and owner is None and estate.owner is not None:
+                price = estate.price if kind == "buy" else self.auction.high_bid
+                expected[estate.owner] = -price
+            elif kind == "build" and estate.hotel and not hotel:
+                expected[actor] = -2 * estate.house_cost
+            elif kind == "build" and estate.houses > houses:
+                expected[actor] = -estate.house_cost
+            elif kind == "mortgage" and estate.mortgaged and not mortgaged:
+                expected[actor] = estate.price // 2
+            elif kind == "unmortgage" and mortgaged and not estate.mortgaged:
+                expected[actor] = -estate.price
+        return expected
+
+    def check_ownership(self, changed):
+        """
+        Checks that the old and new owners of the changed estates list exactly
+        the estates they own, in board order, and that players who left own nothing.
+        - Worst-case O(P * h): Every player's list.
+        - Average-case O(h): The lists of the players involved.
+        """
+        game = self.game
+        owners = set()
+        for position, (owner, _, _, _) in changed:
+            owners.update((owner, game.estates[position].owner))
+        owners.discard(None)
+        for player in owners:
+            previous = -1
+            for estate in player.estates:
+                if estate.owner is not player:
+                    return "ownership", f"{player.name} lists {estate.name}, which they do not own"
+                if estate.index <= previous:
+                    return "ownership", f"{player.name}'s estates are out of board order at {estate.name}"
+                previous = estate.index
+        for position, _ in changed:
+            estate = game.estates[position]
+            if estate.owner is not None and estate not in estate.owner.estates:
+                return "ownership", f"{estate.owner.name} owns {estate.name} but does not list it"
+        for player in game.seats:
+            if player.estates and player not in game.players:
+                return "ownership", f"{player.name} left the game with estates"
+        count = sum(1 for player in game.players if player.estates)
+        if count != game.players_with_estates:
+            return "ownership", f"{count} players own estates but the game counts {game.players_with_estates}"
+        return None
+
+    def check_monopolies(self, changed):
+        """
+        Checks that the groups of the changed estates only have buildings when
+        one player owns all of their estates.
+        - Worst-case O(C * g): Where C is the number of changed estates and g the size of their groups.
+        - Average-case O(g): One group.
+        """
+        game = self.game
+        for group in {game.estates[position].group for position, _ in changed}:
+            estates = game.group_estates[group]
+            built = [estate for estate in estates if estate.houses or estate.hotel]
+            owner = estates[0].owner
+            if built and (owner is None or any(estate.owner is not owner for estate in estates)):
+                return "monopoly", f"{built[0].name} has buildings but its group is not owned by one player"
+        return None
+
+    def check_rent(self, actor):
+        """
+        Checks that a player who rolled onto another player's unmortgaged estate
+        and stayed in the game paid the rent due, and that the owner received
+        the same amount.
+        - Worst-case O(J): Where J is the number of payments in the journal.
+        - Average-case O(1): A few payments per roll.
+        """
+        game = self.game
+        if actor not in game.players or actor.position == self.positions[actor]:
+            return None
+        estate = game.estates[actor.position]
+        owner = estate.owner
+        if owner is None or owner is actor or estate.mortgaged:
+            return None
+        rent = estate.rent_due()
+        if not rent:
+            return None
+        journal = game.journal
+        for (payer, paid), (payee, received) in zip(journal, journal[1:]):
+            if payer is actor and payee is owner and paid < 0:
+                if -paid == received == rent:
+                    return None
+                return "rent", (
+                    f"{actor.name} paid ${-paid} and {owner.name} received ${received}"
+                    f" for {estate.name}, ${rent} was due"
+                )
+        return "rent", f"{actor.name} paid no rent to {owner.name} for {estate.name}, ${rent} was due"
+
+    def check_mortgaged_rent(self):
+        """
+        Checks that no payment between two players during a roll was rent for a
+        mortgaged estate: a payment to the owner of the mortgaged estate the payer stands on.
+        - Worst-case O(J): Where J is the number of payments in the journal.
+        - Average-case O(1): A few payments per roll.
+        """
+        journal = self.game.journal
+        for (payer, paid), (payee, received) in zip(journal, journal[1:]):
+            if BANK in (payer, payee) or payer is payee or paid >= 0 or paid != -received:
+                continue
+            estate = self.game.estates[payer.position]
+            if estate.owner is payee and estate.mortgaged:
+                return "mortgaged rent", (
+                    f"{payer.name} paid ${received} to {payee.name} on mortgaged {estate.name}"
+                )
+        return None
+
+
+def estate_state(estate):
+    """
+    Returns the part of an estate's state the invariants look at.
+    - Worst-case O(1): A tuple of four fields.
+    - Average-case O(1): Same as worst-case.
+    """
+    return (estate.owner, estate.houses, estate.hotel, estate.mortgaged)
+
+
+def payments_by_name(payments):
+    """
+    Returns payments by player as payments by player name, for messages.
+    - Worst-case O(P): Where P is the number of players.
+    - Average-case O(P): Same as worst-case.
+    """
+    return {player.name: amount for player, amount in payments.items()}
+
+
+def play_case(game, seed, case, num_players, actions=None, max_actions=2000):
+    """
+    Plays fuzz case `case` of seed: the given actions, skipping those that are
+    not legal when their turn comes, or max_actions random ones. Stops at the
+    first violated invariant or exception. Returns the actions applied and the
+    violation as (name, description), or None.
+    - Worst-case O(A * (P + N * g)): Where A is the number of actions.
+    - Average-case O(A * (P + h)): Incremental checks after every action.
+    """
+    game.reset(seed, case, num_players)
+    checker = InvariantChecker(game)
+    chooser = random.Random(seed * 1_000_003 + case)
+    applied = []
+    steps = len(actions) if actions is not None else max_actions
+    for step in range(steps):
+        if game.winner is not None:
+            break
+        action = actions[step] if actions is not None else random_action(game, chooser)
+        actor = game.players[game.current_player_index]
+        game.journal.clear()
+        try:
+            if not apply_action(game, action):
+                continue
+        except Exception as error:  # pylint: disable=broad-except
+            return applied + [action], ("crash", f"{type(error).__name__}: {error}")
+        applied.append(action)
+        violation = checker.check(action, actor)
+        if violation is not None:
+            return applied, violation
+    return applied, None
+
+
+def shrink(game, seed, case, num_players, actions, violation):
+    """
+    Shrinks a failing action list: chunks of actions are removed, from halves
+    down to single actions, as long as the case still violates the same
+    invariant. Returns the shortest actions found and their violation.
+    - Worst-case O(A^2 * R): Where R is the cost of replaying the case.
+    - Average-case O(A log A * R): Most large chunks cannot be removed.
+    """
+    chunk = max(1, len(actions) // 2)
+    while True:
+        start = 0
+        while start < len(actions):
+            candidate = actions[:start] + actions[start + chunk :]
+            applied, found = play_case(game, seed, case, num_players, candidate)
+            if found is not None and found[0] == violation[0]:
+                actions, violation = applied, found
+            else:
+                start += chunk
+        if chunk == 1:
+            return actions, violation
+        chunk //= 2
+
+
+def fuzz_chunk(seed, cases, num_players, max_actions):
+    """
+    Plays a chunk of fuzz cases on this worker's game and shrinks the failing
+    ones. Returns the number of actions played and the failing cases.
+    - Worst-case O(K * A * (P + N * g)): Where K is the number of cases.
+    - Average-case O(K * A * (P + h)): Same as worst-case.
+    """
+    game = worker_game()
+    played, failures = 0, []
+    with contextlib.redirect_stdout(NullWriter()):
+        for case in cases:
+            actions, violation = play_case(game, seed, case, num_players, max_actions=max_actions)
+            played += len(actions)
+            if violation is not None:
+                actions, violation = shrink(game, seed, case, num_players, actions, violation)
+                failures.append(
+                    {
+                        "seed": seed,
+                        "case": case,
+                        "players": num_players,
+                        "violation": list(violation),
+                        "actions": actions,
+                    }
+                )
+    return played, failures
+
+
+def run_fuzz(cases, num_players=4, max_actions=2000, seed=0, workers=None):
+    """
+    Plays cases fuzz cases on a process pool. Returns the number of actions
+    played and the shrunk failing cases.
+    - Worst-case O(K * A * (P + N * g) / W): Where W is the number of workers.
+    - Average-case O(K * A * (P + h) / W): Same as worst-case.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                fuzz_chunk,
+                seed,
+                range(start, min(start + CHUNK_CASES, cases)),
+                num_players,
+                max_actions,
+            )
+            for start in range(0, cases, CHUNK_CASES)
+        ]
+        results = [future.result() for future in futures]
+    return sum(played for played, _ in results), [f for _, failures in results for f in failures]
+
+
+def replay_failure(path):
+    """
+    Plays a saved failing case again and returns the violation it finds now, or None.
+    - Worst-case O(A * (P + N * g)): Replaying its actions.
+    - Average-case O(A * (P + h)): Same as worst-case.
+    """
+    with open(path, encoding="utf-8") as file:
+        failure = json.load(file)
+    with contextlib.redirect_stdout(NullWriter()):
+        _, violation = play_case(
+            worker_game(), failure["seed"], failure["case"], failure["players"], failure["actions"]
+        )
+    return violation
+
+
+def main(argv=None):
+    """
+    Command line entry point for fuzzing the rules or replaying a saved failure.
+    - Worst-case O(K * A * (P + N * g) / W): The fuzzing itself.
+    - Average-case O(K * A * (P + h) / W): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Fuzz the Monopoly rules with random actions")
+    parser.add_argument("--cases", type=int, default=100, help="number of random games")
+    parser.add_argument("--actions", type=int, default=2000, help="actions per game")
+    parser.add_argument("--players", type=int, default=4, help="players per game")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the games")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default="fuzz_failures", help="directory for failing cases")
+    parser.add_argument("--replay", metavar="PATH", help="play a saved failing case again")
+    args = parser.parse_args(argv)
+    if args.replay:
+        violation = replay_failure(args.replay)
+        print(f"{violation[0]}: {violation[1]}" if violation else "No invariant violated")
+        return 1 if violation else 0
+    start = perf_counter()
+    played, failures = run_fuzz(args.cases, args.players, args.actions, args.seed, args.workers)
+    elapsed = perf_counter() - start
+    print(f"Played {played} actions in {args.cases} games: {played / elapsed:.0f} actions/s")
+    if failures:
+        os.makedirs(args.output, exist_ok=True)
+    for failure in failures:
+        filename = os.path.join(args.output, f"case-{failure['case']}.json")
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(failure, file)
+        name, description = failure["violation"]
+        print(f"Case {failure['case']}: {name}: {description} ({len(failure['actions'])} actions, {filename})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
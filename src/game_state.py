@@ -0,0 +1,257 @@
+"""
+Game state module
+
+Saving and restoring a running game. A snapshot is plain data (players,
+estates, card decks, the dice generator) taken between turns, when no roll,
+auction or card is half resolved, so it is always consistent. Snapshots are
+written by an Autosaver on a worker thread: the game loop only builds the
+snapshot and hands it over, and serializing and writing happen off the loop.
+Files are written to a temporary file and renamed over the save, so a crash
+in the middle of a write leaves the previous save intact.
+"""
+
+import json
+import os
+import threading
+from time import monotonic, time
+from estate_management import static_estates
+from player_management import Player
+from rules import Rules
+from utils import Queue
+
+
+SAVE_VERSION = 1
+DEFAULT_SAVE_PATH = os.path.join(os.path.expanduser("~"), ".monopoly", "autosave.json")
+# Seconds between autosaves; a save is only taken at the end of a turn
+AUTOSAVE_INTERVAL = 30
+
+
+def snapshot(game):
+    """
+    Returns the state of a game between turns as JSON-serializable data.
+    - Worst-case O(P + N + C): Where P is the number of players, N the number of squares and C the number of cards.
+    - Average-case O(P + N + C): Same as worst-case.
+    """
+    seat = {player: index for index, player in enumerate(game.players)}
+    return {
+        "version": SAVE_VERSION,
+        "saved_at": time(),
+        "board": {"name": game.board.name, "size": game.board.size},
+        "rules": game.rules.as_dict(),
+        "current_player": game.current_player_index,
+        "jackpot": game.jackpot,
+        "players": [
+            {
+                "name": player.name,
+                "color": player.color,
+                "balance": player.balance,
+                "position": player.position,
+                "in_jail": player.in_jail,
+                "jail_turns": player.jail_turns,
+                "jail_cards": [
+                    [deck_name(game, card.deck), card.index]
+                    for card in player.community_chest_cards
+                ],
+            }
+            for player in game.players
+        ],
+        "estates": [
+            [seat[estate.owner], estate.houses, estate.hotel, estate.mortgaged]
+            if estate.owner is not None
+            else None
+            for estate in game.estates
+        ],
+        "decks": {
+            "chance": [card.index for card in game.chance_deck.deck.display()],
+            "community_chest": [
+                card.index for card in game.community_chest_deck.deck.display()
+            ],
+        },
+        "random": game.random.get_state(),
+    }
+
+
+def deck_name(game, deck):
+    """
+    Returns the name of one of the game's decks in a snapshot.
+    - Worst-case O(1): An identity comparison.
+    - Average-case O(1): Same as worst-case.
+    """
+    return "chance" if deck is game.chance_deck.origin else "community_chest"
+
+
+def restore(game, state):
+    """
+    Replaces the players, estates, decks and dice of a game with a snapshot.
+    Raises ValueError if the snapshot belongs to another board or save version.
+    - Worst-case O(P + N + C): Where P is the number of players, N the number of squares and C the number of cards.
+    - Average-case O(P + N + C): Same as worst-case.
+    """
+    if state.get("version") != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version {state.get('version')}")
+    board = state["board"]
+    if (board["name"], board["size"]) != (game.board.name, game.board.size):
+        raise ValueError(f"The save is for the board '{board['name']}' ({board['size']} squares)")
+
+    game.rules = Rules(**state["rules"])
+    decks = {"chance": game.chance_deck, "community_chest": game.community_chest_deck}
+    cards = {
+        name: {card.index: card for card in deck.deck.display()} for name, deck in decks.items()
+    }
+    for name, deck in decks.items():
+        deck.deck = Queue()
+        for index in state["decks"][name]:
+            deck.add_card(cards[name][index])
+
+    game.players = []
+    for saved in state["players"]:
+        player = Player(saved["name"], saved["color"], saved["balance"])
+        player.position = saved["position"]
+        player.in_jail = saved["in_jail"]
+        player.jail_turns = saved["jail_turns"]
+        for name, index in saved["jail_cards"]:
+            card = cards[name][index]
+            card.deck = decks[name]
+            player.community_chest_cards.append(card)
+        game.players.append(player)
+
+    for estate, info, saved in zip(
+        game.estates, static_estates(game.board, game.rules), state["estates"]
+    ):
+        estate.info = info  # House costs follow the saved rules
+        estate.owner = None
+        estate.houses, estate.hotel, estate.mortgaged = 0, False, False
+        if saved is not None:
+            owner, estate.houses, estate.hotel, estate.mortgaged = saved
+            estate.owner = game.players[owner]
+            estate.owner.estates.append(estate)  # Estates are visited in board order
+    game.players_with_estates = sum(1 for player in game.players if player.estates)
+
+    game.jackpot = state["jackpot"]
+    game.random.set_state(state["random"])
+    game.current_player_index = state["current_player"]
+    game.dice_rolled = False
+    game.declined_estate = None
+    game.winner = None
+    game.turn.start_turn(game.players[game.current_player_index])
+    game.setup_phase = False
+    game.update_buttons()
+
+
+def write_atomic(path, text):
+    """
+    Writes text to path through a temporary file and a rename, so readers
+    see either the old file or the complete new one.
+    - Worst-case O(L): Where L is the length of the text.
+    - Average-case O(L): Same as worst-case.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_save(path):
+    """
+    Returns the snapshot saved at path, or None if there is no readable save.
+    - Worst-case O(L): Where L is the size of the file.
+    - Average-case O(L): Same as worst-case.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+class Autosaver:
+    """
+    Writes game snapshots to a file on a background thread.
+    """
+
+    def __init__(self, path=DEFAULT_SAVE_PATH, interval=AUTOSAVE_INTERVAL):
+        """
+        Initializes the saver and starts its worker thread.
+        - Worst-case O(1): Starting the thread.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.path = path
+        self.interval = interval
+        self.last_save = monotonic()
+        self.pending = None  # Latest snapshot not written yet; older ones are dropped
+        self.discard_pending = False
+        self.closed = False
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.worker.start()
+
+    def maybe_save(self, game):
+        """
+        Takes a snapshot between turns if the interval has passed since the last one.
+        - Worst-case O(P + N + C): Building the snapshot; writing happens on the worker.
+        - Average-case O(1): Between autosaves.
+        """
+        now = monotonic()
+        if now - self.last_save >= self.interval:
+            self.last_save = now
+            self.submit(snapshot(game))
+
+    def submit(self, state):
+        """
+        Hands a snapshot to the worker without waiting for it to be written.
+        - Worst-case O(1): Replacing the pending snapshot.
+        - Average-case O(1): Same as worst-case.
+        """
+        with self.condition:
+            self.pending = state
+            self.discard_pending = False
+            self.condition.notify()
+
+    def discard(self):
+        """
+        Removes the save, e.g. once the game is over, so it is not offered for resuming.
+        - Worst-case O(1): Signalling the worker.
+        - Average-case O(1): Same as worst-case.
+        """
+        with self.condition:
+            self.pending = None
+            self.discard_pending = True
+            self.condition.notify()
+
+    def run(self):
+        """
+        Worker loop writing the latest snapshot whenever one is submitted.
+        - Worst-case O(L): Per save, where L is the size of the snapshot.
+        - Average-case O(L): Same as worst-case.
+        """
+        while True:
+            with self.condition:
+                while self.pending is None and not self.discard_pending and not self.closed:
+                    self.condition.wait()
+                state, discard = self.pending, self.discard_pending
+                self.pending, self.discard_pending = None, False
+                if state is None and not discard:
+                    return  # Closed with nothing left to write
+            try:
+                if discard:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    write_atomic(self.path, json.dumps(state))
+            except OSError as error:
+                print(f"Autosave to {self.path} failed: {error}")
+
+    def close(self, timeout=5):
+        """
+        Stops the worker after it has written the last submitted snapshot.
+        - Worst-case O(L): Waiting for the last write.
+        - Average-case O(1): Nothing left to write.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.worker.join(timeout)
@@ -0,0 +1,70 @@
+"""
+Performance HUD module
+
+A toggleable overlay drawn on top of the board that shows the frame rate,
+frame-time percentiles, blits and font renders per frame, and the time spent
+handling events versus drawing. It reads the game's own FrameStats counters.
+"""
+
+import pygame
+
+
+class PerformanceHud:
+    """
+    Overlay showing live frame statistics in the corner of the board.
+    """
+
+    def __init__(self, stats, visible=False):
+        """
+        Initializes the HUD for the given frame counters.
+        - Worst-case O(1): Creating a font and an overlay surface.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.stats = stats
+        self.visible = visible
+        # The HUD uses its own font so its text does not show up in the counters
+        self.font = pygame.font.Font(None, 22)
+        self.rect = pygame.Rect(10, 10, 260, 120)
+        self.panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 170))
+
+    def toggle(self):
+        """
+        Shows or hides the overlay.
+        - Worst-case O(1): Flipping a flag.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.visible = not self.visible
+
+    def lines(self):
+        """
+        Returns the text lines describing the last finished frame.
+        - Worst-case O(W log W): Where W is the frame window, for the percentiles.
+        - Average-case O(W log W): Same as worst-case.
+        """
+        stats = self.stats
+        return [
+            f"FPS: {stats.fps():.1f}",
+            "Frame ms p50/p95/p99: "
+            f"{stats.frame_percentile(0.50):.1f}/"
+            f"{stats.frame_percentile(0.95):.1f}/"
+            f"{stats.frame_percentile(0.99):.1f}",
+            f"Blits: {stats.last_blits}  Renders: {stats.last_renders}",
+            f"Events: {stats.last_event_ns / 1e6:.2f} ms",
+            f"Drawing: {stats.last_draw_ns / 1e6:.2f} ms",
+        ]
+
+    def draw(self, screen):
+        """
+        Draws the overlay onto the screen if it is visible.
+        - Worst-case O(W log W): Building the lines.
+        - Average-case O(W log W): Same as worst-case.
+        """
+        if not self.visible:
+            return
+        screen.blit(self.panel, self.rect)
+        text_y = self.rect.y + 8
+        for line in self.lines():
+            text = self.font.render(line, True, (255, 255, 255))
+            screen.blit(text, (self.rect.x + 8, text_y))
+            text_y += self.font.get_linesize() + 2
@@ -0,0 +1,857 @@
+"""
+Large-table module
+
+Headless game engine for load-testing the rules with hundreds of players on
+boards of thousands of squares. Per-player and per-square state lives in
+NumPy arrays indexed by player or board position. Turn order is a circular
+linked list over the player arrays, so advancing a turn is O(1). Everything a
+turn needs (monopoly checks, station counts, nearest squares) is kept up to
+date incrementally, so no turn scans all squares. The one step that touches
+every player is the auction of a square its lander cannot afford: all active
+players bid, so it values the square for each of them in one O(P)
+vectorized step.
+
+Bots play a fixed policy: buy what they land on, offer the best trade the
+trade evaluator finds at the start of their turn, and then spend the cash
+above a reserve on unmortgaging and evenly building up their colour groups.
+"""
+
+from time import perf_counter
+import numpy as np
+from auction import resolve_bot_auction
+from expected_income import expected_rent_per_opponent_turn
+from rng import GameRandom
+from rules import DEFAULT_RULES
+from trade_engine import TradeEvaluator, TradeProposal, mask_positions
+from turn_fsm import (
+    BACK_STEPS,
+    DOUBLES_TO_JAIL,
+    compile_cards,
+    compile_square_handlers,
+)
+from board_data import (
+    load_board,
+    generate_board,
+    compile_board,
+    KIND_PROPERTY,
+    KIND_STATION,
+    KIND_UTILITY,
+    HOTEL_LEVEL,
+)
+
+
+STATION_RENT = 25
+# Cash a bot keeps back when building or unmortgaging
+BUILD_RESERVE = 200
+# Unmortgaging costs the mortgage value plus this much interest, in percent
+MORTGAGE_INTEREST = 10
+
+
+class EngineTradeEvaluator(TradeEvaluator):
+    """
+    Trade evaluator over the arrays of a LargeTableEngine. Players are player
+    indices and proposals list square positions instead of estates.
+    """
+
+    def owner(self, position):
+        """
+        Returns the owner of a square, or None.
+        - Worst-case O(1): An array lookup.
+        - Average-case O(1): Same as worst-case.
+        """
+        owner = int(self.game.owner[position])
+        return owner if owner >= 0 else None
+
+    def building_level(self, position):
+        """
+        Returns the building level of a square.
+        - Worst-case O(1): An array lookup.
+        - Average-case O(1): Same as worst-case.
+        """
+        return int(self.game.level[position])
+
+    def is_mortgaged(self, position):
+        """
+        Checks whether a square is mortgaged.
+        - Worst-case O(1): An array lookup.
+        - Average-case O(1): Same as worst-case.
+        """
+        return bool(self.game.mortgaged[position])
+
+    def holdings_mask(self, player):
+        """
+        Returns the bitmask of the squares the player owns.
+        - Worst-case O(1): Kept up to date by the engine.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.game.holdings_masks[player]
+
+    def partial_groups(self, player, mask):
+        """
+        Returns the groups the player owns part, but not all, of.
+        - Worst-case O(k log k): Where k is the number of such groups, sorted for a stable order.
+        - Average-case O(k log k): Same as worst-case.
+        """
+        return sorted(self.game.partial_groups[player])
+
+    def active_players(self):
+        """
+        Returns the indices of the players still in the game.
+        - Worst-case O(P): Where P is the number of seats.
+        - Average-case O(P): Same as worst-case.
+        """
+        return np.flatnonzero(self.game.active).tolist()
+
+    def opponents(self):
+        """
+        Returns the number of opponents who can land on a player's squares.
+        - Worst-case O(1): A counter.
+        - Average-case O(1): Same as worst-case.
+        """
+        return max(1, self.game.active_players - 1)
+
+    def proposal(self, proposer, responder, give, take):
+        """
+        Returns a proposal exchanging the squares of the give and take masks.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        return TradeProposal(
+            proposer,
+            responder,
+            give_estates=list(mask_positions(give)),
+            take_estates=list(mask_positions(take)),
+        )
+
+    def proposal_masks(self, proposal):
+        """
+        Returns the (give, take) masks of the squares a proposal exchanges.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        give = sum(1 << position for position in proposal.give_estates)
+        take = sum(1 << position for position in proposal.take_estates)
+        return give, take
+
+    def valid(self, proposal):
+        """
+        Checks that a proposal can be carried out (see LargeTableEngine.trade_is_valid).
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        return self.game.trade_is_valid(proposal)
+
+
+class LargeTableEngine:
+    """
+    Array-based headless game state and rules.
+    """
+
+    def __init__(
+        self, board, num_players, seed=None, rules=DEFAULT_RULES, recorder=None, rng=None
+    ):
+        """
+        Initializes the arrays for a game of num_players on the given board.
+        Dice and shuffles come from rng, or from a GameRandom seeded with seed.
+        Every turn is reported to the recorder (see results_store.TurnRecorder) if one is given.
+        - Worst-case O(P * G + N): Where P is the number of players, G the number of groups and N the number of squares.
+        - Average-case O(P * G + N): Same as worst-case.
+        """
+        self.board = board
+        self.size = board.size
+        self.num_players = num_players
+        self.rng = rng if rng is not None else GameRandom(seed)
+        self.rules = rules
+        self.go_salary = rules.go_salary
+        self.jail_turn_limit = rules.jail_turns
+        self.jackpot = 0  # Free Parking pot, only used when the rules enable it
+        self.collects_jackpot = rules.free_parking_jackpot
+
+        # Static board tables as lists for fast scalar access in the turn loop
+        self.kind = board.kind.tolist()
+        self.price = board.price.tolist()
+        self.house_cost = [rules.house_cost(price) for price in self.price]
+        self.rent_table = board.rent_table.tolist()
+        self.group_id = board.group_id.tolist()
+        self.group_size = [len(members) for members in board.group_members]
+        self.nearest_station = board.nearest_station
+        self.nearest_utility = board.nearest_utility
+        # Squares losing the least expected income per mortgage dollar sort first
+        self.mortgage_value = (board.price // 2).tolist()
+        self.mortgage_rank = (
+            expected_rent_per_opponent_turn(board, rules)[:, 0]
+            / np.maximum(1, board.price // 2)
+        ).tolist()
+        self.evaluator = EngineTradeEvaluator(self)
+
+        # Per-player state
+        self.active = np.ones(num_players, dtype=np.bool_)
+        self.position = np.zeros(num_players, dtype=np.int32)
+        self.balance = np.full(num_players, rules.starting_balance, dtype=np.int64)
+        self.in_jail = np.zeros(num_players, dtype=np.bool_)
+        self.jail_turns = np.zeros(num_players, dtype=np.int8)
+        self.jail_time = np.zeros(num_players, dtype=np.int32)  # Turns spent in jail
+        self.jail_cards = np.zeros(num_players, dtype=np.int16)
+        self.estate_count = np.zeros(num_players, dtype=np.int32)
+        self.owned_in_group = np.zeros(
+            (num_players, len(board.group_names)), dtype=np.int16
+        )
+        self.holdings = [set() for _ in range(num_players)]
+        # For the trade search: owned squares as a bitmask, and groups owned in part
+        self.holdings_masks = [0] * num_players
+        self.partial_groups = [set() for _ in range(num_players)]
+        self.monopolies = [set() for _ in range(num_players)]  # Complete colour groups
+        # Players whose trade options may have changed since their last fruitless search
+        self.trade_dirty = np.ones(num_players, dtype=np.bool_)
+
+        # Per-square state
+        self.owner = np.full(self.size, -1, dtype=np.int32)
+        self.level = np.zeros(self.size, dtype=np.int8)
+        self.mortgaged = np.zeros(self.size, dtype=np.bool_)
+        # Building levels per group; only a monopoly owner can build, so one owner per group
+        self.group_levels = [0] * len(board.group_names)
+
+        # Turn order as a circular doubly linked list over player indices
+        order = np.arange(num_players, dtype=np.int32)
+        self.next_player = np.roll(order, -1)
+        self.prev_player = np.roll(order, 1)
+        self.current = 0
+        self.active_players = num_players
+        self.players_with_estates = 0
+        self.turn = 0
+        self.winner = -1
+        self.first_monopoly_turn = -1
+        self.recorder = recorder
+        self.dice = 0  # Dice total of the current throw, recorded with its landings
+        self.landing_rent = 0  # Rent paid on the landing being resolved
+
+        # Card decks as effect records (see turn_fsm.compile_cards)
+        self.chance = compile_cards(board.chance)
+        self.community_chest = compile_cards(board.community_chest)
+        self.chance_order = self.rng.permutation(len(self.chance))
+        self.community_chest_order = self.rng.permutation(len(self.community_chest))
+
+        # Dispatch tables indexed by square handler id and card opcode (see turn_fsm)
+        self.square_handler = compile_square_handlers(board)
+        self.landing = [
+            self.land_on_nothing,
+            self.land_on_estate,
+            self.land_on_tax,
+            self.land_on_chance,
+            self.land_on_community_chest,
+            self.land_on_go_to_jail,
+            self.land_on_free_parking,
+        ]
+        self.card_effects = [
+            lambda player, target: None,
+            self.card_move_to,
+            lambda player, target: self.card_move_to(
+                player, self.nearest_utility[self.position[player]]
+            ),
+            lambda player, target: self.card_move_to(
+                player, self.nearest_station[self.position[player]]
+            ),
+            self.card_back,
+            lambda player, target: self.send_to_jail(player),
+        ]
+        self.chance_index = 0
+        self.community_chest_index = 0
+
+    def has_monopoly(self, player, position):
+        """
+        Checks whether the player owns the whole group of the square.
+        - Worst-case O(1): One table comparison.
+        - Average-case O(1): Same as worst-case.
+        """
+        group = self.group_id[position]
+        return self.owned_in_group[player, group] == self.group_size[group]
+
+    def advance_turn(self):
+        """
+        Passes the turn to the next active player.
+        - Worst-case O(1): Following the linked list.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.current = int(self.next_player[self.current])
+        self.turn += 1
+
+    def remove_player(self, player):
+        """
+        Unlinks a player from the turn rotation.
+        - Worst-case O(1): Relinking two neighbours.
+        - Average-case O(1): Same as worst-case.
+        """
+        following = self.next_player[player]
+        preceding = self.prev_player[player]
+        self.next_player[preceding] = following
+        self.prev_player[following] = preceding
+        self.active[player] = False
+        self.active_players -= 1
+        if self.current == player:
+            self.current = int(preceding)
+        if self.active_players == 1:
+            self.winner = int(following)
+
+    def take_turn(self):
+        """
+        Plays one turn for the current player and advances to the next player.
+        The player first offers the best trade the evaluator finds for them,
+        then develops their colour groups with the cash above BUILD_RESERVE.
+        Doubles roll again; the third double in a row goes to jail instead of moving.
+        The recorder gets a row per landing (see resolve) and one for a turn spent in jail.
+        - Worst-case O(n * (n + k * g) + m * g * g * H): Searching the player's trades (see trade) and developing their groups (see develop); every rule is O(1).
+        - Average-case O(n): Where n is the number of squares the player owns.
+        """
+        player = self.current
+        if self.can_trade(player):
+            self.trade(player)
+        if self.monopolies[player]:
+            self.develop(player)
+        if self.in_jail[player]:
+            self.jail_turns[player] += 1
+            self.jail_time[player] += 1
+            if self.jail_turns[player] >= self.jail_turn_limit:
+                self.in_jail[player] = False
+                self.jail_turns[player] = 0
+            if self.recorder is not None:
+                self.recorder.record(self.turn, player, self.position[player], 0, 0)
+            self.advance_turn()
+            return
+
+        rolls = 0
+        while True:
+            die1, die2 = self.rng.roll()
+            rolls += 1
+            if die1 == die2 and rolls == DOUBLES_TO_JAIL:
+                self.send_to_jail(player)
+                break
+            self.dice = die1 + die2
+            self.move(player, self.dice)
+            # Doubles roll again unless the player was jailed or went bankrupt
+            if die1 != die2 or self.in_jail[player] or not self.active[player]:
+                break
+        self.advance_turn()
+
+    def move(self, player, steps):
+        """
+        Moves a player forward, paying the Go salary when passing Go, and resolves the landing square.
+        - Worst-case O(1): Position arithmetic.
+        - Average-case O(1): Same as worst-case.
+        """
+        position = int(self.position[player]) + steps
+        if position >= self.size:
+            position -= self.size
+            self.balance[player] += self.go_salary
+        self.position[player] = position
+        self.resolve(player, position, steps)
+
+    def move_to(self, player, target):
+        """
+        Moves a player forward to a target position.
+        - Worst-case O(1): Position arithmetic.
+        - Average-case O(1): Same as worst-case.
+        """
+        steps = (target - int(self.position[player])) % self.size
+        self.move(player, steps)
+
+    def send_to_jail(self, player):
+        """
+        Sends a player to jail, using a Get Out of Jail Free card if they hold one.
+        - Worst-case O(1): Updating the player's row.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.position[player] = self.board.jail_position
+        if self.jail_cards[player]:
+            self.jail_cards[player] -= 1
+        else:
+            self.in_jail[player] = True
+            self.jail_turns[player] = 0
+
+    def resolve(self, player, position, roll):
+        """
+        Resolves the square a player landed on and records the landing with the
+        dice of the throw and the rent paid on that square. A card that moves
+        the player resolves, and records, its destination first.
+        - Worst-case O(1): One table index and one dispatch.
+        - Average-case O(1): Same as worst-case.
+        """
+        handler = self.landing[self.square_handler[position]]
+        if self.recorder is None:
+            handler(player, position, roll)
+            return
+        self.landing_rent = 0
+        handler(player, position, roll)
+        self.recorder.record(self.turn, player, position, self.dice, self.landing_rent)
+        self.landing_rent = 0
+
+    def land_on_nothing(self, player, position, roll):
+        """
+        Handles squares without an effect (Go, Jail).
+        - Worst-case O(1): Nothing to do.
+        - Average-case O(1): Same as worst-case.
+        """
+
+    def land_on_estate(self, player, position, roll):
+        """
+        Buys or auctions an unowned square or pays rent on another player's.
+        - Worst-case O(P): Auctioning the square.
+        - Average-case O(1): Table lookups.
+        """
+        owner = int(self.owner[position])
+        if owner < 0:
+            self.buy(player, position)
+        elif owner != player and not self.mortgaged[position]:
+            rent = self.rent(owner, position, roll)
+            if self.charge(player, rent, owner):
+                self.landing_rent = rent
+
+    def land_on_tax(self, player, position, roll):
+        """
+        Charges the tax of the square.
+        - Worst-case O(h log h): Liquidating the player's squares.
+        - Average-case O(1): Paying from cash.
+        """
+        self.charge(player, self.price[position])
+
+    def land_on_chance(self, player, position, roll):
+        """
+        Draws and applies the next Chance card.
+        - Worst-case O(1): See apply_card.
+        - Average-case O(1): Same as worst-case.
+        """
+        index = self.chance_order[self.chance_index]
+        self.chance_index = (self.chance_index + 1) % len(self.chance_order)
+        self.apply_card(player, self.chance[index])
+
+    def land_on_community_chest(self, player, position, roll):
+        """
+        Draws and applies the next Community Chest card.
+        - Worst-case O(1): See apply_card.
+        - Average-case O(1): Same as worst-case.
+        """
+        index = self.community_chest_order[self.community_chest_index]
+        self.community_chest_index = (self.community_chest_index + 1) % len(
+            self.community_chest_order
+        )
+        self.apply_card(player, self.community_chest[index])
+
+    def land_on_go_to_jail(self, player, position, roll):
+        """
+        Sends the player to jail.
+        - Worst-case O(1): See send_to_jail.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.send_to_jail(player)
+
+    def land_on_free_parking(self, player, position, roll):
+        """
+        Pays out the Free Parking jackpot (always empty unless the rules enable it).
+        - Worst-case O(1): Updating the balance.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.balance[player] += self.jackpot
+        self.jackpot = 0
+
+    def rent(self, owner, position, roll):
+        """
+        Returns the rent due on a square for the given dice roll.
+        - Worst-case O(1): Table lookups.
+        - Average-case O(1): Same as worst-case.
+        """
+        kind = self.kind[position]
+        if kind == KIND_STATION:
+            return STATION_RENT * int(self.owned_in_group[owner, self.group_id[position]])
+        if kind == KIND_UTILITY:
+            owned = self.owned_in_group[owner, self.group_id[position]]
+            return (4 if owned == 1 else 10) * roll
+        return self.rent_table[position][self.level[position]]
+
+    def buy(self, player, position):
+        """
+        Buys an unowned square if the player can afford it, otherwise auctions it.
+        - Worst-case O(P): Where P is the number of players, for the auction.
+        - Average-case O(1): Most squares are bought outright.
+        """
+        price = self.price[position]
+        if self.balance[player] < price:
+            self.auction(position)
+            return False
+        self.award(player, position, price)
+        return True
+
+    def auction(self, position):
+        """
+        Auctions a declined square to all active players in one vectorized step.
+        Bots value a square at its price plus a bonus for the share of its group
+        they already own.
+        - Worst-case O(P): Where P is the number of players.
+        - Average-case O(P): Same as worst-case.
+        """
+        group = self.group_id[position]
+        share = self.owned_in_group[:, group] / self.group_size[group]
+        valuations = self.price[position] * (1.0 + share) * self.active
+        winner, price = resolve_bot_auction(valuations, self.balance)
+        if winner >= 0:
+            self.award(winner, position, price)
+
+    def award(self, player, position, price):
+        """
+        Transfers an unowned square to a player for the given price.
+        - Worst-case O(1): Updating the ownership tables.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.balance[player] -= price
+        self.give_square(position, player)
+
+    def give_square(self, position, player):
+        """
+        Records a player as the owner of an unowned square.
+        - Worst-case O(1): Updating the ownership tables.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.owner[position] = player
+        group = self.group_id[position]
+        self.owned_in_group[player, group] += 1
+        self.holdings[player].add(position)
+        self.holdings_masks[player] |= 1 << position
+        self.mark_traders(group)
+        if self.owned_in_group[player, group] < self.group_size[group]:
+            self.partial_groups[player].add(group)
+        else:
+            self.partial_groups[player].discard(group)
+            if self.kind[position] == KIND_PROPERTY:
+                self.monopolies[player].add(group)
+                if self.first_monopoly_turn < 0:
+                    self.first_monopoly_turn = self.turn
+        if self.estate_count[player] == 0:
+            self.players_with_estates += 1
+        self.estate_count[player] += 1
+
+    def take_square(self, position):
+        """
+        Removes a square from its owner, leaving it unowned.
+        - Worst-case O(1): Updating the ownership tables.
+        - Average-case O(1): Same as worst-case.
+        """
+        player = int(self.owner[position])
+        self.owner[position] = -1
+        group = self.group_id[position]
+        self.owned_in_group[player, group] -= 1
+        self.holdings[player].discard(position)
+        self.holdings_masks[player] &= ~(1 << position)
+        self.mark_traders(group)
+        self.trade_dirty[player] = True
+        self.monopolies[player].discard(group)
+        if self.owned_in_group[player, group]:
+            self.partial_groups[player].add(group)
+        else:
+            self.partial_groups[player].discard(group)
+        self.estate_count[player] -= 1
+        if self.estate_count[player] == 0:
+            self.players_with_estates -= 1
+
+    def develop(self, player):
+        """
+        Spends the player's cash above BUILD_RESERVE on their colour groups:
+        each group is unmortgaged first and then built up evenly, one level on
+        its lowest square at a time, up to hotels. Groups are developed in
+        board order. Returns the number of levels built.
+        - Worst-case O(m * g * g * H): Where m is the number of the player's monopolies, g their size and H the hotel level.
+        - Average-case O(m * g): The player can afford a few levels at most.
+        """
+        built = 0
+        for group in sorted(self.monopolies[player]):
+            members = self.board.group_members[group]
+            if self.group_levels[group] == HOTEL_LEVEL * len(members):
+                continue
+            if not self.unmortgage_group(player, members):
+                break
+            while True:
+                position = min(members, key=self.level.__getitem__)
+                if self.level[position] >= HOTEL_LEVEL:
+                    break
+                cost = self.house_cost[position]
+                if self.balance[player] - cost < BUILD_RESERVE:
+                    return built
+                self.balance[player] -= cost
+                self.level[position] += 1
+                self.group_levels[group] += 1
+                built += 1
+        return built
+
+    def unmortgage_group(self, player, members):
+        """
+        Lifts the mortgages on a group's squares while the player keeps
+        BUILD_RESERVE. Returns whether none is left mortgaged.
+        - Worst-case O(g): Where g is the size of the group.
+        - Average-case O(g): Same as worst-case.
+        """
+        for position in members:
+            if not self.mortgaged[position]:
+                continue
+            cost = self.mortgage_value[position] * (100 + MORTGAGE_INTEREST) // 100
+            if self.balance[player] - cost < BUILD_RESERVE:
+                return False
+            self.balance[player] -= cost
+            self.mortgaged[position] = False
+        return True
+
+    def charge(self, player, amount, creditor=-1):
+        """
+        Makes a player pay an amount to a creditor (the bank if -1), liquidating
+        their assets if needed. Returns False if the player went bankrupt.
+        - Worst-case O(h log h): Where h is the number of squares the player owns.
+        - Average-case O(1): The player can usually pay from cash.
+        """
+        if self.balance[player] < amount:
+            self.raise_funds(player, amount - int(self.balance[player]))
+            if self.balance[player] < amount:
+                self.bankrupt(player, creditor)
+                return False
+        self.balance[player] -= amount
+        if creditor >= 0:
+            self.balance[creditor] += amount
+        elif self.collects_jackpot:
+            self.jackpot += amount
+        return True
+
+    def raise_funds(self, player, amount):
+        """
+        Liquidates a player's squares until amount is raised or nothing is left:
+        mortgages squares of unbuilt groups, sells buildings evenly, then
+        mortgages the rest. Returns the cash raised.
+        - Worst-case O(h log h): Sorting the mortgage candidates once; each sale is O(1).
+        - Average-case O(h log h): Same as worst-case.
+        """
+        raised = self.mortgage_unbuilt(player, amount)
+        group_levels = self.group_levels
+        built_groups = {
+            self.group_id[p] for p in self.holdings[player] if group_levels[self.group_id[p]]
+        }
+        for group in built_groups:
+            members = self.board.group_members[group]
+            while raised < amount and group_levels[group]:
+                position = max(members, key=self.level.__getitem__)
+                self.level[position] -= 1
+                group_levels[group] -= 1
+                if not group_levels[group]:
+                    self.mark_traders(group)
+                raised += self.house_cost[position] // 2
+        raised += self.mortgage_unbuilt(player, amount - raised)
+        self.balance[player] += raised
+        return raised
+
+    def mortgage_unbuilt(self, player, amount):
+        """
+        Mortgages the player's squares in groups without buildings, least income
+        per mortgage dollar first, until amount is raised. Returns the cash raised.
+        - Worst-case O(h log h): Where h is the number of squares the player owns.
+        - Average-case O(h log h): Same as worst-case.
+        """
+        raised = 0
+        candidates = [
+            p
+            for p in self.holdings[player]
+            if not self.mortgaged[p] and not self.group_levels[self.group_id[p]]
+        ]
+        candidates.sort(key=self.mortgage_rank.__getitem__)
+        for position in candidates:
+            if raised >= amount:
+                break
+            self.mortgaged[position] = True
+            self.mark_traders(self.group_id[position])
+            raised += self.mortgage_value[position]
+        return raised
+
+    def bankrupt(self, player, creditor=-1):
+        """
+        Hands a bankrupt player's squares and cash to the creditor, or returns the
+        squares to the bank, and removes the player from the rotation.
+        - Worst-case O(h): Where h is the number of squares the player owns.
+        - Average-case O(h): Same as worst-case.
+        """
+        for position in list(self.holdings[player]):
+            self.take_square(position)
+            if creditor >= 0:
+                self.give_square(position, creditor)
+            else:
+                self.mortgaged[position] = False
+        if creditor >= 0:
+            self.balance[creditor] += max(0, int(self.balance[player]))
+            self.jail_cards[creditor] += self.jail_cards[player]
+        self.balance[player] = 0
+        self.jail_cards[player] = 0
+        self.remove_player(player)
+
+    def apply_card(self, player, effect):
+        """
+        Applies a card effect record to a player.
+        - Worst-case O(1): Targets and nearest squares are precomputed.
+        - Average-case O(1): Same as worst-case.
+        """
+        opcode, target, value, is_get_out_of_jail = effect
+        if is_get_out_of_jail:
+            self.jail_cards[player] += 1
+        self.card_effects[opcode](player, target)
+        if not self.active[player]:
+            return  # Went bankrupt on the square the card moved them to
+        if value > 0:
+            self.balance[player] += value
+        elif value < 0:
+            self.charge(player, -value)
+
+    def card_move_to(self, player, target):
+        """
+        Moves a player forward to a target square, or to the nearest square of
+        a kind for the nearest-square effects (target is then -1 if there is none).
+        - Worst-case O(1): See move_to.
+        - Average-case O(1): Same as worst-case.
+        """
+        if target >= 0:
+            self.move_to(player, target)
+
+    def card_back(self, player, target):
+        """
+        Moves a player back a few squares without passing Go.
+        - Worst-case O(1): Position arithmetic and one landing resolution.
+        - Average-case O(1): Same as worst-case.
+        """
+        position = (int(self.position[player]) - BACK_STEPS) % self.size
+        self.position[player] = position
+        self.resolve(player, position, 0)
+
+    def trade(self, player):
+        """
+        Offers the best group-completing trade the evaluator finds for the
+        player; the other side accepts, as both sides gain from it by the
+        evaluator's scores. Returns whether a trade was made. A search that
+        finds nothing is only repeated once a group the player owns part of
+        has changed hands, been mortgaged or had its buildings sold.
+        - Worst-case O(k * g + m * m * s): See TradeEvaluator.find_trades for one proposer.
+        - Average-case O(1): Nothing changed since the player's last search.
+        """
+        if not self.trade_dirty[player]:
+            return False
+        trades = self.evaluator.find_trades([player])
+        if trades and self.execute_trade(trades[0][0]):
+            return True
+        self.trade_dirty[player] = False
+        return False
+
+    def mark_traders(self, group):
+        """
+        Marks the owners of a group's squares for a new trade search after the
+        group changed hands or state.
+        - Worst-case O(g): Where g is the size of the group.
+        - Average-case O(g): Same as worst-case.
+        """
+        for position in self.board.group_members[group]:
+            owner = self.owner[position]
+            if owner >= 0:
+                self.trade_dirty[owner] = True
+
+    def trade_is_valid(self, proposal):
+        """
+        Checks that both sides of a proposal of square positions own what they
+        offer, in groups without buildings, and can pay for it.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        proposer, responder = proposal.proposer, proposal.responder
+        if proposer == responder or not self.active[proposer] or not self.active[responder]:
+            return False
+        for positions, owner in (
+            (proposal.give_estates, proposer),
+            (proposal.take_estates, responder),
+        ):
+            for position in positions:
+                if self.owner[position] != owner or self.group_levels[self.group_id[position]]:
+                    return False
+        return (
+            0 <= proposal.give_cash <= self.balance[proposer]
+            and 0 <= proposal.take_cash <= self.balance[responder]
+            and 0 <= proposal.give_cards <= self.jail_cards[proposer]
+            and 0 <= proposal.take_cards <= self.jail_cards[responder]
+        )
+
+    def execute_trade(self, proposal):
+        """
+        Carries out a valid proposal of square positions; mortgaged squares stay
+        mortgaged. Returns False without changing anything if it is not valid.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        if not self.trade_is_valid(proposal):
+            return False
+        proposer, responder = proposal.proposer, proposal.responder
+        for positions, receiver in (
+            (proposal.give_estates, responder),
+            (proposal.take_estates, proposer),
+        ):
+            for position in positions:
+                self.take_square(position)
+                self.give_square(position, receiver)
+        cash = proposal.take_cash - proposal.give_cash
+        self.balance[proposer] += cash
+        self.balance[responder] -= cash
+        cards = proposal.take_cards - proposal.give_cards
+        self.jail_cards[proposer] += cards
+        self.jail_cards[responder] -= cards
+        return True
+
+    def can_trade(self, player):
+        """
+        Checks whether any other player owns an estate, without scanning players.
+        - Worst-case O(1): A counter comparison.
+        - Average-case O(1): Same as worst-case.
+        """
+        own = 1 if self.estate_count[player] else 0
+        return self.players_with_estates - own > 0
+
+    def run(self, turns):
+        """
+        Plays up to the given number of turns, stopping early when one player is left.
+        Returns the winner, or -1 if the game is still going.
+        - Worst-case O(T): Where T is the number of turns.
+        - Average-case O(T): Same as worst-case.
+        """
+        for _ in range(turns):
+            if self.active_players <= 1:
+                break
+            self.take_turn()
+        return self.winner
+
+
+def run_headless(
+    num_players,
+    board_squares=None,
+    board_path=None,
+    turns=100000,
+    seed=None,
+    rules=None,
+):
+    """
+    Runs a headless game and returns a summary with the turn throughput.
+    - Worst-case O(T + P * G + N): Setup plus T turns.
+    - Average-case O(T + P * G + N): Same as worst-case.
+    """
+    if board_squares:
+        board = compile_board(generate_board(board_squares))
+    else:
+        board = load_board(board_path) if board_path else load_board()
+    engine = LargeTableEngine(board, num_players, seed=seed, rules=rules or DEFAULT_RULES)
+    start = perf_counter()
+    engine.run(turns)
+    elapsed = perf_counter() - start
+    turns = engine.turn
+    return {
+        "players": num_players,
+        "squares": board.size,
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed if elapsed else 0.0,
+        "owned_squares": int((engine.owner >= 0).sum()),
+        "players_with_estates": engine.players_with_estates,
+        "active_players": engine.active_players,
+        "winner": engine.winner,
+    }
@@ -2,8 +2,11 @@
 Main file for the Monopoly game.
 """
 
+import argparse
+import json
+import sys
 import pygame
-import random
+from time import perf_counter_ns
 from player_management import Player
 from estate_management import initialize_estates, initialize_estate_dict
 from card_management import (
@@ -11,29 +14,192 @@ from card_management import (
     create_community_chest_deck,
 )
 from utils import wrap_text, quick_sorts
+from profiling import Profiler, FrameStats, CountingFont, timed
+from hud import PerformanceHud
+from animation import TokenAnimator
+from widgets import ActionButton, Backdrop, Button, Label, Panel, WidgetTree
+from spectator import DEFAULT_PORT as SPECTATOR_PORT, SpectatorHub, public_view
+from control_api import DEFAULT_PORT as API_PORT, ControlServer
+from replay import Replay, ReplayRecorder, ReplayViewer
+from game_state import (
+    AUTOSAVE_INTERVAL,
+    DEFAULT_SAVE_PATH,
+    Autosaver,
+    load_save,
+    restore,
+)
+from assets import AssetManager, BOARD_IMAGE
+from board_data import load_board
+from large_table import run_headless
+from rules import DEFAULT_RULES, load_rules
+from rng import GameRandom
+from turn_fsm import (
+    BACK_STEPS,
+    PHASE_ACTIONS,
+    PHASE_MOVE,
+    PHASE_RESOLVE,
+    PHASE_ROLL,
+    TurnMachine,
+    compile_square_handlers,
+)
+from expected_income import expected_rent_per_opponent_turn, income_level
+from trade_engine import TradeProposal, execute_trade, is_valid, jail_cards
+from auction import Auction, ASCENDING, SEALED, AUCTION_MODES, BID_INCREMENTS
+from bankruptcy import settle_debt
+
+
+# Popup layers of the widget tree, bottom to top
+POPUP_LAYERS = ("mortgage", "trade", "card", "auction")
+# Largest cash amount that can be typed into a trade proposal
+MAX_TRADE_CASH = 10**7
+
+
+def token_color(base_colors, index):
+    """Returns the token color of the player with the given index.
+
+    The base colors are used first; later players get distinct colors spread
+    around the hue circle by the golden ratio.
+
+    Runtime Complexity:
+        - Worst-case O(1): Constant arithmetic.
+        - Average-case O(1): Same as worst-case.
+    """
+    if index < len(base_colors):
+        return base_colors[index]
+    color = pygame.Color(0)
+    color.hsva = ((index * 137.508) % 360, 80, 90, 100)
+    return (color.r, color.g, color.b)
 
 
 class Game:
-    def __init__(self):
+    def __init__(
+        self,
+        profiler=None,
+        show_hud=False,
+        board=None,
+        auction_mode=ASCENDING,
+        rules=None,
+        seed=None,
+        autosave_path=None,
+        autosave_interval=AUTOSAVE_INTERVAL,
+        spectators=None,
+        api=None,
+        recorder=None,
+    ):
         """Initializes the game by setting up players, estates, decks, and the game board.
 
+        Args:
+            profiler (Profiler): Optional profiler recording per-phase latencies.
+            show_hud (bool): Whether the performance HUD starts visible.
+            board (BoardTables): Compiled board to play on, the classic board by default.
+            auction_mode (str): How declined properties are auctioned, "ascending" or "sealed".
+            rules (Rules): House rules to play by, the standard rules by default.
+            seed (int): Seed of the game's dice and shuffles; None for a fresh random game.
+            autosave_path (str): File the game is autosaved to between turns; None disables autosave.
+                A save left there by an earlier game is offered for resuming.
+            autosave_interval (float): Minimum number of seconds between autosaves.
+            spectators (SpectatorHub): Optional hub streaming the game to read-only observers.
+            api (ControlServer): Optional HTTP server through which the game can be polled and driven.
+            recorder (ReplayRecorder): Optional recording the state after every turn is written to.
+
         Runtime Complexity:
             - Worst-case O(N): Where N is the total number of estates and players. Initialization involves creating and initializing lists.
             - Average-case O(N): Similar to worst-case as initialization processes a fixed number of items.
         """
+        self.profiler = profiler
         pygame.init()  # Initialize Pygame
         self.screen = pygame.display.set_mode((1000, 700))  # Extended width to 1000
         pygame.display.set_caption("Monopoly")
-        self.background = pygame.image.load("src/img/upd_monopoly_board.png")
-        self.font = pygame.font.Font(None, 36)
+        self.assets = AssetManager()
+        self.assets.preload()
+        self.background = self.assets.image(BOARD_IMAGE)
+        self.frame_stats = FrameStats()
+        self.font = CountingFont(self.assets.font(), self.frame_stats)
+        self.hud = PerformanceHud(self.frame_stats, visible=show_hud)
         self.players = []
-        self.estates = initialize_estates()
+        self.board = board if board is not None else load_board()
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.random = GameRandom(seed)
+        self.last_dice = None
+        self.jackpot = 0  # Free Parking pot, only used when the rules enable it
+        self.estates = initialize_estates(self.board, self.rules)
         self.estate_dict = initialize_estate_dict(self.estates)
+        # Token moves are applied at once and animated along the square centers
+        self.square_centers = [estate.position for estate in self.estates]
+        self.animator = TokenAnimator(self.square_centers)
+        self.group_estates = {
+            self.board.group_names[group]: [self.estates[i] for i in members]
+            for group, members in enumerate(self.board.group_members)
+        }
+        self.players_with_estates = 0
         self.current_player_index = 0
         self.dice_rolled = False
-        self.chance_deck = create_chance_deck()
-        self.community_chest_deck = create_community_chest_deck()
+        self.turn = TurnMachine()
+        self.square_handlers = compile_square_handlers(self.board)
+        self.bind_actions()
+        self.chance_deck = create_chance_deck(self.board, self.random)
+        self.community_chest_deck = create_community_chest_deck(self.board, self.random)
+        self.current_card = None
+        self.buttons[0]["enabled"] = True  # Enable "Roll Dice" button
+        self.running = True
+        self.setup_phase = True
+        self.input_box = pygame.Rect(250, 300, 200, 50)
+        self.input_text = ""
+        self.num_players = 0
+        self.current_setup_step = 0
+        self.token_colors = ["red", "blue", "green", "yellow"]  # Later players get generated colors
+        self.current_color_index = 0
         self.current_card = None
+        self.mortgage_popup_active = False
+        self.mortgage_popup_player = None
+        self.trade_popup_active = False
+        self.trade_stage = None
+        self.trade_proposal = None  # Bundle being edited or put to the other player
+        self.trade_input = None  # Proposal cash field ("give_cash" or "take_cash") typed into
+        self.auction_mode = auction_mode
+        self.auction = None
+        self.auction_input = ""
+        self.declined_estate = None  # Estate offered this turn and not bought yet
+        self.winner = None
+        self.spectators = spectators
+        self.api = api
+        self.recorder = recorder
+        self.saved_state = None
+        self.autosaver = None
+        if autosave_path is not None:
+            self.saved_state = load_save(autosave_path)
+            if self.saved_state is not None:
+                self.current_setup_step = -1  # Ask whether to resume first
+            self.autosaver = Autosaver(autosave_path, autosave_interval)
+
+    def bind_actions(self):
+        """Creates the landing and card dispatch tables, the action buttons and the
+        widget tree, whose entries call this game's methods.
+
+        Runtime Complexity:
+            - Worst-case O(1): A fixed number of handlers, buttons and layers.
+            - Average-case O(1): Same as worst-case.
+        """
+        # Landing and card dispatch tables, indexed by square handler id and card opcode
+        self.landing_handlers = [
+            self.land_on_nothing,
+            self.land_on_estate,
+            self.land_on_tax,
+            self.draw_chance_card,
+            self.draw_community_chest_card,
+            self.go_to_jail,
+            self.land_on_free_parking,
+        ]
+        self.card_effects = [
+            lambda player, card: None,
+            lambda player, card: self.move_player_to(
+                player, card.move_to if card.target is None else card.target
+            ),
+            lambda player, card: self.move_to_nearest_utility(player),
+            lambda player, card: self.move_to_nearest_railroad(player),
+            lambda player, card: self.move_player_back(player, BACK_STEPS),
+            lambda player, card: self.go_to_jail(player),
+        ]
         self.buttons = [
             {
                 "label": "Roll Dice",
@@ -72,24 +238,98 @@ class Game:
                 "enabled": False,
             },
         ]
-        self.buttons[0]["enabled"] = True  # Enable "Roll Dice" button
-        self.running = True
-        self.setup_phase = True
-        self.input_box = pygame.Rect(250, 300, 200, 50)
-        self.input_text = ""
-        self.num_players = 0
-        self.current_setup_step = 0
-        self.token_colors = ["red", "blue", "green", "yellow"]
-        self.current_color_index = 0
-        self.current_card = None
-        self.mortgage_popup_active = False
-        self.mortgage_popup_player = None
-        self.trade_popup_active = False
-        self.trade_stage = None
-        self.trade_with_player = None
-        self.trade_property = None
-        self.trade_offer = ""
-        self.input_active = False
+        # Buttons and popups are laid out once per state they show and hit-tested through a grid
+        self.ui = WidgetTree()
+        self.ui.add_layer(
+            "buttons",
+            self.button_widgets,
+            lambda: tuple(button["enabled"] for button in self.buttons),
+        )
+        self.ui.add_layer("mortgage", self.mortgage_widgets, self.mortgage_key)
+        self.ui.add_layer("trade", self.trade_widgets, self.trade_key)
+        self.ui.add_layer("card", self.card_widgets, lambda: self.current_card)
+        self.ui.add_layer("auction", self.auction_widgets, self.auction_key)
+
+    def fork(self):
+        """Returns a copy of the game to play hypothetical continuations on, e.g. for
+        a bot's lookahead. The fork shares everything no move changes with this
+        game (board, static estate data, cards, assets) and copies only the small
+        per-game records: estates, players and the turn. Decks and buffered dice
+        are shared until one side draws past them. A fork draws nothing, never
+        waits and is not recorded, autosaved or streamed. Forking a headless game
+        (a GameFork subclass) keeps its class, so subclasses can extend fork.
+
+        Runtime Complexity:
+            - Worst-case O(N + P + C): Where N is the number of estates, P of players and C of their cards.
+            - Average-case O(N + P): Same as worst-case.
+        """
+        cls = type(self) if isinstance(self, GameFork) else GameFork
+        child = cls.__new__(cls)
+        child.__dict__.update(self.__dict__)
+        estates = [estate.fork() for estate in self.estates]
+        players = {player: player.fork() for player in self.players}
+        for player, twin in players.items():
+            for estate in player.estates:
+                twin.estates.append(estates[estate.index])
+                estates[estate.index].owner = twin
+        child.estates = estates
+        child.group_estates = {
+            self.board.group_names[group]: [estates[i] for i in members]
+            for group, members in enumerate(self.board.group_members)
+        }
+        child.players = [players[player] for player in self.players]
+        child.random = self.random.fork()
+        child.chance_deck = self.chance_deck.fork()
+        child.community_chest_deck = self.community_chest_deck.fork()
+        child.turn = self.turn.fork(players.get(self.turn.player))
+        if self.auction is not None:
+            child.auction = self.auction.fork(players, estates[self.auction.estate.index])
+        if self.declined_estate is not None:
+            child.declined_estate = estates[self.declined_estate.index]
+        if self.trade_proposal is not None:
+            child.trade_proposal = self.trade_proposal.fork(players, estates)
+        for name in ("winner", "mortgage_popup_player"):
+            setattr(child, name, players.get(getattr(self, name)))
+        child.animator = TokenAnimator(self.square_centers)
+        child.profiler = child.recorder = child.autosaver = None
+        child.spectators = child.api = child.saved_state = None
+        child.bind_actions()
+        for button, original in zip(child.buttons, self.buttons):
+            button["enabled"] = original["enabled"]
+        return child
+
+    def return_card(self, card):
+        """Puts a used Get Out of Jail Free card back at the bottom of its deck.
+
+        Runtime Complexity:
+            - Worst-case O(C): Copying a deck still shared with a fork.
+            - Average-case O(1): Queuing the card.
+        """
+        if card.deck is self.chance_deck.origin:
+            self.chance_deck.add_card(card)
+        else:
+            self.community_chest_deck.add_card(card)
+
+    def blit(self, surface, dest):
+        """Blits a surface onto the screen and counts it in the frame statistics.
+
+        Runtime Complexity:
+            - Worst-case O(S): Where S is the number of pixels copied.
+            - Average-case O(S): Same as worst-case.
+        """
+        self.frame_stats.blits += 1
+        return self.screen.blit(surface, dest)
+
+    def bank_transfer(self, player, amount):
+        """Pays an amount from the bank to a player, or from the player to the bank
+        if it is negative. All cash between players and the bank (including the
+        Free Parking jackpot, which the bank holds) moves through here.
+
+        Runtime Complexity:
+            - Worst-case O(1): Updating the balance.
+            - Average-case O(1): Same as worst-case.
+        """
+        player.update_balance(amount)
 
     def mortgage_property(self, player, estate):
         """Mortgages a property for a player and updates their balance accordingly.
@@ -99,7 +339,7 @@ class Game:
             - Average-case O(1): Same as worst-case.
         """
         if estate.mortgage():
-            player.update_balance(estate.price // 2)
+            self.bank_transfer(player, estate.price // 2)
             print(f"{player.name} mortgaged {estate.name} for ${estate.price // 2}")
         else:
             print(f"{player.name} could not mortgage {estate.name}")
@@ -108,43 +348,23 @@ class Game:
         """Moves the player token to the nearest utility property.
 
         Runtime Complexity:
-            - Worst-case O(n): Where n is the number of utility properties. Iterates over all utility properties. Utility positions are fixed and can be found in dictirionary.
+            - Worst-case O(n): The nearest utility is looked up in the board's topology index; moving there calls move_player, where n is the number of steps.
             - Average-case O(n): Same as worst-case.
         """
-        utilities = ["Electric Company", "Water Works"]
-        current_position = player.position
-        nearest_utility = min(
-            utilities,
-            key=lambda utility: (
-                self.get_estate_position_by_name(utility) - current_position
-            )
-            % len(self.estates),
-        )
-        self.move_player_to(player, nearest_utility)
+        nearest_utility = self.board.nearest_utility[player.position]
+        if nearest_utility >= 0:  # Boards without utilities leave the player where they are
+            self.move_player_to(player, nearest_utility)
 
     def move_to_nearest_railroad(self, player):
         """Moves the player token to the nearest railroad property.
 
         Runtime Complexity:
-            - Worst-case O(n): Where n is the number of steps properties a player needs to make to reach the railroad, since the move_player_to method is called.
-            and it calls the move_player method, which has a worst-case complexity of O(n), where n is the number of steps. In the 
+            - Worst-case O(n): The nearest station is looked up in the board's topology index; moving there calls move_player, where n is the number of steps.
             - Average-case O(n): Same as worst-case.
         """
-        railroads = [
-            "Kings Cross Station",
-            "Marylebone Station",
-            "Fenchurch St. Station",
-            "Liverpool St. Station",
-        ]
-        current_position = player.position
-        nearest_railroad = min(
-            railroads,
-            key=lambda railroad: (
-                self.get_estate_position_by_name(railroad) - current_position
-            )
-            % len(self.estates),
-        )
-        self.move_player_to(player, nearest_railroad)
+        nearest_railroad = self.board.nearest_station[player.position]
+        if nearest_railroad >= 0:
+            self.move_player_to(player, nearest_railroad)
 
     def go_to_jail(self, player):
         """Sends the player to jail and updates their status.
@@ -153,12 +373,13 @@ class Game:
             - Worst-case O(1): Directly updates player's position and status.
             - Average-case O(1): Same as worst-case.
         """
-        player.position = self.get_estate_position_by_name("Jail")
+        player.position = self.board.jail_position
         if player.community_chest_cards:
             self.display_message(
                 f"{player.name} goes to jail and uses a 'Get Out of Jail Free' card"
             )
-            player.community_chest_cards.pop()
+            card = player.community_chest_cards.pop()
+            self.return_card(card)
             self.get_out_of_jail(player)
         else:
             player.in_jail = True
@@ -183,9 +404,9 @@ class Game:
         """
         if player.in_jail:
             player.jail_turns += 1
-            if player.jail_turns >= 3:
+            if player.jail_turns >= self.rules.jail_turns:
                 self.get_out_of_jail(player)
-                print(f"{player.name} is released from jail after 3 turns")
+                print(f"{player.name} is released from jail after {player.jail_turns} turns")
             else:
                 self.display_message(
                     f"{player.name} is in jail for {player.jail_turns} turns"
@@ -201,27 +422,52 @@ class Game:
         """
         return self.estate_dict[name]
 
-    def move_player_to(self, player, location_name):
-        """Moves a player to a specified location by name.
+    def move_player_to(self, player, location):
+        """Moves a player forward to a location given by board position or by name.
 
         Runtime Complexity:
             - Worst-case O(N): Where N is the number of estates the player has to move through to reach the location, since the move_player method iterates through N steps. In the worst case, the location the
              player has to reach is one position behind them, so they have to move through all the estates.
             - Average-case O(N): Same as worst-case.
         """
-        try:
-            target_position = next(
-                i
-                for i, estate in enumerate(self.estates)
-                if estate.name == location_name
-            )
-            old_position = player.position
-            steps = (target_position - old_position) % len(self.estates)
-            self.move_player(player, steps)
-            self.handle_estate(player)
-        except StopIteration:
-            print(f"Estate with name '{location_name}' not found")
+        if isinstance(location, int):
+            target_position = location
+        elif location in self.estate_dict:
+            target_position = self.get_estate_position_by_name(location)
+        else:
+            print(f"Estate with name '{location}' not found")
+            return
+        steps = self.board.steps_to(player.position, target_position)
+        # move_player resolves the landing square
+        self.move_player(player, steps)
+
+    def move_player_back(self, player, steps):
+        """Moves a player backwards without passing Go and resolves the landing square.
+
+        Runtime Complexity:
+            - Worst-case O(S): Position arithmetic and a single landing resolution, plus one animation frame per step.
+            - Average-case O(S): Same as worst-case.
+        """
+        old_position = player.position
+        player.position = (old_position - steps) % len(self.estates)
+        self.animate_move(player, old_position, steps, -1)
+        self.handle_estate(player)
+
+    def animate_move(self, player, start, steps, direction=1):
+        """Shows a token hopping from start to the square the player has moved to.
+
+        Runtime Complexity:
+            - Worst-case O(S * (P + B + E)): Where S is the number of steps, one board redraw per hop.
+            - Average-case O(S * (P + B + E)): Same as worst-case.
+        """
+        self.animator.start(player, start, steps, direction)
+        while self.animator.busy():
+            self.update_board()
+            pygame.time.wait(self.animator.hop_ms)
+            self.animator.step()
+        self.update_board()
 
+    @timed("draw_player_info")
     def draw_player_info(self):
         """Displays the current player's information, including properties and cards.
 
@@ -242,19 +488,19 @@ class Game:
 
         # Draw current player name
         name_text = self.font.render(f"Player: {current_player.name}", True, (0, 0, 0))
-        self.screen.blit(name_text, (info_x, info_y))
+        self.blit(name_text, (info_x, info_y))
         info_y += line_height
 
         # Draw current player cash
         cash_text = self.font.render(
             f"Cash: ${current_player.balance}", True, (0, 0, 0)
         )
-        self.screen.blit(cash_text, (info_x, info_y))
+        self.blit(cash_text, (info_x, info_y))
         info_y += line_height
 
         # Draw current player properties
         properties_text = self.font.render("Properties:", True, (0, 0, 0))
-        self.screen.blit(properties_text, (info_x, info_y))
+        self.blit(properties_text, (info_x, info_y))
         info_y += line_height
 
         # Define group colors
@@ -282,47 +528,91 @@ class Game:
                 else group_colors.get(estate.group, (0, 0, 0))
             )
             estate_text = self.font.render(f"- {estate.name}", True, estate_color)
-            self.screen.blit(estate_text, (info_x, info_y))
+            self.blit(estate_text, (info_x, info_y))
             info_y += line_height
 
         # Draw picked-up Community Chest cards
         cards_text = self.font.render("Cards:", True, (0, 0, 0))
-        self.screen.blit(cards_text, (info_x, info_y))
+        self.blit(cards_text, (info_x, info_y))
         info_y += line_height
 
         for card in current_player.community_chest_cards:
             card_text = self.font.render(f"- {card.description}", True, (0, 0, 255))
-            self.screen.blit(card_text, (info_x, info_y))
+            self.blit(card_text, (info_x, info_y))
             info_y += line_height
 
+    @timed("roll")
     def roll_dice(self):
         """Rolls the dice for the current player and moves them accordingly.
 
+        Doubles give the player another roll after their actions; the third
+        double in a row sends them to jail instead of moving.
+
         Runtime Complexity:
             - Worst-case O(N): Dice roll is constant time. Calls move_player method with a worst-case complexity of O(N), where N is the number of steps moved.
             - Average-case O(N): Same as worst-case.
         """
-        if not self.dice_rolled:
-            dice_roll = random.randint(1, 6) + random.randint(1, 6)
-            dice_roll = 2
-            print(f"Dice rolled: {dice_roll}")
-            # Display the dice roll on the screen
-            dice_text = self.font.render(f"Dice: {dice_roll}", True, (0, 0, 0))
-            self.screen.blit(dice_text, (750, 200))
-            pygame.display.flip()
-            pygame.time.wait(1000)  # Wait for 1 second to show the dice roll
-            self.move_player(self.players[self.current_player_index], dice_roll)
-            self.dice_rolled = True
-            self.buttons[0]["enabled"] = False  # Disable "Roll Dice" button
-            self.buttons[5]["enabled"] = True  # Enable "End Turn" button
-        else:
+        if self.dice_rolled:
             print("You have already rolled the dice this turn.")
+            return
+        player = self.players[self.current_player_index]
+        estate = self.declined_estate
+        if estate is not None and estate.owner is None and len(self.players) > 1:
+            # A property declined before rolling doubles again is auctioned first
+            self.declined_estate = None
+            self.start_auction(estate)
+            return
+        if self.turn.player is not player:
+            self.turn.start_turn(player)
+        elif self.turn.phase == PHASE_ACTIONS:
+            self.turn.advance(PHASE_ROLL)  # Rolling again after doubles
+
+        die1, die2 = self.last_dice = self.random.roll()
+        dice_roll = die1 + die2
+        print(f"Dice rolled: {die1} + {die2} = {dice_roll}")
+        self.show_dice(die1, die2)
+
+        if player.in_jail:
+            self.turn.advance(PHASE_ACTIONS, "jail")
+            self.handle_jail_turn(player)
+        elif self.turn.rolled(die1, die2):
+            self.turn.advance(PHASE_ACTIONS, "three doubles")
+            self.display_message(f"{player.name} rolled three doubles and goes to jail")
+            self.go_to_jail(player)
+        else:
+            self.turn.advance(PHASE_MOVE)
+            self.move_player(player, dice_roll)
+            if player not in self.players:
+                return  # The player went bankrupt and the turn has passed on
+            self.turn.advance(PHASE_ACTIONS)
+
+        self.dice_rolled = not (self.turn.rolls_again() and not player.in_jail)
+        if not self.dice_rolled:
+            self.display_message(f"{player.name} rolled doubles and rolls again")
+        self.buttons[0]["enabled"] = not self.dice_rolled  # "Roll Dice" again after doubles
+        self.buttons[5]["enabled"] = self.dice_rolled  # "End Turn" once the rolling is done
 
+    def show_dice(self, die1, die2):
+        """Displays the dice roll on the screen for a second.
+
+        Runtime Complexity:
+            - Worst-case O(1): Renders one line of text.
+            - Average-case O(1): Same as worst-case.
+        """
+        dice_text = self.font.render(f"Dice: {die1} + {die2}", True, (0, 0, 0))
+        self.blit(dice_text, (750, 200))
+        pygame.display.flip()
+        pygame.time.wait(1000)  # Wait for 1 second to show the dice roll
+
+    @timed("move")
     def move_player(self, player, steps):
         """Moves the player's token a specified number of steps on the board.
 
+        The destination and passing Go are computed directly; the path is then
+        animated with one frame per hop.
+
         Runtime Complexity:
-            - Worst-case O(N): Where N is the number of steps moved. Iterates over the steps to move the player. 
+            - Worst-case O(N): Where N is the number of steps moved, one animation frame per hop. The move itself is O(1).
             - Average-case O(N): Same as worst-case.
         """
         if player.in_jail:
@@ -330,56 +620,127 @@ class Game:
             return
         print(f"Before move: {player.name} is on position {player.position}")
         old_position = player.position
-        print(old_position)
-        for _ in range(steps):
-            player.position = (player.position + 1) % len(self.estates)
-            self.update_board()
-            pygame.time.wait(200)  # Wait for 200 milliseconds between each step
+        player.position = (old_position + steps) % len(self.estates)
+        self.animate_move(player, old_position, steps)
 
-        if player.position < old_position:
-            player.update_balance(200)
-            print(f"{player.name} passed Go and collected $200")
+        if self.board.passes_go(old_position, steps):
+            self.bank_transfer(player, self.rules.go_salary)
+            print(f"{player.name} passed Go and collected ${self.rules.go_salary}")
 
         print(f"After move: {player.name} is on position {player.position}")
+        if self.turn.phase == PHASE_MOVE:
+            self.turn.advance(PHASE_RESOLVE, player.position)
         self.handle_estate(player)
 
+    @timed("handle_estate")
     def handle_estate(self, player):
         """Handles the logic when a player lands on an estate.
 
+        The square's handler is looked up in the table compiled from the board.
+
         Runtime Complexity:
-            - Worst-case O(1): Involves conditional checks and method calls that are constant time.
+            - Worst-case O(1): One table index and one dispatch.
             - Average-case O(1): Same as worst-case.
         """
         current_estate = self.estates[player.position]
         print(f"{player.name} is currently on {current_estate.name}")
         print(f"{player.name} has ${player.balance}")
-        print(f"{player.name} currently owns:")
-
-        if current_estate.group == "Tax":
-            player.update_balance(-current_estate.price)
-            print(f"{player.name} paid ${current_estate.price} in taxes")
-        elif current_estate.name == "Chance":
-            self.draw_chance_card(player)
-        elif current_estate.name == "Community Chest":
-            self.draw_community_chest_card(player)
-        elif current_estate.name == "Go to Jail":
-            self.go_to_jail(player)
-        elif current_estate.owner is not None and current_estate.owner != player:
-            if not current_estate.pay_rent(player):
-                self.offer_mortgage(player)
-        else:
-            if current_estate.buyable:
-                self.buttons[1]["enabled"] = True  # Enable "Buy Property" button
+        self.landing_handlers[self.square_handlers[player.position]](player)
 
-    def offer_mortgage(self, player):
-        """Offers the player an option to mortgage properties.
+    def land_on_nothing(self, player):
+        """Handles squares without an effect, such as Go and Jail.
 
         Runtime Complexity:
-            - Worst-case O(1): Initiates the mortgage popup.
+            - Worst-case O(1): Nothing to do.
             - Average-case O(1): Same as worst-case.
         """
-        print(f"{player.name} is offered to mortgage a property")
-        self.display_mortgage_popup(player)
+
+    def land_on_tax(self, player):
+        """Charges the tax of the square the player is on.
+
+        Runtime Complexity:
+            - Worst-case O(h log h): Where h is the number of estates the player owns, when they have to liquidate.
+            - Average-case O(1): The player can usually pay from cash.
+        """
+        estate = self.estates[player.position]
+        if self.charge(player, estate.price):
+            print(f"{player.name} paid ${estate.price} in taxes")
+
+    def land_on_free_parking(self, player):
+        """Pays out the Free Parking jackpot, which is only filled when the rules enable it.
+
+        Runtime Complexity:
+            - Worst-case O(1): Updating the balance.
+            - Average-case O(1): Same as worst-case.
+        """
+        if self.jackpot:
+            print(f"{player.name} collected the ${self.jackpot} Free Parking jackpot")
+            self.bank_transfer(player, self.jackpot)
+            self.jackpot = 0
+
+    def land_on_estate(self, player):
+        """Charges rent on an estate owned by another player, or offers an unowned one for sale.
+
+        Runtime Complexity:
+            - Worst-case O(h log h): Where h is the number of estates the player owns, when they have to liquidate.
+            - Average-case O(1): Paying rent or enabling the buy button.
+        """
+        current_estate = self.estates[player.position]
+        if current_estate.owner is not None and current_estate.owner != player:
+            if not current_estate.mortgaged:
+                rent = current_estate.rent_due()
+                owner = current_estate.owner
+                if self.charge(player, rent, owner):
+                    print(f"{player.name} paid ${rent} in rent to {owner.name}")
+        elif current_estate.owner is None:
+            self.buttons[1]["enabled"] = True  # Enable "Buy Property" button
+            self.declined_estate = current_estate
+
+    def charge(self, player, amount, creditor=None):
+        """Makes a player pay an amount to a creditor or the bank, liquidating their assets if needed.
+
+        Returns False if the player could not pay and went bankrupt.
+
+        Runtime Complexity:
+            - Worst-case O(h log h): Where h is the number of estates the player owns, when they have to liquidate.
+            - Average-case O(1): The player can usually pay from cash.
+        """
+        if player.balance < amount:
+            print(f"{player.name} has to raise funds to pay ${amount}")
+        if settle_debt(self, player, amount, creditor):
+            if creditor is None and self.rules.free_parking_jackpot:
+                self.jackpot += amount
+            return True
+        to = creditor.name if creditor is not None else "the bank"
+        print(f"{player.name} is bankrupt and hands their assets to {to}")
+        self.display_message(f"{player.name} is bankrupt and leaves the game")
+        return False
+
+    def remove_player(self, player):
+        """Removes a bankrupt player from the turn rotation.
+
+        If it was their turn, the turn passes to the next player.
+
+        Runtime Complexity:
+            - Worst-case O(P): Where P is the number of players, to find and remove the player.
+            - Average-case O(P): Same as worst-case.
+        """
+        index = self.players.index(player)
+        self.players.pop(index)
+        if index < self.current_player_index:
+            self.current_player_index -= 1
+        elif index == self.current_player_index:
+            self.current_player_index = index % len(self.players)
+            self.dice_rolled = False
+            self.declined_estate = None
+            self.turn.start_turn(self.players[self.current_player_index])
+        if len(self.players) == 1:
+            self.winner = self.players[0]
+            if self.autosaver is not None:
+                self.autosaver.discard()  # A finished game is not offered for resuming
+            self.record_turn()
+            self.display_message(f"{self.winner.name} wins the game!")
+        self.update_buttons()
 
     def handle_build_house(self):
         """Allows the current player to build a house on a property they own.
@@ -392,16 +753,21 @@ class Game:
         player = self.players[self.current_player_index]
         current_estate = self.estates[player.position]
         if current_estate.owner == player:
-            if current_estate.build_house(self):
+            cost = current_estate.house_cost * (2 if current_estate.houses == 4 else 1)
+            if player.balance < cost:
+                self.display_message(
+                    f"{player.name} cannot afford to build on {current_estate.name}"
+                )
+            elif current_estate.build_house(self):
                 if current_estate.hotel:
                     print(f"{player.name} built a hotel on {current_estate.name}")
-                    player.update_balance(-current_estate.house_cost * 2)
+                    self.bank_transfer(player, -current_estate.house_cost * 2)
                     self.display_message(
                         f"{player.name} built a hotel on {current_estate.name}"
                     )
                 else:
                     print(f"{player.name} built a house on {current_estate.name}")
-                    player.update_balance(-current_estate.house_cost)
+                    self.bank_transfer(player, -current_estate.house_cost)
                     self.display_message(
                         f"{player.name} built a house on {current_estate.name}"
                     )
@@ -427,7 +793,7 @@ class Game:
 
         for line in wrapped_lines:
             message_text = self.font.render(line, True, (0, 0, 0))
-            self.screen.blit(message_text, (message_rect.x + 10, text_y))
+            self.blit(message_text, (message_rect.x + 10, text_y))
             text_y += self.font.get_linesize()
 
         pygame.display.flip()
@@ -441,26 +807,39 @@ class Game:
             - Worst-case O(L): Where L is the number of lines after text wrapping.
             - Average-case O(L): Same as worst-case.
         """
-        # Log the type and attributes of the card object
+        self.current_card = card
+        self.ui.draw(self, "card")
+        pygame.display.flip()
+        pygame.time.wait(2000)  # Display the card for 2 seconds
+        print("Card displayed")
 
-        card_rect = pygame.Rect(200, 220, 300, 300)  # Centered on the 700x700 board
-        pygame.draw.rect(self.screen, (255, 255, 255), card_rect)
-        pygame.draw.rect(self.screen, (0, 0, 0), card_rect, 2)
+    def card_widgets(self):
+        """Lays out the drawn card; clicking it puts it away.
 
-        max_width = (
-            card_rect.width - 20
-        )  # Maximum width for card text with some padding
-        wrapped_lines = wrap_text(card.description, self.font, max_width)
+        Runtime Complexity:
+            - Worst-case O(L): Where L is the number of lines after text wrapping.
+            - Average-case O(L): Same as worst-case.
+        """
+        card_rect = pygame.Rect(200, 220, 300, 300)  # Centered on the 700x700 board
+        panel = Panel(card_rect)
+        panel.action = self.dismiss_card
+        widgets = [panel]
+        max_width = card_rect.width - 20  # Maximum width for card text with some padding
         text_y = card_rect.y + 10  # Start text a little below the top of the card
-
-        for line in wrapped_lines:
-            card_text = self.font.render(line, True, (0, 0, 0))
-            self.screen.blit(card_text, (card_rect.x + 10, text_y))
+        for line in wrap_text(self.current_card.description, self.font, max_width):
+            widgets.append(Label((card_rect.x + 10, text_y), line))
             text_y += self.font.get_linesize()
+        return widgets
 
-        pygame.display.flip()
-        pygame.time.wait(2000)  # Display the card for 2 seconds
-        print("Card displayed")
+    def dismiss_card(self):
+        """Puts the displayed card away.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        self.current_card = None
+        self.update_board()
 
     def draw_chance_card(self, player):
         """Draws a Chance card for the player and applies its effects.
@@ -471,11 +850,8 @@ class Game:
         """
         self.current_card = self.chance_deck.draw_card()
         self.display_card(self.current_card)
-        self.apply_effect(
-            player,
-            self.current_card,
-        )
         print(f"{player.name} drew a Chance card: {self.current_card.description}")
+        self.apply_effect(player, self.current_card)
         self.current_card = None
 
     def draw_community_chest_card(self, player):
@@ -493,85 +869,19 @@ class Game:
         self.apply_effect(player, self.current_card)
         self.current_card = None
 
+    @timed("event_click")
     def handle_click(self, pos):
         """Handles click events on the game interface.
 
+        The click goes to the top-most button or popup under it; popups catch
+        the clicks that land on them, and the auction and mortgage popups also
+        catch the clicks around them.
+
         Runtime Complexity:
-            - Worst-case O(E log E + E + B + T):
-                - O(E log E): From `calculate_mortgage_efficiency`, which sorts E properties.
-                - O(E): Iterates over E properties and mortgaged properties.
-                - O(B): Iterates over B buttons.
-                - O(T): Time taken by trade handling methods (`handle_select_player_click`, etc.).
-            - Average-case O(E log E + E + B + T): Same as worst-case.
+            - Worst-case O(L * K + D + A): Where L is the number of layers, K the cost of checking whether a layer changed, D the number of widgets in the clicked grid cell and A the cost of the action.
+            - Average-case O(L * K + A): A grid cell holds a few widgets and the layout is reused.
         """
-        # Handle card display dismissal
-        if hasattr(self, "current_card") and self.current_card:
-            card_rect = pygame.Rect(350, 300, 300, 100)
-            if card_rect.collidepoint(pos):
-                self.current_card = None
-                self.update_board()
-                return
-
-        # Handle mortgage popup interactions
-        if hasattr(self, "mortgage_popup_active") and self.mortgage_popup_active:
-            popup_rect = pygame.Rect(100, 100, 600, 500)
-            if not popup_rect.collidepoint(pos):
-                self.mortgage_popup_active = False
-                self.update_board()
-                return
-
-            button_height = 40
-            button_width = 560
-            button_margin = 10
-            button_y = popup_rect.y + 80
-
-            # Handle recommended properties to mortgage
-            properties = self.calculate_mortgage_efficiency(self.mortgage_popup_player)
-            for estate, score in properties:
-                button_rect = pygame.Rect(
-                    popup_rect.x + 20, button_y, button_width, button_height
-                )
-                if button_rect.collidepoint(pos):
-                    self.mortgage_property(self.mortgage_popup_player, estate)
-                    self.mortgage_popup_active = False
-                    self.update_board()
-                    return
-                button_y += button_height + button_margin
-
-            # Handle mortgaged properties
-            mortgaged_properties = [
-                estate
-                for estate in self.mortgage_popup_player.estates
-                if estate.mortgaged
-            ]
-            if mortgaged_properties:
-                button_y += button_margin  # Skip the "Mortgaged Properties" title
-                button_y += button_height
-                for estate in mortgaged_properties:
-                    button_rect = pygame.Rect(
-                        popup_rect.x + 20, button_y, button_width, button_height
-                    )
-                    if button_rect.collidepoint(pos):
-                        self.unmortgage_property(self.mortgage_popup_player, estate)
-                        self.mortgage_popup_active = False
-                        self.update_board()
-                        return
-                    button_y += button_height + button_margin
-
-        # Handle trade popup interactions
-        if hasattr(self, "trade_popup_active") and self.trade_popup_active:
-            if self.trade_stage == "select_player":
-                self.handle_select_player_click(pos)
-            elif self.trade_stage == "select_property":
-                self.handle_select_property_click(pos)
-            elif self.trade_stage == "enter_offer":
-                self.handle_enter_offer_click(pos)
-            elif self.trade_stage == "confirm_trade":
-                self.handle_confirm_trade_click(pos)
-
-        for button in self.buttons:
-            if button["rect"].collidepoint(pos) and button["enabled"]:
-                button["action"]()
+        self.ui.click(pos)
 
     def unmortgage_property(self, player, estate):
         """Unmortgages a property for a player and updates their balance accordingly.
@@ -581,7 +891,7 @@ class Game:
             - Average-case O(1): Same as worst-case.
         """
         if estate.unmortgage():
-            player.update_balance(-estate.price)
+            self.bank_transfer(player, -estate.price)
             print(f"{player.name} unmortgaged {estate.name} for ${estate.price}")
         else:
             print(f"{player.name} could not unmortgage {estate.name}")
@@ -604,24 +914,26 @@ class Game:
         self.update_buttons()
         self.update_board()
 
-    def buy_estate(self, player, estate):
-        """Facilitates the purchase of an estate by a player.
+    def buy_estate(self, player, estate, price=None):
+        """Facilitates the purchase of an estate by a player, at its list price unless a price is given.
 
         Runtime Complexity:
-            - Worst-case O(n * m): Where n is the number of estates the player owns and m is the total number of estates.
-              Iterates over the player's estates and all estates to check for groups.
-            - Average-case O(n * m): Same as worst-case.
+            - Worst-case O(n * g): Where n is the number of estates the player owns and g is the size of their groups.
+              Iterates over the player's estates and the members of each group.
+            - Average-case O(n * g): Same as worst-case.
         """
-        if player.balance >= estate.price:
-            player.update_balance(-estate.price)
+        price = estate.price if price is None else price
+        if player.balance >= price:
+            self.bank_transfer(player, -price)
             estate.owner = player
+            if not player.estates:
+                self.players_with_estates += 1
             player.insert_estate_sorted(estate, self)
 
             # Check if the player owns three complete groups
             groups_owned = set()
             for estate in player.estates:
-                group_estates = [e for e in self.estates if e.group == estate.group]
-                if all(e.owner == player for e in group_estates):
+                if all(e.owner == player for e in self.group_estates[estate.group]):
                     groups_owned.add(estate.group)
 
             if len(groups_owned) >= 3:
@@ -637,281 +949,325 @@ class Game:
             - Worst-case O(1): Sets up variables for the trade.
             - Average-case O(1): Same as worst-case.
         """
-        """Initiate the trading process."""
         self.trade_popup_active = True
         self.trade_stage = "select_player"
-        self.trade_with_player = None
-        self.trade_property = None
-        self.trade_offer = ""
-        self.input_active = False
+        self.trade_proposal = None
+        self.trade_input = None
         self.update_board()
 
-    def display_trade_menu(self):
-        """Displays the trading menu based on the current trading stage.
+    def trade_key(self):
+        """Returns the state the trade popup is laid out from, or None while it is closed.
 
         Runtime Complexity:
-            - Worst-case O(n + m): Where n is the number of players and m is the number of properties owned by the trade_with_player.
-            - Average-case O(n + m): Same as worst-case.
+            - Worst-case O(P + N + C): Where P is the number of players, N the number of estates and C the number of jail cards of the two traders.
+            - Average-case O(P + N): Same as worst-case.
+        """
+        if not self.trade_popup_active:
+            return None
+        proposal = self.trade_proposal
+        if proposal is None:
+            return (self.trade_stage, self.current_player_index, tuple(self.players))
+        traders = (proposal.proposer, proposal.responder)
+        return (
+            self.trade_stage,
+            tuple(tuple(player.estates) for player in traders),
+            tuple(player.balance for player in traders),
+            tuple(len(jail_cards(player)) for player in traders),
+            tuple(proposal.give_estates),
+            tuple(proposal.take_estates),
+            proposal.give_cash,
+            proposal.take_cash,
+            proposal.give_cards,
+            proposal.take_cards,
+            self.trade_input,
+        )
+
+    def trade_widgets(self):
+        """Lays out the trading popup for the current trading stage.
+
+        Runtime Complexity:
+            - Worst-case O(P + N * g): Where P is the number of players, N the number of estates of the two traders and g the size of their groups.
+            - Average-case O(P + N * g): Same as worst-case.
         """
-        """Display the trading menu based on the current stage."""
         popup_rect = pygame.Rect(150, 100, 700, 500)
-        pygame.draw.rect(self.screen, (255, 255, 255), popup_rect)
-        pygame.draw.rect(self.screen, (0, 0, 0), popup_rect, 2)
+        widgets = [Panel(popup_rect)]
+        title = (popup_rect.x + 20, popup_rect.y + 20)
 
         if self.trade_stage == "select_player":
-            title_text = self.font.render(
-                "Select a player to trade with:", True, (0, 0, 0)
-            )
-            self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
-
+            widgets.append(Label(title, "Select a player to trade with:"))
             button_height = 50
-            button_width = 200
             button_margin = 10
             button_y = popup_rect.y + 80
-
             current_player = self.players[self.current_player_index]
             for player in self.players:
                 if player != current_player:
-                    button_rect = pygame.Rect(
-                        popup_rect.x + 250, button_y, button_width, button_height
-                    )
-                    pygame.draw.rect(self.screen, (200, 200, 200), button_rect)
-                    pygame.draw.rect(self.screen, (0, 0, 0), button_rect, 2)
-                    player_text = self.font.render(player.name, True, (0, 0, 0))
-                    self.screen.blit(
-                        player_text, (button_rect.x + 10, button_rect.y + 10)
+                    widgets.append(
+                        Button(
+                            (popup_rect.x + 250, button_y, 200, button_height),
+                            player.name,
+                            lambda player=player: self.select_trade_player(player),
+                        )
                     )
                     button_y += button_height + button_margin
 
-        elif self.trade_stage == "select_property":
-            if not self.trade_with_player.estates:
-                title_text = self.font.render(
-                    f"Player {self.trade_with_player.name} has no properties to trade.",
-                    True,
-                    (0, 0, 0),
-                )
-                self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
-                pygame.display.flip()
-                pygame.time.wait(2000)  # Display message for 2 seconds
-                self.trade_popup_active = False  # Close the trade menu
-                self.update_board()  # Refresh the board
-                return
-
-            title_text = self.font.render(
-                f"Select a property from {self.trade_with_player.name}:",
-                True,
-                (0, 0, 0),
-            )
-            self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
-
-            button_height = 40
-            button_width = 660
-            button_margin = 10
-            button_y = popup_rect.y + 80
-
-            for estate in self.trade_with_player.estates:
-                button_rect = pygame.Rect(
-                    popup_rect.x + 20, button_y, button_width, button_height
-                )
-                pygame.draw.rect(self.screen, (200, 200, 200), button_rect)
-                pygame.draw.rect(self.screen, (0, 0, 0), button_rect, 2)
-                estate_text = self.font.render(
-                    f"{estate.name} (${estate.price})", True, (0, 0, 0)
-                )
-                self.screen.blit(estate_text, (button_rect.x + 10, button_rect.y + 5))
-                button_y += button_height + button_margin
-
-        elif self.trade_stage == "enter_offer":
-            title_text = self.font.render(
-                f"Enter your offer for {self.trade_property.name}:", True, (0, 0, 0)
-            )
-            self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
-
-            input_box = pygame.Rect(popup_rect.x + 250, popup_rect.y + 80, 200, 50)
-            pygame.draw.rect(self.screen, (255, 255, 255), input_box)
-            pygame.draw.rect(self.screen, (0, 0, 0), input_box, 2)
-            offer_text = self.font.render(self.trade_offer, True, (0, 0, 0))
-            self.screen.blit(offer_text, (input_box.x + 10, input_box.y + 10))
-
-            player = self.players[self.current_player_index]
-            is_valid_offer = (
-                self.trade_offer.isdigit()
-                and int(self.trade_offer) <= player.balance
-                and int(self.trade_offer) > 0
+        elif self.trade_stage == "edit_offer":
+            proposal = self.trade_proposal
+            widgets.append(Label(title, f"Trade with {proposal.responder.name}:"))
+            sides = (
+                (proposal.proposer, proposal.give_estates, "give_cash", "give_cards"),
+                (proposal.responder, proposal.take_estates, "take_cash", "take_cards"),
             )
-
-            if not is_valid_offer and self.trade_offer:
-                error_text_line1 = self.font.render(
-                    "Offer exceeds your balance or is invalid.", True, (200, 0, 0)
+            for column, (player, offered, cash_field, cards_field) in enumerate(sides):
+                x = popup_rect.x + 20 + column * 340
+                widgets.append(Label((x, popup_rect.y + 55), f"{player.name} gives:"))
+                widgets.extend(
+                    self.trade_estate_buttons(
+                        player, offered, pygame.Rect(x, popup_rect.y + 90, 320, 250)
+                    )
                 )
-                error_text_line2 = self.font.render(
-                    "Please enter a valid amount.", True, (200, 0, 0)
+                cash_box = Panel((x + 90, popup_rect.y + 345, 150, 36))
+                cash_box.action = lambda field=cash_field: self.activate_trade_input(field)
+                cursor = "|" if self.trade_input == cash_field else ""
+                widgets.append(Label((x, popup_rect.y + 350), "Cash:"))
+                widgets.append(cash_box)
+                widgets.append(
+                    Label(
+                        (cash_box.rect.x + 10, cash_box.rect.y + 6),
+                        f"${getattr(proposal, cash_field)}{cursor}",
+                    )
                 )
-                self.screen.blit(
-                    error_text_line1, (popup_rect.x + 20, popup_rect.y + 220)
+                cards = getattr(proposal, cards_field)
+                held = len(jail_cards(player))
+                widgets.append(Label((x, popup_rect.y + 392), f"Jail cards: {cards}/{held}"))
+                for offset, text, step, enabled in (
+                    (200, "-", -1, cards > 0),
+                    (240, "+", 1, cards < held),
+                ):
+                    widgets.append(
+                        Button(
+                            (x + offset, popup_rect.y + 388, 32, 32),
+                            text,
+                            lambda field=cards_field, step=step: self.change_trade_cards(
+                                field, step
+                            ),
+                            text_offset=(10, 4),
+                            enabled=enabled,
+                        )
+                    )
+            problem = self.trade_problem()
+            if problem is not None:
+                widgets.append(
+                    Label((popup_rect.x + 20, popup_rect.y + 425), problem, (200, 0, 0))
                 )
-                self.screen.blit(
-                    error_text_line2, (popup_rect.x + 20, popup_rect.y + 250)
+            widgets.append(
+                Button(
+                    (popup_rect.x + 200, popup_rect.y + 450, 120, 40),
+                    "Propose",
+                    self.submit_trade_offer,
+                    color=(0, 255, 0),
+                    text_offset=(10, 5),
+                    enabled=problem is None,
                 )
-
-            if is_valid_offer:
-                submit_button = pygame.Rect(
-                    popup_rect.x + 300, popup_rect.y + 150, 100, 40
-                )
-                pygame.draw.rect(self.screen, (0, 255, 0), submit_button)
-                pygame.draw.rect(self.screen, (0, 0, 0), submit_button, 2)
-                submit_text = self.font.render("Submit", True, (0, 0, 0))
-                self.screen.blit(
-                    submit_text, (submit_button.x + 10, submit_button.y + 5)
+            )
+            widgets.append(
+                Button(
+                    (popup_rect.x + 380, popup_rect.y + 450, 120, 40),
+                    "Cancel",
+                    self.cancel_trade,
+                    color=(255, 0, 0),
+                    text_offset=(10, 5),
                 )
+            )
 
         elif self.trade_stage == "confirm_trade":
-            title_text = self.font.render(
-                f"{self.trade_with_player.name}, do you accept the trade?",
-                True,
-                (0, 0, 0),
+            proposal = self.trade_proposal
+            widgets.append(Label(title, f"{proposal.responder.name}, do you accept the trade?"))
+            line_y = popup_rect.y + 80
+            for text in (
+                f"{proposal.proposer.name} gives: {proposal.describe_give()}",
+                f"{proposal.responder.name} gives: {proposal.describe_take()}",
+            ):
+                for line in wrap_text(text, self.font, popup_rect.width - 40):
+                    widgets.append(Label((popup_rect.x + 20, line_y), line))
+                    line_y += 30
+                line_y += 10
+            widgets.append(
+                Button(
+                    (popup_rect.x + 200, popup_rect.y + 450, 100, 40),
+                    "Accept",
+                    self.accept_trade,
+                    color=(0, 255, 0),
+                    text_offset=(10, 5),
+                )
             )
-            self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
-
-            details_text = self.font.render(
-                f"{self.players[self.current_player_index].name} offers ${self.trade_offer} for {self.trade_property.name}",
-                True,
-                (0, 0, 0),
+            widgets.append(
+                Button(
+                    (popup_rect.x + 400, popup_rect.y + 450, 100, 40),
+                    "Decline",
+                    self.decline_trade,
+                    color=(255, 0, 0),
+                    text_offset=(10, 5),
+                )
             )
-            self.screen.blit(details_text, (popup_rect.x + 20, popup_rect.y + 80))
+        return widgets
 
-            accept_button = pygame.Rect(popup_rect.x + 200, popup_rect.y + 150, 100, 40)
-            pygame.draw.rect(self.screen, (0, 255, 0), accept_button)
-            pygame.draw.rect(self.screen, (0, 0, 0), accept_button, 2)
-            accept_text = self.font.render("Accept", True, (0, 0, 0))
-            self.screen.blit(accept_text, (accept_button.x + 10, accept_button.y + 5))
+    def trade_estate_buttons(self, player, offered, area):
+        """Lays out one toggle button per estate of a trader inside area, in as
+        many columns as it takes. Offered estates are highlighted; estates of a
+        group with buildings are greyed out, as they cannot be traded.
 
-            decline_button = pygame.Rect(
-                popup_rect.x + 400, popup_rect.y + 150, 100, 40
-            )
-            pygame.draw.rect(self.screen, (255, 0, 0), decline_button)
-            pygame.draw.rect(self.screen, (0, 0, 0), decline_button, 2)
-            decline_text = self.font.render("Decline", True, (0, 0, 0))
-            self.screen.blit(
-                decline_text, (decline_button.x + 10, decline_button.y + 5)
+        Runtime Complexity:
+            - Worst-case O(N * g): Where N is the number of estates of the player and g the size of their groups.
+            - Average-case O(N * g): Same as worst-case.
+        """
+        row_height = 31
+        rows = area.height // row_height
+        columns = max(1, -(-len(player.estates) // rows))
+        width = area.width // columns
+        buttons = []
+        for i, estate in enumerate(player.estates):
+            column, row = divmod(i, rows)
+            built = any(other.houses or other.hotel for other in self.group_estates[estate.group])
+            buttons.append(
+                Button(
+                    (area.x + column * width, area.y + row * row_height, width - 4, row_height - 3),
+                    estate.name,
+                    lambda estate=estate, offered=offered: self.toggle_trade_estate(
+                        offered, estate
+                    ),
+                    color=(120, 220, 120) if estate in offered else (220, 220, 220),
+                    text_offset=(6, 3),
+                    enabled=not built,
+                    fit=True,
+                )
             )
+        return buttons
 
-        pygame.display.flip()
+    def trade_problem(self):
+        """Returns why the proposal being edited cannot be put to the other player, or None.
+
+        Runtime Complexity:
+            - Worst-case O(E * g + C): Checking the proposal (see trade_engine.is_valid).
+            - Average-case O(E * g + C): Same as worst-case.
+        """
+        proposal = self.trade_proposal
+        if proposal.is_empty():
+            return "Pick estates, cash or jail cards to trade."
+        for player, cash in (
+            (proposal.proposer, proposal.give_cash),
+            (proposal.responder, proposal.take_cash),
+        ):
+            if cash > player.balance:
+                return f"{player.name} only has ${player.balance}."
+        if not is_valid(self, proposal):
+            return "One side no longer holds what it offers."
+        return None
 
-    def handle_select_player_click(self, pos):
-        """Handles player selection during a trade.
+    def select_trade_player(self, player):
+        """Chooses the player to trade with and opens an empty proposal to edit.
 
         Runtime Complexity:
-            - Worst-case O(N): Where N is the number of players.
-            - Average-case O(N): Same as worst-case.
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
         """
-        popup_rect = pygame.Rect(150, 100, 700, 500)
-        button_height = 50
-        button_width = 200
-        button_margin = 10
-        button_y = popup_rect.y + 80
+        self.trade_proposal = TradeProposal(self.players[self.current_player_index], player)
+        self.trade_stage = "edit_offer"
+        self.trade_input = None
+        self.update_board()
 
-        current_player = self.players[self.current_player_index]
-        for player in self.players:
-            if player != current_player:
-                button_rect = pygame.Rect(
-                    popup_rect.x + 250, button_y, button_width, button_height
-                )
-                if button_rect.collidepoint(pos):
-                    self.trade_with_player = player
-                    self.trade_stage = "select_property"
-                    self.update_board()
-                    return
-                button_y += button_height + button_margin
+    def toggle_trade_estate(self, offered, estate):
+        """Adds an estate to one side of the proposal, or takes it off again.
 
-    def handle_select_property_click(self, pos):
-        """Handles property selection during a trade.
+        Runtime Complexity:
+            - Worst-case O(E + P + B): Where E is the number of estates on that side, plus redrawing the board.
+            - Average-case O(E + P + B): Same as worst-case.
+        """
+        if estate in offered:
+            offered.remove(estate)
+        else:
+            offered.append(estate)
+        self.update_board()
+
+    def change_trade_cards(self, field, step):
+        """Offers one more or one fewer Get Out of Jail Free card on one side of the proposal.
 
         Runtime Complexity:
-            - Worst-case O(N): Where N is the number of properties the other player owns.
-            - Average-case O(N): Same as worst-case.
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
         """
-        popup_rect = pygame.Rect(150, 100, 700, 500)
-        button_height = 40
-        button_width = 660
-        button_margin = 10
-        button_y = popup_rect.y + 80
+        setattr(self.trade_proposal, field, max(0, getattr(self.trade_proposal, field) + step))
+        self.update_board()
 
-        for estate in self.trade_with_player.estates:
-            button_rect = pygame.Rect(
-                popup_rect.x + 20, button_y, button_width, button_height
-            )
-            if button_rect.collidepoint(pos):
-                self.trade_property = estate
-                self.trade_stage = "enter_offer"
-                self.input_active = True
-                self.trade_offer = ""  # Reset offer when selecting a new property
-                self.update_board()
-                return
-            button_y += button_height + button_margin
+    def activate_trade_input(self, field):
+        """Gives one of the proposal's cash boxes the keyboard.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        self.trade_input = field
+        self.update_board()
 
-    def handle_enter_offer_click(self, pos):
-        """Processes the offer input during a trade.
+    def submit_trade_offer(self):
+        """Puts the edited proposal to the other player.
 
         Runtime Complexity:
-            - Worst-case O(1): Validates input and updates state.
-            - Average-case O(1): Same as worst-case.
+            - Worst-case O(E * g + C + P + B): Checking the proposal, then redrawing the board.
+            - Average-case O(E * g + C + P + B): Same as worst-case.
         """
-        popup_rect = pygame.Rect(150, 100, 700, 500)
-        input_box = pygame.Rect(popup_rect.x + 250, popup_rect.y + 80, 200, 50)
-        submit_button = pygame.Rect(popup_rect.x + 300, popup_rect.y + 150, 100, 40)
+        if self.trade_problem() is not None:
+            return
+        self.trade_stage = "confirm_trade"
+        self.trade_input = None
+        self.update_board()
 
-        player = self.players[self.current_player_index]
-        is_valid_offer = (
-            self.trade_offer.isdigit()
-            and int(self.trade_offer) <= player.balance
-            and int(self.trade_offer) > 0
-        )
+    def accept_trade(self):
+        """Executes the offered trade once the other player accepts it.
 
-        if input_box.collidepoint(pos):
-            self.input_active = True
-        elif is_valid_offer and submit_button.collidepoint(pos):
-            self.trade_stage = "confirm_trade"
-            self.input_active = False
-            self.update_board()
+        Runtime Complexity:
+            - Worst-case O(E * n + C): Where E is the number of estates traded and n the number the players own.
+            - Average-case O(E * n + C): Same as worst-case.
+        """
+        proposal = self.trade_proposal
+        if execute_trade(self, proposal):
+            print(f"Trade: {proposal}")
         else:
-            print("Invalid offer amount.")
+            print(f"{proposal.proposer.name} cannot complete the trade.")
+        self.close_trade()
 
-    def handle_confirm_trade_click(self, pos):
-        """Handles the confirmation or rejection of a trade offer.
+    def decline_trade(self):
+        """Closes the trade after the other player declines it.
 
         Runtime Complexity:
-            - Worst-case O(1): Updates player properties and balances.
-            - Average-case O(1): Same as worst-case.
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
         """
-        popup_rect = pygame.Rect(150, 100, 700, 500)
-        accept_button = pygame.Rect(popup_rect.x + 200, popup_rect.y + 150, 100, 40)
-        decline_button = pygame.Rect(popup_rect.x + 400, popup_rect.y + 150, 100, 40)
-
-        if accept_button.collidepoint(pos):
-            offer_amount = int(self.trade_offer)
-            buyer = self.players[self.current_player_index]
-            seller = self.trade_with_player
-
-            if buyer.balance >= offer_amount:
-                buyer.update_balance(-offer_amount)
-                seller.update_balance(offer_amount)
-                seller.estates.remove(self.trade_property)
-                buyer.estates.append(self.trade_property)
-                self.trade_property.owner = buyer
-                print(
-                    f"{seller.name} sold {self.trade_property.name} to {buyer.name} for ${offer_amount}"
-                )
-            else:
-                print(f"{buyer.name} does not have enough money.")
-            self.trade_popup_active = False
-            self.update_board()
+        print(f"{self.trade_proposal.responder.name} declined the trade.")
+        self.close_trade()
 
-        elif decline_button.collidepoint(pos):
-            print(f"{self.trade_with_player.name} declined the trade.")
-            self.trade_popup_active = False
-            self.update_board()
+    def cancel_trade(self):
+        """Closes the trade popup without proposing anything.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        self.close_trade()
+
+    def close_trade(self):
+        """Closes the trade popup and drops the proposal.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        self.trade_popup_active = False
+        self.trade_stage = None
+        self.trade_proposal = None
+        self.trade_input = None
+        self.update_board()
 
+    @timed("event_keydown")
     def handle_keydown(self, event):
         """Handles keydown events during inputs.
 
@@ -919,25 +1275,37 @@ class Game:
             - Worst-case O(1): Processes a single key event.
             - Average-case O(1): Same as worst-case.
         """
-        if (
+        if event.key == pygame.K_F3:
+            self.hud.toggle()
+        elif self.auction is not None and self.auction.mode == SEALED:
+            if event.key == pygame.K_RETURN:
+                self.submit_sealed_bid()
+                if self.auction.finished():
+                    self.finish_auction()
+                    return
+            elif event.key == pygame.K_BACKSPACE:
+                self.auction_input = self.auction_input[:-1]
+            elif event.unicode.isdigit():
+                self.auction_input += event.unicode
+            self.update_board()
+        elif (
             self.trade_popup_active
-            and self.trade_stage == "enter_offer"
-            and self.input_active
+            and self.trade_stage == "edit_offer"
+            and self.trade_input is not None
         ):
+            proposal = self.trade_proposal
+            cash = getattr(proposal, self.trade_input)
             if event.key == pygame.K_RETURN:
-                if self.trade_offer.isdigit() and int(self.trade_offer) > 0:
-                    self.trade_stage = "confirm_trade"
-                    self.input_active = False
-                    self.update_board()
-                else:
-                    print("Invalid offer amount.")
+                self.submit_trade_offer()
+            elif event.key == pygame.K_TAB:
+                self.trade_input = "take_cash" if self.trade_input == "give_cash" else "give_cash"
+                self.update_board()
             elif event.key == pygame.K_BACKSPACE:
-                self.trade_offer = self.trade_offer[:-1]
+                setattr(proposal, self.trade_input, cash // 10)
+                self.update_board()
+            elif event.unicode.isdigit() and cash < MAX_TRADE_CASH // 10:
+                setattr(proposal, self.trade_input, cash * 10 + int(event.unicode))
                 self.update_board()
-            else:
-                if event.unicode.isdigit():
-                    self.trade_offer += event.unicode
-                    self.update_board()
         else:
             # ...handle other key events...
             pass
@@ -959,46 +1327,79 @@ class Game:
     def calculate_mortgage_efficiency(self, player):
         """Calculates the efficiency score for mortgaging each property.
 
+        The score is the number of rounds of expected rent the mortgage money covers:
+        the mortgage value over the rent the property is expected to earn from all
+        opponents in one round, at its current level. The higher the score, the
+        cheaper the mortgage.
+
         Runtime Complexity:
             - Worst-case O(nlogn): Where n is the number of properties the player owns.
             - Average-case O(nlogn): Same as worst-case.
         """
+        income = expected_rent_per_opponent_turn(self.board, self.rules)
+        opponents = max(1, len(self.players) - 1)
+        owned = {}
+        for estate in player.estates:
+            owned[estate.group] = owned.get(estate.group, 0) + 1
 
         properties = []
         for estate in player.estates:
             if not estate.mortgaged:
-                future_income_lost = estate.get_current_rent(self)  # Pass game instance
+                level = income_level(estate, owned[estate.group])
+                income_lost = income[estate.index, level] * opponents
                 mortgage_value = estate.price // 2
                 efficiency_score = (
-                    mortgage_value / future_income_lost
-                    if future_income_lost != 0
-                    else 0
+                    mortgage_value / income_lost if income_lost > 0 else float("inf")
                 )
                 properties.append((estate, efficiency_score))
         sorted_properties = quick_sorts(properties, key=lambda x: x[1], reverse=True)
         return sorted_properties
 
     def display_mortgage_popup(self, player):
-        """Displays a popup with mortgage recommendations.
+        """Opens the popup with mortgage recommendations for a player.
 
         Runtime Complexity:
-            - Worst-case O(NlogN + M): Calls calculate_mortgage_efficiency method with a worst-case complexity of O(NlogN) and M is the number of properties that are mortgaged.
+            - Worst-case O(NlogN + M): Laying out the popup, see mortgage_widgets.
             - Average-case O(NlogN + M): Same as worst-case.
         """
         self.mortgage_popup_active = True
         self.mortgage_popup_player = player
+        self.update_board()
 
-        # Increased popup size for better display
-        popup_rect = pygame.Rect(100, 100, 600, 500)
-        pygame.draw.rect(self.screen, (255, 255, 255), popup_rect)
-        pygame.draw.rect(self.screen, (0, 0, 0), popup_rect, 2)
+    def mortgage_key(self):
+        """Returns the state the mortgage popup is laid out from, or None while it is closed.
 
-        title_text = self.font.render(
-            "Mortgage Property Recommendations", True, (0, 0, 0)
+        Runtime Complexity:
+            - Worst-case O(N): Where N is the number of properties of the player.
+            - Average-case O(N): Same as worst-case.
+        """
+        if not self.mortgage_popup_active:
+            return None
+        player = self.mortgage_popup_player
+        return (
+            player,
+            len(self.players),
+            tuple(
+                (estate, estate.mortgaged, estate.houses, estate.hotel)
+                for estate in player.estates
+            ),
         )
-        self.screen.blit(title_text, (popup_rect.x + 20, popup_rect.y + 20))
 
-        properties = self.calculate_mortgage_efficiency(player)
+    def mortgage_widgets(self):
+        """Lays out the mortgage popup: recommended properties to mortgage, then the mortgaged ones.
+
+        Runtime Complexity:
+            - Worst-case O(NlogN + M): Calls calculate_mortgage_efficiency method with a worst-case complexity of O(NlogN) and M is the number of properties that are mortgaged.
+            - Average-case O(NlogN + M): Same as worst-case.
+        """
+        player = self.mortgage_popup_player
+        # Increased popup size for better display
+        popup_rect = pygame.Rect(100, 100, 600, 500)
+        widgets = [
+            Backdrop(self.close_mortgage_popup),  # Clicking outside the popup closes it
+            Panel(popup_rect),
+            Label((popup_rect.x + 20, popup_rect.y + 20), "Mortgage Property Recommendations"),
+        ]
 
         # Display recommended properties to mortgage
         button_height = 40
@@ -1006,16 +1407,15 @@ class Game:
         button_margin = 10
         button_y = popup_rect.y + 80
 
-        for estate, score in properties:
-            button_rect = pygame.Rect(
-                popup_rect.x + 20, button_y, button_width, button_height
-            )
-            pygame.draw.rect(self.screen, (200, 200, 200), button_rect)
-            pygame.draw.rect(self.screen, (0, 0, 0), button_rect, 2)
-            estate_text = self.font.render(
-                f"{estate.name} - Efficiency Score: {score:.2f}", True, (0, 0, 0)
+        for estate, score in self.calculate_mortgage_efficiency(player):
+            rounds = "no rent lost" if score == float("inf") else f"{score:.0f} rounds of rent"
+            widgets.append(
+                Button(
+                    (popup_rect.x + 20, button_y, button_width, button_height),
+                    f"{estate.name} - ${estate.price // 2} = {rounds}",
+                    lambda estate=estate: self.choose_mortgage(estate, True),
+                )
             )
-            self.screen.blit(estate_text, (button_rect.x + 10, button_rect.y + 10))
             button_y += button_height + button_margin
 
         # Display mortgaged properties separately
@@ -1023,35 +1423,243 @@ class Game:
 
         if mortgaged_properties:
             button_y += button_margin  # Add space before mortgaged properties
-            mortgaged_text = self.font.render("Mortgaged Properties", True, (0, 0, 0))
-            self.screen.blit(mortgaged_text, (popup_rect.x + 20, button_y))
+            widgets.append(Label((popup_rect.x + 20, button_y), "Mortgaged Properties"))
             button_y += button_height
 
             for estate in mortgaged_properties:
-                button_rect = pygame.Rect(
-                    popup_rect.x + 20, button_y, button_width, button_height
+                widgets.append(
+                    Button(
+                        (popup_rect.x + 20, button_y, button_width, button_height),
+                        estate.name,
+                        lambda estate=estate: self.choose_mortgage(estate, False),
+                    )
                 )
-                pygame.draw.rect(self.screen, (200, 200, 200), button_rect)
-                pygame.draw.rect(self.screen, (0, 0, 0), button_rect, 2)
-                estate_text = self.font.render(estate.name, True, (0, 0, 0))
-                self.screen.blit(estate_text, (button_rect.x + 10, button_rect.y + 10))
                 button_y += button_height + button_margin
+        return widgets
 
-        pygame.display.flip()
+    def choose_mortgage(self, estate, mortgage):
+        """Mortgages or unmortgages the estate chosen in the mortgage popup and closes it.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        if mortgage:
+            self.mortgage_property(self.mortgage_popup_player, estate)
+        else:
+            self.unmortgage_property(self.mortgage_popup_player, estate)
+        self.close_mortgage_popup()
+
+    def close_mortgage_popup(self):
+        """Closes the mortgage popup.
+
+        Runtime Complexity:
+            - Worst-case O(P + B + E): Redrawing the board.
+            - Average-case O(P + B + E): Same as worst-case.
+        """
+        self.mortgage_popup_active = False
+        self.update_board()
+
+    def start_auction(self, estate):
+        """Starts an auction of an estate between all players, beginning with the current player.
+
+        Runtime Complexity:
+            - Worst-case O(P): Where P is the number of players.
+            - Average-case O(P): Same as worst-case.
+        """
+        start = self.current_player_index
+        bidders = self.players[start:] + self.players[:start]
+        self.auction = Auction(estate, bidders, self.auction_mode)
+        self.auction_input = ""
+        print(f"{estate.name} goes to auction")
+        self.update_board()
+
+    def finish_auction(self):
+        """Hands the auctioned estate to the winner and ends the turn.
+
+        Runtime Complexity:
+            - Worst-case O(n * g): Calls buy_estate for the winner.
+            - Average-case O(n * g): Same as worst-case.
+        """
+        auction = self.auction
+        self.auction = None
+        winner, price = auction.result()
+        if winner is not None and self.buy_estate(winner, auction.estate, price):
+            self.display_message(
+                f"{winner.name} won {auction.estate.name} at auction for ${price}"
+            )
+        else:
+            self.display_message(f"Nobody bought {auction.estate.name}")
+        if self.dice_rolled:
+            self.end_turn()
+        else:
+            # The player rolled doubles and still has to roll again
+            self.update_buttons()
+            self.update_board()
+
+    def auction_key(self):
+        """Returns the state the auction popup is laid out from, or None without an auction.
+
+        Runtime Complexity:
+            - Worst-case O(1): A fixed number of fields.
+            - Average-case O(1): Same as worst-case.
+        """
+        auction = self.auction
+        if auction is None:
+            return None
+        bidder = auction.current_bidder()
+        return (
+            auction,
+            auction.high_bid,
+            auction.high_bidder,
+            bidder,
+            bidder.balance,
+            len(auction.bidders),
+            len(auction.sealed_bids),
+            len(self.auction_input),
+        )
+
+    def auction_widgets(self):
+        """Lays out the auction popup for the current bidder.
+
+        Runtime Complexity:
+            - Worst-case O(1): A fixed number of lines and buttons.
+            - Average-case O(1): Same as worst-case.
+        """
+        auction = self.auction
+        bidder = auction.current_bidder()
+        popup_rect = pygame.Rect(150, 100, 700, 500)
+        # The auction takes every click until it finishes
+        widgets = [Backdrop(), Panel(popup_rect)]
+
+        lines = [f"Auction: {auction.estate.name} (list price ${auction.estate.price})"]
+        if auction.mode == SEALED:
+            lines.append(f"Sealed bids: {len(auction.sealed_bids)} of {len(auction.bidders)}")
+            lines.append(f"{bidder.name}, enter your bid (0 to pass)")
+        else:
+            if auction.high_bidder is not None:
+                lines.append(f"Highest bid: ${auction.high_bid} by {auction.high_bidder.name}")
+            else:
+                lines.append("No bids yet")
+            lines.append(f"{bidder.name} to bid")
+        lines.append(f"Cash: ${bidder.balance}")
+        for i, line in enumerate(lines):
+            widgets.append(Label((popup_rect.x + 20, popup_rect.y + 20 + i * 40), line))
+
+        button_y = popup_rect.y + 260
+        if auction.mode == SEALED:
+            # Bids are masked so the other players cannot read them off the screen
+            input_box = pygame.Rect(popup_rect.x + 250, popup_rect.y + 190, 200, 50)
+            widgets.append(Panel(input_box))
+            widgets.append(
+                Label((input_box.x + 10, input_box.y + 10), "*" * len(self.auction_input))
+            )
+            widgets.append(
+                Button(
+                    (popup_rect.x + 300, button_y, 100, 40),
+                    "Submit",
+                    lambda: self.auction_action(None),
+                    text_offset=(10, 8),
+                )
+            )
+            return widgets
+        for i, increment in enumerate(BID_INCREMENTS):
+            amount = (
+                auction.high_bid + increment
+                if auction.high_bidder is not None
+                else max(increment, auction.minimum_bid)
+            )
+            widgets.append(
+                Button(
+                    (popup_rect.x + 40 + i * 160, button_y, 140, 40),
+                    f"Bid ${amount}",
+                    lambda amount=amount: self.auction_action(amount),
+                    text_offset=(10, 8),
+                    enabled=amount <= bidder.balance,
+                )
+            )
+        widgets.append(
+            Button(
+                (popup_rect.x + 520, button_y, 140, 40),
+                "Pass",
+                lambda: self.auction_action(None),
+                text_offset=(10, 8),
+            )
+        )
+        return widgets
+
+    def auction_action(self, amount):
+        """Places a bid, passes or submits a sealed bid for the current bidder, as clicked in the auction popup.
+
+        Runtime Complexity:
+            - Worst-case O(P): Passing removes the bidder from the active list.
+            - Average-case O(1): Most clicks place a bid.
+        """
+        if self.auction.mode == SEALED:
+            self.submit_sealed_bid()
+        elif amount is None:
+            self.auction.pass_turn()
+        elif not self.auction.bid(amount):
+            print("Invalid bid.")
+        self.continue_auction()
+
+    def continue_auction(self):
+        """Finishes the auction once every bidder is done, otherwise redraws it for the next bidder.
+
+        Runtime Complexity:
+            - Worst-case O(n * g): Calls finish_auction when the auction is over.
+            - Average-case O(P + B + E): Redrawing the board.
+        """
+        if self.auction.finished():
+            self.finish_auction()
+        else:
+            self.update_board()
+
+    def submit_sealed_bid(self):
+        """Submits the typed sealed bid of the current bidder.
+
+        Runtime Complexity:
+            - Worst-case O(1): Records one bid.
+            - Average-case O(1): Same as worst-case.
+        """
+        amount = int(self.auction_input) if self.auction_input else 0
+        if not self.auction.submit_sealed(amount):
+            print("Invalid bid.")
+        self.auction_input = ""
 
     def end_turn(self):
         """Ends the current player's turn and advances to the next player.
 
         Runtime Complexity:
-            - Worst-case O(N + M): 
+            - Worst-case O(N + M): Updating the buttons and redrawing the board.
             - Average-case O(N + M): Same as worst-case.
         """
+        estate = self.declined_estate
+        self.declined_estate = None
+        if estate is not None and estate.owner is None and len(self.players) > 1:
+            # The property was not bought, so it goes to auction before the turn ends
+            self.start_auction(estate)
+            return
         print(f"Turn ended for {self.players[self.current_player_index].name}")
         self.current_player_index = (self.current_player_index + 1) % len(self.players)
         self.dice_rolled = False
+        self.turn.start_turn(self.players[self.current_player_index])
+        if self.autosaver is not None:
+            self.autosaver.maybe_save(self)  # Between turns the state is consistent
+        self.record_turn()
         self.update_buttons()
         self.update_board()
 
+    def record_turn(self):
+        """Writes the state after a turn to the replay recording, if the game is recorded.
+
+        Runtime Complexity:
+            - Worst-case O(P + N): Building and recording the public view.
+            - Average-case O(P + N): Same as worst-case.
+        """
+        if self.recorder is not None:
+            self.recorder.record(public_view(self))
+
     def update_buttons(self):
         """Updates the state (enabled/disabled) of action buttons based on game conditions.
 
@@ -1059,6 +1667,10 @@ class Game:
             - Worst-case O(G): Where G is the number of properties in a group (for ownership checks).
             - Average-case O(G): Same as worst-case.
         """
+        if self.winner is not None:
+            for button in self.buttons:
+                button["enabled"] = False  # The game is over
+            return
         player = self.players[self.current_player_index]
         current_estate = self.estates[player.position]
         self.buttons[0][
@@ -1072,20 +1684,32 @@ class Game:
             and not current_estate.hotel
             and all(
                 estate.owner == player
-                for estate in self.estates
-                if estate.group == current_estate.group
+                for estate in self.group_estates[current_estate.group]
             )
         )  # Enable "Build House" button if player owns the property, it doesn't have a hotel, and player owns all properties in the group
         self.buttons[3]["enabled"] = bool(
             player.estates
         )  # Enable "Mortgage" button only if player has properties
-        self.buttons[4]["enabled"] = any(
-            p.estates for p in self.players if p != player
+        self.buttons[4]["enabled"] = (
+            self.players_with_estates - (1 if player.estates else 0) > 0
         )  # Enable "Trade" button only if another player owns a property
         self.buttons[5][
             "enabled"
         ] = self.dice_rolled  # Enable "End Turn" button only if dice rolled
 
+    def button_widgets(self):
+        """Lays out the action buttons with their current enabled state.
+
+        Runtime Complexity:
+            - Worst-case O(N): Where N is the number of buttons.
+            - Average-case O(N): Same as worst-case.
+        """
+        return [
+            ActionButton(button["rect"], button["label"], button["action"], button["enabled"])
+            for button in self.buttons
+        ]
+
+    @timed("draw_buttons")
     def draw_buttons(self):
         """Renders interactive buttons on the game interface.
 
@@ -1093,27 +1717,10 @@ class Game:
             - Worst-case O(N): Where N is the number of buttons.
             - Average-case O(N): Same as worst-case.
         """
-        for button in self.buttons:
-            color = (0, 0, 0) if button["enabled"] else (128, 128, 128)
-            pygame.draw.rect(self.screen, color, button["rect"])
-            text = self.font.render(button["label"], True, (255, 255, 255))
-
-            # Scale text to fit within the button if necessary
-            text_rect = text.get_rect()
-            if text_rect.width > button["rect"].width - 20:  # Add some padding
-                scale_factor = (button["rect"].width - 20) / text_rect.width
-                text = pygame.transform.scale(
-                    text,
-                    (
-                        int(text_rect.width * scale_factor),
-                        int(text_rect.height * scale_factor),
-                    ),
-                )
-                text_rect = text.get_rect()
-
-            text_rect.center = button["rect"].center
-            self.screen.blit(text, text_rect)
+        # Labels are rendered and scaled to fit the button once, then cached
+        self.ui.draw(self, "buttons")
 
+    @timed("draw_tokens")
     def draw_tokens(self):
         """Draws player tokens and property indicators on the game board.
 
@@ -1121,23 +1728,15 @@ class Game:
             - Worst-case O(P + E): Where P is the number of players and E is the number of estates with houses/hotels.
             - Average-case O(P + E): Same as worst-case.
         """
-        color_offsets = {
-            "red": (0, 0),
-            "blue": (10, 0),
-            "green": (0, 10),
-            "yellow": (10, 10),
-        }
-
-        for player in self.players:
-            token_color = pygame.Color(player.color)
-            token_position = self.estates[player.position].position
-            offset = color_offsets.get(player.color, (0, 0))
+        for index, player in enumerate(self.players):
+            token_position = self.animator.center(player, player.position)
+            # Tokens fan out in a 2-wide grid so players sharing a square stay visible
             adjusted_position = (
-                token_position[0] + offset[0],
-                token_position[1] + offset[1],
+                token_position[0] + (index % 2) * 10,
+                token_position[1] + (index // 2 % 4) * 10,
             )
             pygame.draw.circle(
-                self.screen, token_color, adjusted_position, 20
+                self.screen, pygame.Color(player.color), adjusted_position, 20
             )  # Increased radius to 20
 
         for estate in self.estates:
@@ -1171,6 +1770,7 @@ class Game:
                     )
                     pygame.draw.rect(self.screen, (0, 255, 0), house_rect)
 
+    @timed("update_board")
     def update_board(self):
         """Updates the game board visuals, including tokens and player info.
 
@@ -1178,17 +1778,20 @@ class Game:
             - Worst-case O(P + B + E): Combines complexities of drawing tokens, buttons, and other elements.
             - Average-case O(P + B + E): Same as worst-case.
         """
-        self.screen.blit(self.background, (0, 0))
+        draw_start = perf_counter_ns()
+        self.blit(self.background, (0, 0))
         self.draw_buttons()
         self.draw_tokens()
         self.draw_player_info()
-        if self.trade_popup_active:
-            self.display_trade_menu()
-        elif hasattr(self, "current_card") and self.current_card:
-            self.display_card(self.current_card)
-        elif hasattr(self, "mortgage_popup_active") and self.mortgage_popup_active:
-            self.display_mortgage_popup(self.mortgage_popup_player)
+        for layer in POPUP_LAYERS:
+            self.ui.draw(self, layer)  # Popups are retained; a closed one has no widgets
+        self.frame_stats.draw_ns += perf_counter_ns() - draw_start
+        self.hud.draw(self.screen)
         pygame.display.flip()
+        if self.spectators is not None:
+            self.spectators.publish(self)  # Coalesced to one update per frame interval
+        if self.api is not None:
+            self.api.publish(self)
 
     def draw_setup_screen(self):
         """Displays the setup screen for initializing the game.
@@ -1198,17 +1801,21 @@ class Game:
             - Average-case O(1): Same as worst-case.
         """
         self.screen.fill((255, 255, 255))
-        if self.current_setup_step == 0:
+        if self.current_setup_step < 0:
+            names = ", ".join(player["name"] for player in self.saved_state["players"])
+            prompt = f"Resume the saved game of {names}? (Y/N)"
+        elif self.current_setup_step == 0:
             prompt = "Enter the number of players:"
         else:
             prompt = f"Enter the name for player {self.current_setup_step}:"
         text_surface = self.font.render(prompt, True, (0, 0, 0))
-        self.screen.blit(text_surface, (250, 250))
+        self.blit(text_surface, (250, 250))
         input_surface = self.font.render(self.input_text, True, (0, 0, 0))
-        self.screen.blit(input_surface, (self.input_box.x + 10, self.input_box.y + 10))
+        self.blit(input_surface, (self.input_box.x + 10, self.input_box.y + 10))
         pygame.draw.rect(self.screen, (0, 0, 0), self.input_box, 2)
         pygame.display.flip()
 
+    @timed("event_setup")
     def handle_setup_event(self, event):
         """Handles events during the game setup phase.
 
@@ -1216,27 +1823,50 @@ class Game:
             - Worst-case O(1): Processes a single event.
             - Average-case O(1): Same as worst-case.
         """
-        if event.type == pygame.KEYDOWN:
+        if event.type == pygame.KEYDOWN and self.current_setup_step < 0:
+            if event.key == pygame.K_y:
+                self.resume_saved_game()
+            elif event.key == pygame.K_n:
+                self.current_setup_step = 0
+        elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN:
                 if self.current_setup_step == 0:
                     self.num_players = int(self.input_text)
                     self.current_setup_step += 1
                 else:
                     player_name = self.input_text
-                    player_color = self.token_colors[
-                        self.current_color_index % len(self.token_colors)
-                    ]
-                    self.players.append(Player(player_name, player_color))
+                    player_color = token_color(self.token_colors, self.current_color_index)
+                    self.players.append(
+                        Player(player_name, player_color, self.rules.starting_balance)
+                    )
                     self.current_color_index += 1
                     self.current_setup_step += 1
                     if self.current_setup_step > self.num_players:
                         self.setup_phase = False
+                        self.record_turn()  # The start of the game
                 self.input_text = ""
             elif event.key == pygame.K_BACKSPACE:
                 self.input_text = self.input_text[:-1]
             else:
                 self.input_text += event.unicode
 
+    def resume_saved_game(self):
+        """Restores the saved game found at startup, or starts a new setup if it cannot be restored.
+
+        Runtime Complexity:
+            - Worst-case O(P + N + C): Restoring the players, estates and cards.
+            - Average-case O(P + N + C): Same as worst-case.
+        """
+        try:
+            restore(self, self.saved_state)
+        except (ValueError, KeyError, IndexError, TypeError) as error:
+            print(f"Could not resume the saved game: {error}")
+            self.current_setup_step = 0
+            return
+        print(f"Resumed the saved game, {self.players[self.current_player_index].name} to play")
+        self.saved_state = None
+        self.record_turn()
+
     def start_game(self):
         """Starts the game loop, handling setups and main gameplay.
 
@@ -1244,62 +1874,256 @@ class Game:
             - Worst-case O(N): Where N is the number of game ticks/events processed.
             - Average-case O(N): Depends on user interaction and game duration.
         """
+        stats = self.frame_stats
         while self.running:
+            stats.begin_frame()
             if self.setup_phase:
+                draw_start = perf_counter_ns()
                 self.draw_setup_screen()
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        self.running = False
-                    elif event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
-                        self.handle_setup_event(event)
+                stats.draw_ns += perf_counter_ns() - draw_start
             else:
                 self.update_board()
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        self.running = False
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        self.handle_click(event.pos)
-                    elif event.type == pygame.KEYDOWN:
-                        self.handle_keydown(event)
-
+            # Redraws triggered by an event count as drawing, not event handling
+            event_start = perf_counter_ns()
+            draw_before_events = stats.draw_ns
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif self.setup_phase:
+                    if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+                        self.handle_setup_event(event)
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.handle_click(event.pos)
+                elif event.type == pygame.KEYDOWN:
+                    self.handle_keydown(event)
+            if self.api is not None:
+                self.api.run_pending(self)  # Actions posted to the API count as events
+            stats.event_ns += (perf_counter_ns() - event_start) - (
+                stats.draw_ns - draw_before_events
+            )
+            stats.end_frame()
+            if self.profiler is not None:
+                self.profiler.record("frame", perf_counter_ns() - stats.frame_start)
+
+        if self.autosaver is not None:
+            self.autosaver.close()
+        if self.spectators is not None:
+            self.spectators.close()
+        if self.api is not None:
+            self.api.close()
+        if self.recorder is not None:
+            self.recorder.close()
         pygame.quit()
 
+    @timed("card_effect")
     def apply_effect(self, player, card):
         """Applies the effect of a drawn card to the player.
 
         Runtime Complexity:
-            - Worst-case O(N): May involve moving the player or modifying properties. Where N is the number of estates to search through.
+            - Worst-case O(N): May involve moving the player or modifying properties. Where N is the number of steps moved.
             - Average-case O(1): Most effects are simple state changes.
         """
         print(f"Applying effect of card: {card.description}")
         if card.is_get_out_of_jail:
-            player.community_chest_cards.append(card)
+            player.community_chest_cards.append(card)  # Returned to its deck when used
             print(f"{player.name} got a Get Out of Jail Free card")
-        if card.move_to:
-            match card.move_to:
-                case "nearest Utility":
-                    self.move_to_nearest_utility(player)
-                case "nearest Railroad":
-                    self.move_to_nearest_railroad(player)
-                case "Jail":
-                    self.go_to_jail(player)
-                case "Go":
-                    self.move_player_to(player, 0)
-                case "Bond Street":
-                    self.move_player_to(player, 11)
-                case "Illinois Avenue":
-                    self.move_player_to(player, 24)
-                case "Vine Street":
-                    self.move_player_to(player, 39)
-                case "Kings Cross Station":
-                    self.move_player_to(player, 5)
-                case _:
-                    self.move_player_to(player, card.move_to)
-        if card.value:
-            player.update_balance(card.value * card.multiplier)
+        else:
+            self.return_card(card)
+        # Square targets are resolved to positions when the board is compiled
+        self.card_effects[card.opcode](player, card)
+        if player not in self.players:
+            return  # Went bankrupt on the square the card moved them to
+        if card.value > 0:
+            self.bank_transfer(player, card.value * card.multiplier)
             print(f"{player.name} received ${card.value}")
+        elif card.value < 0:
+            if self.charge(player, -card.value * card.multiplier):
+                print(f"{player.name} paid ${-card.value}")
+
+
+class GameFork(Game):
+    """A game without any presentation: nothing is drawn, displayed or waited for.
+
+    Game.fork returns one, and headless runners such as the fuzzer subclass it.
+    """
+
+    def update_board(self):
+        """Draws nothing.
+
+        Runtime Complexity:
+            - Worst-case O(1): Nothing to draw.
+            - Average-case O(1): Same as worst-case.
+        """
+
+    def display_message(self, message):
+        """Shows nothing and does not wait.
+
+        Runtime Complexity:
+            - Worst-case O(1): Nothing to show.
+            - Average-case O(1): Same as worst-case.
+        """
+
+    def display_card(self, card):
+        """Shows nothing and does not wait.
+
+        Runtime Complexity:
+            - Worst-case O(1): Nothing to show.
+            - Average-case O(1): Same as worst-case.
+        """
+
+    def show_dice(self, die1, die2):
+        """Shows nothing and does not wait.
+
+        Runtime Complexity:
+            - Worst-case O(1): Nothing to show.
+            - Average-case O(1): Same as worst-case.
+        """
+
+    def animate_move(self, player, start, steps, direction=1):
+        """Moves are not animated.
+
+        Runtime Complexity:
+            - Worst-case O(1): Nothing to animate.
+            - Average-case O(1): Same as worst-case.
+        """
+
+
+def parse_args(argv=None):
+    """Parses the command line options of the game.
+
+    Runtime Complexity:
+        - Worst-case O(A): Where A is the number of arguments.
+        - Average-case O(A): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Monopoly")
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="record per-phase latency histograms and write them to PATH as JSON on exit",
+    )
+    parser.add_argument(
+        "--board",
+        metavar="PATH",
+        help="board data file to play on (default: the classic board)",
+    )
+    parser.add_argument(
+        "--auction",
+        choices=AUCTION_MODES,
+        default=ASCENDING,
+        help="how properties that are not bought are auctioned (default: ascending)",
+    )
+    parser.add_argument(
+        "--rules",
+        metavar="PATH",
+        help="JSON file of house rule overrides, e.g. {\"go_salary\": 400}",
+    )
+    parser.add_argument(
+        "--hud",
+        action="store_true",
+        help="start with the performance overlay visible (toggle with F3)",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run the array-based large-table engine without a window and print a summary",
+    )
+    parser.add_argument(
+        "--players", type=int, default=4, help="number of players in headless mode"
+    )
+    parser.add_argument(
+        "--board-squares",
+        type=int,
+        help="play headless on a generated board with this many squares",
+    )
+    parser.add_argument(
+        "--turns", type=int, default=100000, help="number of turns in headless mode"
+    )
+    parser.add_argument(
+        "--seed", type=int, help="seed the dice and card shuffles to replay a game"
+    )
+    parser.add_argument(
+        "--autosave",
+        metavar="PATH",
+        default=DEFAULT_SAVE_PATH,
+        help=f"file the game is autosaved to between turns (default: {DEFAULT_SAVE_PATH})",
+    )
+    parser.add_argument(
+        "--autosave-interval",
+        type=float,
+        default=AUTOSAVE_INTERVAL,
+        help=f"minimum seconds between autosaves (default: {AUTOSAVE_INTERVAL})",
+    )
+    parser.add_argument(
+        "--no-autosave", action="store_true", help="do not autosave or offer to resume"
+    )
+    parser.add_argument(
+        "--spectate",
+        type=int,
+        nargs="?",
+        const=SPECTATOR_PORT,
+        metavar="PORT",
+        help=f"stream the game to read-only spectators on PORT (default: {SPECTATOR_PORT})",
+    )
+    parser.add_argument(
+        "--spectate-host",
+        default="127.0.0.1",
+        help="interface spectators connect on; 0.0.0.0 for all (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--api",
+        type=int,
+        nargs="?",
+        const=API_PORT,
+        metavar="PORT",
+        help=f"serve the HTTP/JSON control API on localhost:PORT (default: {API_PORT})",
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="record the game turn by turn for replay to PATH"
+    )
+    parser.add_argument(
+        "--replay", metavar="PATH", help="review a game recorded with --record turn by turn"
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.start_game()
+    args = parse_args()
+    rules = load_rules(args.rules) if args.rules else None
+    if args.headless:
+        summary = run_headless(
+            args.players,
+            board_squares=args.board_squares,
+            board_path=args.board,
+            turns=args.turns,
+            seed=args.seed,
+            rules=rules,
+        )
+        print(json.dumps(summary, indent=2))
+        sys.exit(0)
+    profiler = Profiler() if args.profile else None
+    board = load_board(args.board) if args.board else None
+    if args.replay:
+        ReplayViewer(Replay(args.replay), Game(board=board)).run()
+        sys.exit(0)
+    game = Game(
+        profiler=profiler,
+        show_hud=args.hud,
+        board=board,
+        auction_mode=args.auction,
+        rules=rules,
+        seed=args.seed,
+        autosave_path=None if args.no_autosave else args.autosave,
+        autosave_interval=args.autosave_interval,
+        spectators=(
+            SpectatorHub(args.spectate_host, args.spectate)
+            if args.spectate is not None
+            else None
+        ),
+        api=ControlServer(port=args.api) if args.api is not None else None,
+        recorder=ReplayRecorder(args.record, board or load_board()) if args.record else None,
+    )
+    try:
+        game.start_game()
+    finally:
+        if profiler is not None:
+            profiler.dump(args.profile)
@@ -8,6 +8,17 @@ class Player:
     Player class to manage player information and actions
     """
 
+    __slots__ = (
+        "name",
+        "color",
+        "balance",
+        "position",
+        "estates",
+        "in_jail",
+        "jail_turns",
+        "community_chest_cards",
+    )
+
     def __init__(self, name, color, initial_balance=1500):
         """
         Initializes a new player with the given name, color, and initial balance.
@@ -24,6 +35,21 @@ class Player:
         self.jail_turns = 0
         self.community_chest_cards = []  # List to store picked-up Community Chest cards
 
+    def fork(self):
+        """
+        Returns a copy of the player for a forked game, holding the same cards.
+        Their estates list is left empty for the fork to fill with its copies.
+
+        O(C): where C is the number of cards the player holds
+        """
+        twin = type(self).__new__(type(self))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                setattr(twin, name, getattr(self, name))
+        twin.estates = []
+        twin.community_chest_cards = list(self.community_chest_cards)
+        return twin
+
     def update_balance(self, amount):
         """
         Updates the player's balance by adding the specified amount.
@@ -52,15 +78,15 @@ class Player:
         O(n): where n is the number of estates owned by the player
         """
 
-        # Get the index of the estate in the game's estate list
-        estate_index = game.estates.index(estate)
+        # Get the index of the estate on the game board
+        estate_index = estate.index
 
         # Append the estate to the player's estates list
         self.estates.append(estate)
 
         # Use insertion sort to keep the list ordered by the estate index
         i = len(self.estates) - 1
-        while i > 0 and game.estates.index(self.estates[i - 1]) > estate_index:
+        while i > 0 and self.estates[i - 1].index > estate_index:
             self.estates[i] = self.estates[i - 1]
             i -= 1
         self.estates[i] = estate  # Place the new estate in its correct position
@@ -0,0 +1,289 @@
+"""
+Profiling module
+
+Optional per-phase instrumentation for the game. Each phase (roll, move,
+landing resolution, card effects, rendering, event handling) records its
+latency into a log-linear histogram so count, total time and percentiles can
+be reported without keeping every sample.
+"""
+
+import functools
+import json
+from collections import deque
+from time import perf_counter_ns
+
+
+# Number of sub-bucket bits per power of two (16 sub-buckets, ~6% relative error)
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+# Values below this limit get an exact bucket each
+LINEAR_LIMIT = SUB_BUCKET_COUNT << 1
+# Enough buckets to cover any 64-bit nanosecond value
+BUCKET_COUNT = (64 << SUB_BUCKET_BITS) + LINEAR_LIMIT
+
+
+def bucket_index(value):
+    """
+    Maps a non-negative integer value to its histogram bucket.
+    - Worst-case O(1): A bit length and two shifts.
+    - Average-case O(1): Same as worst-case.
+    """
+    if value < LINEAR_LIMIT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def bucket_value(index):
+    """
+    Returns the midpoint of the values that map to the given bucket.
+    - Worst-case O(1): Inverse of bucket_index.
+    - Average-case O(1): Same as worst-case.
+    """
+    if index < LINEAR_LIMIT:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    low = (index - (shift << SUB_BUCKET_BITS)) << shift
+    return low + ((1 << shift) >> 1)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of nanosecond latencies.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty histogram.
+        - Worst-case O(B): Where B is the fixed number of buckets.
+        - Average-case O(B): Same as worst-case.
+        """
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        """
+        Records a single latency sample in nanoseconds.
+        - Worst-case O(1): One bucket increment.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """
+        Adds the samples of another histogram into this one.
+        - Worst-case O(B): Where B is the number of buckets.
+        - Average-case O(B): Same as worst-case.
+        """
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """
+        Returns the approximate value below which the given fraction of samples fall.
+        - Worst-case O(B): Walks the buckets cumulatively.
+        - Average-case O(B): Same as worst-case.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Returns count, total and percentile figures in milliseconds.
+        - Worst-case O(B): Three percentile walks over the buckets.
+        - Average-case O(B): Same as worst-case.
+        """
+        return {
+            "count": self.count,
+            "total_ms": self.total / 1e6,
+            "mean_ms": self.total / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) / 1e6,
+            "p95_ms": self.percentile(0.95) / 1e6,
+            "p99_ms": self.percentile(0.99) / 1e6,
+            "max_ms": self.max / 1e6,
+        }
+
+
+class Profiler:
+    """
+    Collects one latency histogram per named phase.
+    """
+
+    def __init__(self):
+        """
+        Initializes a profiler with no recorded phases.
+        - Worst-case O(1): Creates an empty dictionary.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.histograms = {}
+
+    def record(self, phase, elapsed_ns):
+        """
+        Records the duration of one execution of a phase.
+        - Worst-case O(B): Creating the histogram the first time a phase is seen.
+        - Average-case O(1): Dictionary lookup and bucket increment.
+        """
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    def summary(self):
+        """
+        Returns the summary of every phase, keyed by phase name.
+        - Worst-case O(P * B): Where P is the number of phases.
+        - Average-case O(P * B): Same as worst-case.
+        """
+        return {
+            phase: histogram.summary()
+            for phase, histogram in sorted(self.histograms.items())
+        }
+
+    def dump(self, path):
+        """
+        Writes the phase summaries to a JSON file.
+        - Worst-case O(P * B): Building the summary.
+        - Average-case O(P * B): Same as worst-case.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+def timed(phase):
+    """
+    Decorator that records the duration of a Game method under the given phase.
+    The wrapped method only pays an attribute check when the game has no profiler.
+    Phases nest, so the time of an outer phase includes its inner phases.
+    - Worst-case O(1): Overhead added per call.
+    - Average-case O(1): Same as worst-case.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                profiler.record(phase, perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class FrameStats:
+    """
+    Per-frame counters kept by the game loop: blits, font renders, and the time
+    spent handling events versus drawing, plus a rolling window of frame times.
+    """
+
+    def __init__(self, window=120):
+        """
+        Initializes the counters with a rolling window of the given number of frames.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.frame_times = deque(maxlen=window)
+        self.blits = 0
+        self.renders = 0
+        self.event_ns = 0
+        self.draw_ns = 0
+        self.last_blits = 0
+        self.last_renders = 0
+        self.last_event_ns = 0
+        self.last_draw_ns = 0
+        self.frame_start = perf_counter_ns()
+
+    def begin_frame(self):
+        """
+        Resets the per-frame counters at the start of a frame.
+        - Worst-case O(1): Resetting counters.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.blits = 0
+        self.renders = 0
+        self.event_ns = 0
+        self.draw_ns = 0
+        self.frame_start = perf_counter_ns()
+
+    def end_frame(self):
+        """
+        Publishes the counters of the finished frame and records its duration.
+        - Worst-case O(1): Appending to a bounded deque.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.frame_times.append(perf_counter_ns() - self.frame_start)
+        self.last_blits = self.blits
+        self.last_renders = self.renders
+        self.last_event_ns = self.event_ns
+        self.last_draw_ns = self.draw_ns
+
+    def fps(self):
+        """
+        Returns the frame rate averaged over the rolling window.
+        - Worst-case O(W): Where W is the window size.
+        - Average-case O(W): Same as worst-case.
+        """
+        total = sum(self.frame_times)
+        return len(self.frame_times) * 1e9 / total if total else 0.0
+
+    def frame_percentile(self, fraction):
+        """
+        Returns the frame time in milliseconds at the given fraction of the window.
+        - Worst-case O(W log W): Sorting the window.
+        - Average-case O(W log W): Same as worst-case.
+        """
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index] / 1e6
+
+
+class CountingFont:
+    """
+    Wraps a pygame font and counts its render calls into FrameStats.
+    Every other attribute is delegated to the wrapped font.
+    """
+
+    def __init__(self, font, stats):
+        """
+        Initializes the wrapper around a font.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.font = font
+        self.stats = stats
+
+    def render(self, *args, **kwargs):
+        """
+        Renders text with the wrapped font and counts the call.
+        - Worst-case O(L): Where L is the length of the text.
+        - Average-case O(L): Same as worst-case.
+        """
+        self.stats.renders += 1
+        return self.font.render(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
@@ -0,0 +1,393 @@
+"""
+Replay module
+
+Recording and reviewing games turn by turn. A recording is a JSON-lines file:
+a header, then one record per turn holding the public table state (see
+spectator.public_view). Every KEYFRAME_INTERVAL turns the record is a full
+keyframe; the turns in between only store what changed. Seeking to any turn
+restores the nearest keyframe at or before it and applies at most
+KEYFRAME_INTERVAL - 1 deltas, so a jump costs the same at turn 10 as at
+turn 10000 and the viewer can scrub in both directions at interactive speed.
+
+GUI games are recorded with `python src/main.py --record PATH`, headless
+engine games with `python src/replay.py --record-headless PATH`, and viewed
+with `python src/main.py --replay PATH`.
+
+Viewer keys: Left/Right one turn, Page Up/Page Down ten turns, Home/End the
+first and last turn, Space to play or pause; click or drag the timeline to seek.
+"""
+
+import argparse
+import json
+import pygame
+from board_data import HOTEL_LEVEL, compile_board, generate_board, load_board
+from large_table import LargeTableEngine
+from player_management import Player
+from spectator import view_changes
+
+
+KEYFRAME_INTERVAL = 32
+# Turns shown per second while playing
+PLAYBACK_SPEED = 8
+# Token colors of headless players; the first four match the game's
+PLAYER_COLORS = ("red", "blue", "green", "yellow", "purple", "orange", "cyan", "magenta")
+
+TIMELINE = pygame.Rect(710, 640, 280, 16)
+
+
+class ReplayRecorder:
+    """
+    Appends the state of a game after every turn to a recording.
+    """
+
+    def __init__(self, path, board, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Creates the recording and writes its header.
+        - Worst-case O(1): Opening the file.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.file = open(path, "w", encoding="utf-8")
+        self.keyframe_interval = keyframe_interval
+        self.turn = 0
+        self.previous = None
+        self.write(
+            {
+                "type": "header",
+                "board": {"name": board.name, "size": board.size},
+                "keyframe_interval": keyframe_interval,
+            }
+        )
+
+    def write(self, record):
+        """
+        Writes one record as a line of JSON.
+        - Worst-case O(L): Where L is the size of the record.
+        - Average-case O(L): Same as worst-case.
+        """
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record(self, view):
+        """
+        Records the state after the next turn; the first call records the start of the game.
+        - Worst-case O(P + N): Comparing and encoding the state.
+        - Average-case O(P + N): Same as worst-case.
+        """
+        if self.turn % self.keyframe_interval == 0:
+            self.write({"type": "keyframe", "turn": self.turn, "state": view})
+            self.file.flush()  # A crash keeps everything up to the last keyframe
+        else:
+            changes = view_changes(self.previous, view)
+            self.write({"type": "delta", "turn": self.turn, "changes": changes})
+        self.previous = view
+        self.turn += 1
+
+    def close(self):
+        """
+        Closes the recording.
+        - Worst-case O(1): Closing the file.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.file.close()
+
+
+def engine_view(engine, names):
+    """
+    Returns the public view of a headless engine game in the same form as
+    spectator.public_view, with the given player names.
+    - Worst-case O(P + N): Where P is the number of players and N the number of squares.
+    - Average-case O(P + N): Same as worst-case.
+    """
+    active = [player for player in range(engine.num_players) if engine.active[player]]
+    owner = engine.owner.tolist()
+    level = engine.level.tolist()
+    mortgaged = engine.mortgaged.tolist()
+    return {
+        "players": [
+            [
+                names[player],
+                PLAYER_COLORS[player % len(PLAYER_COLORS)],
+                int(engine.balance[player]),
+                int(engine.position[player]),
+                bool(engine.in_jail[player]),
+            ]
+            for player in active
+        ],
+        "estates": [
+            [
+                names[owner[position]],
+                0 if level[position] == HOTEL_LEVEL else level[position],
+                level[position] == HOTEL_LEVEL,
+                mortgaged[position],
+            ]
+            if owner[position] >= 0
+            else None
+            for position in range(engine.size)
+        ],
+        "current_player": active.index(engine.current) if engine.current in active else 0,
+        "dice": None,
+        "jackpot": engine.jackpot,
+        "winner": names[engine.winner] if engine.winner >= 0 else None,
+    }
+
+
+def record_headless(path, num_players, turns, seed=None, board=None):
+    """
+    Plays a headless engine game and records it turn by turn.
+    - Worst-case O(T * (P + N)): Where T is the number of turns.
+    - Average-case O(T * (P + N)): Same as worst-case.
+    """
+    board = board if board is not None else load_board()
+    engine = LargeTableEngine(board, num_players, seed=seed)
+    names = [f"Player {player + 1}" for player in range(num_players)]
+    recorder = ReplayRecorder(path, board)
+    recorder.record(engine_view(engine, names))
+    for _ in range(turns):
+        if engine.active_players <= 1:
+            break
+        engine.take_turn()
+        recorder.record(engine_view(engine, names))
+    recorder.close()
+    return recorder.turn - 1
+
+
+class Replay:
+    """
+    A loaded recording with constant-time access to the state after any turn.
+    """
+
+    def __init__(self, path):
+        """
+        Loads a recording, up to an incomplete last record left by a crash.
+        - Worst-case O(T * L): Where T is the number of turns and L the size of a record.
+        - Average-case O(T * L): Same as worst-case.
+        """
+        self.keyframes = []  # State of every keyframe turn, in order
+        self.deltas = []  # Changes of every turn, None for keyframe turns
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("type") != "header":
+                raise ValueError(f"{path} is not a game recording")
+            self.board = header["board"]
+            self.keyframe_interval = header["keyframe_interval"]
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can cut off the last record; the turns before it are complete
+                    print(f"{path} ends in an incomplete record, replaying {len(self.deltas)} states")
+                    break
+                if record["turn"] != len(self.deltas):
+                    raise ValueError(f"Turn {len(self.deltas)} is missing from {path}")
+                if record["type"] == "keyframe":
+                    self.keyframes.append(record["state"])
+                    self.deltas.append(None)
+                else:
+                    self.deltas.append(record["changes"])
+        if not self.deltas:
+            raise ValueError(f"{path} has no turns")
+
+    def __len__(self):
+        """
+        Returns the number of recorded states (turns plus the start of the game).
+        - Worst-case O(1): A list length.
+        - Average-case O(1): Same as worst-case.
+        """
+        return len(self.deltas)
+
+    def state_at(self, turn):
+        """
+        Returns the state after a turn: the nearest keyframe at or before it
+        with the deltas after it applied. The returned state must not be modified.
+        - Worst-case O(K * (P + N)): Where K is the keyframe interval, independent of the turn.
+        - Average-case O(K * (P + N) / 2): Half an interval of deltas.
+        """
+        turn = max(0, min(turn, len(self.deltas) - 1))
+        keyframe = turn // self.keyframe_interval
+        state = dict(self.keyframes[keyframe])
+        state["estates"] = list(state["estates"])  # Estate entries are replaced, never modified
+        for changes in self.deltas[keyframe * self.keyframe_interval + 1 : turn + 1]:
+            for key, value in changes.items():
+                if key == "estates":
+                    for position, entry in value.items():
+                        state["estates"][int(position)] = entry
+                else:
+                    state[key] = value
+        return state
+
+
+def apply_view(game, state):
+    """
+    Shows a recorded state in a game: players, estates and the current player,
+    so the game's own drawing methods render it.
+    - Worst-case O(P + N): Rebuilding the players and estates.
+    - Average-case O(P + N): Same as worst-case.
+    """
+    players = {}
+    for name, color, balance, position, in_jail in state["players"]:
+        player = Player(name, color, balance)
+        player.position = position
+        player.in_jail = in_jail
+        players[name] = player
+    game.players = list(players.values())
+    for estate, entry in zip(game.estates, state["estates"]):
+        if entry is None:
+            estate.owner, estate.houses, estate.hotel, estate.mortgaged = None, 0, False, False
+            continue
+        owner, estate.houses, estate.hotel, estate.mortgaged = entry
+        estate.owner = players.get(owner)
+        if estate.owner is not None:
+            estate.owner.estates.append(estate)  # Board order
+    game.current_player_index = min(state["current_player"], max(0, len(game.players) - 1))
+    game.last_dice = state["dice"]
+    game.jackpot = state["jackpot"]
+    for button in game.buttons:
+        button["enabled"] = False  # Nothing can be played in a replay
+
+
+class ReplayViewer:
+    """
+    Pygame window showing a recording on the game board.
+    """
+
+    def __init__(self, replay, game):
+        """
+        Initializes the viewer on a game set up for the recording's board.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        board = replay.board
+        if (board["name"], board["size"]) != (game.board.name, game.board.size):
+            raise ValueError(
+                f"The recording is of the board '{board['name']}' ({board['size']} squares)"
+            )
+        self.replay = replay
+        self.game = game
+        self.turn = 0
+        self.playing = False
+        self.dragging = False
+        self.winner = None
+        game.setup_phase = False
+        self.seek(0)
+
+    def seek(self, turn):
+        """
+        Shows the state after a turn.
+        - Worst-case O(K * (P + N)): See Replay.state_at.
+        - Average-case O(K * (P + N)): Same as worst-case.
+        """
+        self.turn = max(0, min(turn, len(self.replay) - 1))
+        state = self.replay.state_at(self.turn)
+        apply_view(self.game, state)
+        self.winner = state["winner"]
+
+    def seek_to_timeline(self, x):
+        """
+        Seeks to the turn under an x coordinate of the timeline.
+        - Worst-case O(K * (P + N)): See seek.
+        - Average-case O(K * (P + N)): Same as worst-case.
+        """
+        fraction = (x - TIMELINE.x) / TIMELINE.width
+        self.seek(round(max(0.0, min(1.0, fraction)) * (len(self.replay) - 1)))
+
+    def draw(self):
+        """
+        Draws the board, the tokens, the current player's panel and the timeline.
+        - Worst-case O(P + B + E): Same as the game's board drawing.
+        - Average-case O(P + B + E): Same as worst-case.
+        """
+        game = self.game
+        game.blit(game.background, (0, 0))
+        if game.players:
+            game.draw_tokens()
+            game.draw_player_info()
+        last = len(self.replay) - 1
+        pygame.draw.rect(game.screen, (200, 200, 200), TIMELINE)
+        filled = TIMELINE.copy()
+        filled.width = round(TIMELINE.width * self.turn / max(1, last))
+        pygame.draw.rect(game.screen, (0, 120, 215), filled)
+        pygame.draw.rect(game.screen, (0, 0, 0), TIMELINE, 1)
+        label = f"Turn {self.turn} / {last}" + ("  (playing)" if self.playing else "")
+        if self.turn == last and self.winner is not None:
+            label = f"{self.winner} wins after {last} turns"
+        text = game.font.render(label, True, (0, 0, 0))
+        game.blit(text, (TIMELINE.x, TIMELINE.y - 30))
+        pygame.display.flip()
+
+    def handle_key(self, key):
+        """
+        Steps, jumps or toggles playback for a key press.
+        - Worst-case O(K * (P + N)): One seek.
+        - Average-case O(K * (P + N)): Same as worst-case.
+        """
+        steps = {
+            pygame.K_RIGHT: 1,
+            pygame.K_LEFT: -1,
+            pygame.K_PAGEDOWN: 10,
+            pygame.K_PAGEUP: -10,
+        }
+        if key in steps:
+            self.seek(self.turn + steps[key])
+        elif key == pygame.K_HOME:
+            self.seek(0)
+        elif key == pygame.K_END:
+            self.seek(len(self.replay) - 1)
+        elif key == pygame.K_SPACE:
+            self.playing = not self.playing
+
+    def run(self):
+        """
+        Runs the viewer until the window is closed.
+        - Worst-case O(F * K * (P + N)): Where F is the number of frames.
+        - Average-case O(F * (P + B + E)): Most frames only redraw.
+        """
+        clock = pygame.time.Clock()
+        elapsed = 0
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    self.handle_key(event.key)
+                elif event.type == pygame.MOUSEBUTTONDOWN and TIMELINE.collidepoint(event.pos):
+                    self.dragging = True
+                    self.seek_to_timeline(event.pos[0])
+                elif event.type == pygame.MOUSEMOTION and self.dragging:
+                    self.seek_to_timeline(event.pos[0])
+                elif event.type == pygame.MOUSEBUTTONUP:
+                    self.dragging = False
+            if self.playing:
+                elapsed += clock.get_time()
+                if elapsed >= 1000 // PLAYBACK_SPEED:
+                    elapsed = 0
+                    self.seek(self.turn + 1)
+                    self.playing = self.turn < len(self.replay) - 1
+            self.draw()
+            clock.tick(60)
+        pygame.quit()
+
+
+def main():
+    """
+    Command line entry point for recording headless games.
+    - Worst-case O(T * (P + N)): Playing and recording the game.
+    - Average-case O(T * (P + N)): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Record a headless Monopoly game for replay")
+    parser.add_argument("--record-headless", metavar="PATH", required=True)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--board", metavar="PATH", help="board data file")
+    parser.add_argument("--board-squares", type=int, help="generated board size")
+    args = parser.parse_args()
+    if args.board_squares:
+        board = compile_board(generate_board(args.board_squares))
+    else:
+        board = load_board(args.board) if args.board else None
+    turns = record_headless(args.record_headless, args.players, args.turns, args.seed, board)
+    print(f"Recorded {turns} turns to {args.record_headless}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Results store module
+
+Append-only storage for simulation output with one fixed-width NumPy column
+per field. A store is a directory holding one or more tables (e.g. "games"
+with one row per game and "turns" with one row per landing). Every writer appends
+to its own shard, so workers never contend for a file, and each column of a
+shard is a raw binary file that readers map into memory with np.memmap.
+Queries run vectorized over the mapped shards one at a time instead of
+loading rows as Python objects.
+
+Layout:
+    <store>/meta.json                         table schemas
+    <store>/<table>/<shard>/<column>.bin      raw little-endian column data
+"""
+
+import json
+import os
+import numpy as np
+
+
+META_FILE = "meta.json"
+
+GAMES = "games"
+TURNS = "turns"
+
+# Schemas of the tables written by the simulations
+GAME_SCHEMA = (
+    ("game", "<i8"),
+    ("cell", "<i4"),
+    ("seed", "<i8"),
+    ("num_players", "<i4"),
+    ("winner", "<i4"),
+    ("turns", "<i4"),
+    ("active_players", "<i4"),
+    ("max_balance", "<i8"),
+)
+TURN_SCHEMA = (
+    ("game", "<i8"),
+    ("turn", "<i4"),
+    ("player", "<i4"),
+    ("position", "<i4"),
+    ("roll", "<i1"),
+    ("rent", "<i4"),
+)
+
+# Rows buffered by a TurnRecorder before they are appended to the store
+RECORDER_CAPACITY = 65536
+
+
+class ResultsStore:
+    """
+    A directory of append-only, memory-mapped column tables.
+    """
+
+    def __init__(self, path, schemas=None):
+        """
+        Opens the store at path, creating it with the given {table: schema}
+        when it does not exist yet. A schema is a sequence of (column, dtype) pairs.
+        - Worst-case O(C): Where C is the total number of columns.
+        - Average-case O(C): Same as worst-case.
+        """
+        self.path = path
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                stored = json.load(file)
+            self.schemas = {
+                table: [(name, np.dtype(dtype)) for name, dtype in columns]
+                for table, columns in stored.items()
+            }
+            if schemas is not None and self.schema_lists(schemas) != stored:
+                raise ValueError(f"Store at {path} was created with a different schema")
+            return
+        if schemas is None:
+            raise FileNotFoundError(f"No results store at {path}")
+        os.makedirs(path, exist_ok=True)
+        self.schemas = {
+            table: [(name, np.dtype(dtype)) for name, dtype in columns]
+            for table, columns in schemas.items()
+        }
+        # Written to a temporary file first so that concurrent openers never see half of it
+        temporary = f"{meta_path}.{os.getpid()}"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.schema_lists(schemas), file, indent=2)
+        os.replace(temporary, meta_path)
+
+    @staticmethod
+    def schema_lists(schemas):
+        """
+        Returns the schemas in their JSON form, with dtypes as strings.
+        - Worst-case O(C): Where C is the total number of columns.
+        - Average-case O(C): Same as worst-case.
+        """
+        return {
+            table: [[name, np.dtype(dtype).str] for name, dtype in columns]
+            for table, columns in schemas.items()
+        }
+
+    def writer(self, shard=None):
+        """
+        Returns a writer appending to its own shard, named after the process by default.
+        Two writers must not share a shard at the same time.
+        - Worst-case O(1): Creating the writer.
+        - Average-case O(1): Same as worst-case.
+        """
+        return ShardWriter(self, str(shard) if shard is not None else f"pid{os.getpid()}")
+
+    def shards(self, table):
+        """
+        Returns the names of the shards a table has data in.
+        - Worst-case O(S): Where S is the number of shards.
+        - Average-case O(S): Same as worst-case.
+        """
+        directory = os.path.join(self.path, table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def shard_rows(self, table, shard):
+        """
+        Returns the number of complete rows in a shard: a writer interrupted
+        in the middle of an append leaves some columns longer than others.
+        - Worst-case O(C): One stat per column.
+        - Average-case O(C): Same as worst-case.
+        """
+        rows = None
+        for name, dtype in self.schemas[table]:
+            column_path = os.path.join(self.path, table, shard, f"{name}.bin")
+            size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+            count = size // dtype.itemsize
+            rows = count if rows is None else min(rows, count)
+        return rows or 0
+
+    def rows(self, table):
+        """
+        Returns the number of rows of a table across all shards.
+        - Worst-case O(S * C): Where S is the number of shards.
+        - Average-case O(S * C): Same as worst-case.
+        """
+        return sum(self.shard_rows(table, shard) for shard in self.shards(table))
+
+    def chunks(self, table, names=None):
+        """
+        Yields one {column: memmap} dictionary per non-empty shard of a table.
+        Mapping a column reads nothing until it is used.
+        - Worst-case O(S * C): Mapping every column of every shard.
+        - Average-case O(S * C): Same as worst-case.
+        """
+        dtypes = dict(self.schemas[table])
+        for shard in self.shards(table):
+            rows = self.shard_rows(table, shard)
+            if not rows:
+                continue
+            yield {
+                name: np.memmap(
+                    os.path.join(self.path, table, shard, f"{name}.bin"),
+                    dtype=dtypes[name],
+                    mode="r",
+                    shape=(rows,),
+                )
+                for name in (names if names is not None else dtypes)
+            }
+
+    def column(self, table, name):
+        """
+        Returns a whole column as one array. A table with a single shard is
+        returned as its memmap without copying.
+        - Worst-case O(R): Where R is the number of rows, when shards are concatenated.
+        - Average-case O(S): Mapping the shards.
+        """
+        parts = [chunk[name] for chunk in self.chunks(table, [name])]
+        if not parts:
+            return np.empty(0, dtype=dict(self.schemas[table])[name])
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+
+class ShardWriter:
+    """
+    Appends rows to one shard of every table of a store.
+    """
+
+    def __init__(self, store, shard):
+        """
+        Initializes a writer for a shard; files are opened on the first append.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.store = store
+        self.shard = shard
+        self.files = {}
+
+    def append(self, table, columns):
+        """
+        Appends a chunk of rows given as {column: array}. Every column of the
+        table must be given, with the same length.
+        - Worst-case O(R * C): Where R is the number of rows appended.
+        - Average-case O(R * C): Same as worst-case.
+        """
+        schema = self.store.schemas[table]
+        missing = [name for name, _ in schema if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for {table}: {', '.join(missing)}")
+        lengths = {len(columns[name]) for name, _ in schema}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns for {table} have different lengths")
+        if not lengths.pop():
+            return
+        files = self.files.get(table)
+        if files is None:
+            directory = os.path.join(self.store.path, table, self.shard)
+            os.makedirs(directory, exist_ok=True)
+            files = {
+                name: open(os.path.join(directory, f"{name}.bin"), "ab")
+                for name, _ in schema
+            }
+            self.files[table] = files
+        for name, dtype in schema:
+            files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        for file in files.values():
+            file.flush()
+
+    def close(self):
+        """
+        Closes the column files of the shard.
+        - Worst-case O(C): One close per column.
+        - Average-case O(C): Same as worst-case.
+        """
+        for files in self.files.values():
+            for file in files.values():
+                file.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TurnRecorder:
+    """
+    Buffers turn records of the headless engine in preallocated arrays and
+    appends them to a store in chunks. A record is one landing: the square, the
+    dice of the throw that led there and the rent paid on it. A turn spent in
+    jail is one record with roll 0. The chunks can also be fed to
+    streaming metrics (see streaming_stats.RunMetrics), with or without a store.
+    """
+
+    def __init__(self, writer=None, capacity=RECORDER_CAPACITY, metrics=None):
+        """
+        Initializes the buffers.
+        - Worst-case O(K): Where K is the capacity.
+        - Average-case O(K): Same as worst-case.
+        """
+        self.writer = writer
+        self.metrics = metrics
+        self.capacity = capacity
+        self.buffers = {name: np.empty(capacity, dtype=dtype) for name, dtype in TURN_SCHEMA}
+        self.game = 0
+        self.count = 0
+
+    def record(self, turn, player, position, roll, rent):
+        """
+        Records one landing (or turn in jail) of the current game.
+        - Worst-case O(K): Flushing a full buffer.
+        - Average-case O(1): Writing one row into the buffers.
+        """
+        row = self.count
+        buffers = self.buffers
+        buffers["game"][row] = self.game
+        buffers["turn"][row] = turn
+        buffers["player"][row] = player
+        buffers["position"][row] = position
+        buffers["roll"][row] = roll
+        buffers["rent"][row] = rent
+        self.count = row + 1
+        if self.count == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered turns to the store and the metrics.
+        - Worst-case O(K): Writing the buffers.
+        - Average-case O(K): Same as worst-case.
+        """
+        if self.count:
+            columns = {name: buffer[: self.count] for name, buffer in self.buffers.items()}
+            if self.writer is not None:
+                self.writer.append(TURNS, columns)
+            if self.metrics is not None:
+                self.metrics.update_turns(columns)
+            self.count = 0
+
+
+def win_rate_by_seat(store, num_players):
+    """
+    Returns the share of games won from each seat (player index); games without
+    a winner count as won by nobody.
+    - Worst-case O(R): Where R is the number of games.
+    - Average-case O(R): Same as worst-case.
+    """
+    wins = np.zeros(num_players, dtype=np.int64)
+    games = 0
+    for chunk in store.chunks(GAMES, ["winner"]):
+        winners = chunk["winner"]
+        wins += np.bincount(winners[winners >= 0], minlength=num_players)[:num_players]
+        games += len(winners)
+    return wins / max(1, games)
+
+
+def income_by_property(store, num_squares):
+    """
+    Returns the total rent collected on each square across all recorded landings.
+    - Worst-case O(R): Where R is the number of landings.
+    - Average-case O(R): Same as worst-case.
+    """
+    income = np.zeros(num_squares, dtype=np.float64)
+    for chunk in store.chunks(TURNS, ["position", "rent"]):
+        income += np.bincount(chunk["position"], weights=chunk["rent"], minlength=num_squares)
+    return income
+
+
+def game_length_quantiles(store, quantiles=(0.5, 0.9, 0.99), finished_only=True):
+    """
+    Returns the quantiles of game length in turns, over finished games by default.
+    - Worst-case O(R): Where R is the number of games.
+    - Average-case O(R): Same as worst-case.
+    """
+    lengths = []
+    for chunk in store.chunks(GAMES, ["turns", "winner"]):
+        turns = chunk["turns"]
+        lengths.append(turns[chunk["winner"] >= 0] if finished_only else np.asarray(turns))
+    lengths = np.concatenate(lengths) if lengths else np.empty(0)
+    if not len(lengths):
+        return np.full(len(quantiles), np.nan)
+    return np.quantile(lengths, quantiles)
@@ -0,0 +1,158 @@
+"""
+Random numbers module
+
+Every game owns a GameRandom built on numpy.random.Generator instead of
+sharing the global random module, so a seed reproduces a game exactly. Dice
+are drawn in blocks of pairs, so the individual die values (and doubles) are
+kept, and shuffle permutations are drawn in blocks per deck size. Independent
+streams for parallel workers or for the games of a batch are derived from one
+seed with numpy's SeedSequence, so no two streams overlap and each can be
+recreated on its own.
+"""
+
+import numpy as np
+
+
+# Dice pairs drawn at once
+DICE_BLOCK = 4096
+# Permutations of one size drawn at once
+SHUFFLE_BLOCK = 64
+
+
+class GameRandom:
+    """
+    Seedable random source of a game.
+    """
+
+    def __init__(self, seed=None, dice_block=DICE_BLOCK):
+        """
+        Initializes the generator from an integer seed or a SeedSequence; no
+        seed draws fresh entropy from the operating system.
+        - Worst-case O(1): Creating the generator.
+        - Average-case O(1): Same as worst-case.
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.generator = np.random.default_rng(seed)
+        self.generator_state = None  # State to create the generator from, in a fork
+        self.dice_block = dice_block
+        self.dice = []
+        self.dice_index = 0
+        self.permutations = {}  # Deck size -> [block of permutations, next index]
+
+    @classmethod
+    def stream(cls, seed, index):
+        """
+        Returns the random source of stream index of a seed. The same (seed,
+        index) always gives the same stream, whichever worker creates it.
+        - Worst-case O(1): Creating the generator.
+        - Average-case O(1): Same as worst-case.
+        """
+        return cls(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+    def spawn(self, count):
+        """
+        Returns count independent child sources, e.g. one per worker.
+        - Worst-case O(count): Creating the generators.
+        - Average-case O(count): Same as worst-case.
+        """
+        return [GameRandom(child, self.dice_block) for child in self.seed_sequence.spawn(count)]
+
+    def fork(self):
+        """
+        Returns a source that continues with the same dice and shuffles as this
+        one from here on, independently of it. The buffered dice and permutations
+        are shared, as they are never changed in place; the generator is only
+        recreated from its state if the fork runs through its buffers.
+        - Worst-case O(S): Where S is the number of buffered permutation blocks.
+        - Average-case O(1): One block per deck size.
+        """
+        twin = GameRandom.__new__(GameRandom)
+        twin.seed_sequence = self.seed_sequence
+        twin.generator = None
+        twin.generator_state = (
+            self.generator_state if self.generator is None else self.generator.bit_generator.state
+        )
+        twin.dice_block = self.dice_block
+        twin.dice = self.dice
+        twin.dice_index = self.dice_index
+        twin.permutations = {
+            size: [block, index] for size, (block, index) in self.permutations.items()
+        }
+        return twin
+
+    def source(self):
+        """
+        Returns the numpy generator, creating a fork's from its saved state on first use.
+        - Worst-case O(1): Creating the generator.
+        - Average-case O(1): Already created.
+        """
+        if self.generator is None:
+            self.generator = np.random.default_rng()
+            self.generator.bit_generator.state = self.generator_state
+            self.generator_state = None
+        return self.generator
+
+    def roll(self):
+        """
+        Returns the two dice of the next roll as a (die1, die2) pair.
+        - Worst-case O(B): Where B is the block size, when a new block is drawn.
+        - Average-case O(1): Amortized over the block.
+        """
+        if self.dice_index >= len(self.dice):
+            self.dice = self.source().integers(1, 7, size=(self.dice_block, 2)).tolist()
+            self.dice_index = 0
+        dice = self.dice[self.dice_index]
+        self.dice_index += 1
+        return dice[0], dice[1]
+
+    def permutation(self, size):
+        """
+        Returns a random permutation of range(size) as a list.
+        - Worst-case O(K * n log n): Where K is the shuffle block size, when a new block is drawn.
+        - Average-case O(n): Amortized over the block.
+        """
+        entry = self.permutations.get(size)
+        if entry is None or entry[1] >= len(entry[0]):
+            block = np.argsort(self.source().random((SHUFFLE_BLOCK, size)), axis=1)
+            entry = self.permutations[size] = [block.tolist(), 0]
+        order = entry[0][entry[1]]
+        entry[1] += 1
+        return order
+
+    def get_state(self):
+        """
+        Returns the state of the generator and of the undrawn buffered dice and
+        permutations as plain data, so a saved game continues with the same rolls.
+        - Worst-case O(B + K * n): Copying the buffers.
+        - Average-case O(B + K * n): Same as worst-case.
+        """
+        return {
+            "bit_generator": self.source().bit_generator.state,
+            "dice": self.dice[self.dice_index :],
+            "permutations": {
+                str(size): block[index:] for size, (block, index) in self.permutations.items()
+            },
+        }
+
+    def set_state(self, state):
+        """
+        Restores a state returned by get_state.
+        - Worst-case O(B + K * n): Copying the buffers.
+        - Average-case O(B + K * n): Same as worst-case.
+        """
+        self.source().bit_generator.state = state["bit_generator"]
+        self.dice = state["dice"]
+        self.dice_index = 0
+        self.permutations = {
+            int(size): [block, 0] for size, block in state["permutations"].items()
+        }
+
+    def shuffle(self, items):
+        """
+        Shuffles a list in place.
+        - Worst-case O(K * n log n): Drawing a new block of permutations.
+        - Average-case O(n): Amortized over the block.
+        """
+        items[:] = [items[index] for index in self.permutation(len(items))]
@@ -0,0 +1,100 @@
+"""
+Rules module
+
+House rules that vary between events: starting balance, Go salary, how many
+turns a player sits in jail, what a house costs relative to the property price,
+and whether taxes and card fines build up a Free Parking jackpot. Both the
+game window and the headless engine read their rules from a Rules object, so a
+variant is a set of overrides rather than edited constants.
+"""
+
+import json
+
+
+class Rules:
+    """
+    One set of house rules.
+    """
+
+    FIELDS = (
+        "starting_balance",
+        "go_salary",
+        "jail_turns",
+        "house_cost_ratio",
+        "free_parking_jackpot",
+    )
+
+    def __init__(
+        self,
+        starting_balance=1500,
+        go_salary=200,
+        jail_turns=3,
+        house_cost_ratio=0.5,
+        free_parking_jackpot=False,
+    ):
+        """
+        Initializes the rules; the defaults are the standard rules.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        if jail_turns < 1:
+            raise ValueError("jail_turns must be at least 1")
+        if house_cost_ratio <= 0:
+            raise ValueError("house_cost_ratio must be positive")
+        self.starting_balance = int(starting_balance)
+        self.go_salary = int(go_salary)
+        self.jail_turns = int(jail_turns)
+        self.house_cost_ratio = float(house_cost_ratio)
+        self.free_parking_jackpot = bool(free_parking_jackpot)
+
+    def house_cost(self, price):
+        """
+        Returns the cost of one house on a property of the given price.
+        - Worst-case O(1): One multiplication.
+        - Average-case O(1): Same as worst-case.
+        """
+        return int(price * self.house_cost_ratio)
+
+    def as_dict(self):
+        """
+        Returns the rules as a dictionary of field values.
+        - Worst-case O(1): A fixed number of fields.
+        - Average-case O(1): Same as worst-case.
+        """
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def key(self):
+        """
+        Returns a hashable key identifying the rules, used to cache per-rules tables.
+        - Worst-case O(1): A fixed number of fields.
+        - Average-case O(1): Same as worst-case.
+        """
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items())
+        return f"Rules({fields})"
+
+
+DEFAULT_RULES = Rules()
+
+
+def load_rules(path):
+    """
+    Loads rule overrides from a JSON file, e.g. {"go_salary": 400}. Fields that
+    are not given keep their standard values.
+    - Worst-case O(1): A fixed number of fields.
+    - Average-case O(1): Same as worst-case.
+    """
+    with open(path, encoding="utf-8") as file:
+        overrides = json.load(file)
+    unknown = set(overrides) - set(Rules.FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown rules: {', '.join(sorted(unknown))}")
+    return Rules(**overrides)
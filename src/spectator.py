@@ -0,0 +1,411 @@
+"""
+Spectator module
+
+Streams the state of a running game to read-only observers such as venue
+displays and streaming overlays. Spectators connect over TCP and receive one
+JSON message per line: a "keyframe" with the whole public state, then "delta"
+messages with only what changed since the previous message.
+
+The game loop calls SpectatorHub.publish once per frame. At most one update
+is taken per frame interval, so all changes made within an interval are
+coalesced into one message, and nothing is taken while nobody is watching.
+Each update is encoded once and shared by every spectator; a single worker
+thread writes it to the sockets without blocking. A spectator that falls
+behind by more than its buffer limit has its queued deltas dropped and is
+sent a fresh keyframe instead, so memory per spectator stays bounded and a
+slow display never holds up the players.
+
+Usage:
+    python src/spectator.py --connect localhost:7420
+"""
+
+import argparse
+import json
+import selectors
+import socket
+import threading
+from collections import deque
+from time import monotonic
+
+
+DEFAULT_PORT = 7420
+# Seconds per update; changes within an interval are sent together
+FRAME_INTERVAL = 0.1
+# Bytes queued per spectator before it is dropped back to keyframes
+MAX_BUFFER = 256 * 1024
+
+
+def public_view(game):
+    """
+    Returns the state spectators see: everything on the table, but not the
+    dice generator or the order of the card decks.
+    - Worst-case O(P + N): Where P is the number of players and N the number of squares.
+    - Average-case O(P + N): Same as worst-case.
+    """
+    return {
+        "players": [
+            [player.name, player.color, player.balance, player.position, player.in_jail]
+            for player in game.players
+        ],
+        "estates": [
+            [estate.owner.name, estate.houses, estate.hotel, estate.mortgaged]
+            if estate.owner is not None
+            else None
+            for estate in game.estates
+        ],
+        "current_player": game.current_player_index,
+        "dice": list(game.last_dice) if game.last_dice else None,
+        "jackpot": game.jackpot,
+        "winner": game.winner.name if game.winner is not None else None,
+    }
+
+
+def view_changes(previous, current):
+    """
+    Returns the fields of a view that differ from the previous one; estates
+    are given as {position: entry} for the squares that changed.
+    - Worst-case O(P + N): Comparing the views.
+    - Average-case O(P + N): Same as worst-case.
+    """
+    changes = {}
+    for key, value in current.items():
+        if key == "estates":
+            estates = {
+                str(position): entry
+                for position, (old, entry) in enumerate(zip(previous[key], value))
+                if old != entry
+            }
+            if estates:
+                changes[key] = estates
+        elif previous[key] != value:
+            changes[key] = value
+    return changes
+
+
+def encode(message):
+    """
+    Returns a message as one line of JSON.
+    - Worst-case O(L): Where L is the size of the message.
+    - Average-case O(L): Same as worst-case.
+    """
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class Spectator:
+    """
+    Send queue of one connected spectator.
+    """
+
+    def __init__(self, connection):
+        """
+        Initializes an empty queue; the spectator starts with a keyframe.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.connection = connection
+        self.messages = deque()
+        self.offset = 0  # Bytes of the first message already sent
+        self.queued = 0
+        self.needs_keyframe = True
+
+    def drop_backlog(self):
+        """
+        Drops every queued message except a partly sent one, so the stream stays
+        line-aligned, and switches the spectator back to keyframes.
+        - Worst-case O(M): Where M is the number of queued messages.
+        - Average-case O(1): A slow spectator has few, large messages queued.
+        """
+        first = self.messages[0] if self.messages and self.offset else None
+        self.messages.clear()
+        self.queued = 0
+        if first is not None:
+            self.messages.append(first)
+            self.queued = len(first) - self.offset
+        self.needs_keyframe = True
+
+
+class SpectatorHub:
+    """
+    Fan-out of game updates to any number of spectator connections.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=DEFAULT_PORT,
+        interval=FRAME_INTERVAL,
+        max_buffer=MAX_BUFFER,
+    ):
+        """
+        Opens the listening socket and starts the worker thread.
+        Port 0 picks a free port, available as self.port.
+        - Worst-case O(1): Opening the socket and starting the thread.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        # Socket pair used to wake the worker when an update is published
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_reader.setblocking(False)
+        self.wakeup_writer.setblocking(False)
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ)
+        self.spectators = {}
+        self.watching = 0  # Read by the game loop without the lock
+        self.lock = threading.Lock()
+        self.update = None  # Latest view and sequence number not fanned out yet
+        self.view = None
+        self.sequence = 0
+        self.keyframe = None  # Encoded keyframe of the current view, made on demand
+        self.last_publish = 0.0
+        self.running = True
+        self.worker = threading.Thread(target=self.run, name="spectators", daemon=True)
+        self.worker.start()
+
+    def publish(self, game):
+        """
+        Offers the game's state for the current frame. It is taken at most once
+        per interval and only while someone is watching.
+        - Worst-case O(P + N): Building the public view.
+        - Average-case O(1): Between intervals or without spectators.
+        """
+        if not self.watching:
+            return
+        now = monotonic()
+        if now - self.last_publish < self.interval:
+            return
+        self.last_publish = now
+        view = public_view(game)
+        with self.lock:
+            self.update = view
+        self.wake()
+
+    def wake(self):
+        """
+        Wakes the worker thread.
+        - Worst-case O(1): One byte on the socket pair.
+        - Average-case O(1): Same as worst-case.
+        """
+        try:
+            self.wakeup_writer.send(b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def run(self):
+        """
+        Worker loop: accepts spectators, fans out published updates and writes
+        queued messages to sockets that can take them.
+        - Worst-case O(S) per event: Where S is the number of spectators.
+        - Average-case O(S) per update: Same as worst-case.
+        """
+        while self.running:
+            for key, events in self.selector.select():
+                if key.fileobj is self.listener:
+                    self.accept()
+                elif key.fileobj is self.wakeup_reader:
+                    try:
+                        while self.wakeup_reader.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    self.fan_out()
+                else:
+                    spectator = key.data
+                    if events & selectors.EVENT_READ:
+                        self.receive(spectator)
+                    if events & selectors.EVENT_WRITE and spectator.connection in self.spectators:
+                        self.flush(spectator)
+        for spectator in list(self.spectators.values()):
+            spectator.connection.close()
+
+    def accept(self):
+        """
+        Accepts a new spectator; it gets a keyframe with the next update.
+        - Worst-case O(1): Registering the connection.
+        - Average-case O(1): Same as worst-case.
+        """
+        try:
+            connection, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        spectator = Spectator(connection)
+        self.spectators[connection] = spectator
+        self.selector.register(connection, selectors.EVENT_READ, spectator)
+        self.watching = len(self.spectators)
+        if self.view is not None:
+            self.enqueue(spectator, self.keyframe_bytes())
+            self.flush(spectator)
+        else:
+            self.last_publish = 0.0  # Take a view on the next frame
+
+    def receive(self, spectator):
+        """
+        Discards anything a spectator sends and notices when it disconnects.
+        - Worst-case O(1): One read.
+        - Average-case O(1): Same as worst-case.
+        """
+        try:
+            data = spectator.connection.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.disconnect(spectator)
+
+    def disconnect(self, spectator):
+        """
+        Closes a spectator's connection and frees its queue.
+        - Worst-case O(1): Unregistering the connection.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.selector.unregister(spectator.connection)
+        spectator.connection.close()
+        del self.spectators[spectator.connection]
+        self.watching = len(self.spectators)
+
+    def keyframe_bytes(self):
+        """
+        Returns the encoded keyframe of the current view, encoding it once.
+        - Worst-case O(P + N): Encoding the view.
+        - Average-case O(1): Already encoded for this update.
+        """
+        if self.keyframe is None:
+            self.keyframe = encode(
+                {"type": "keyframe", "sequence": self.sequence, "state": self.view}
+            )
+        return self.keyframe
+
+    def fan_out(self):
+        """
+        Sends the latest published update to every spectator: a delta to those
+        up to date, a keyframe to new and slow ones.
+        - Worst-case O(S + P + N): Where S is the number of spectators.
+        - Average-case O(S + P + N): Same as worst-case.
+        """
+        with self.lock:
+            view, self.update = self.update, None
+        if view is None:
+            return
+        if self.view is not None:
+            changes = view_changes(self.view, view)
+            if not changes:
+                return
+            self.sequence += 1
+            delta = encode({"type": "delta", "sequence": self.sequence, "changes": changes})
+        else:
+            delta = None
+        self.view = view
+        self.keyframe = None
+        for spectator in list(self.spectators.values()):
+            message = delta
+            if spectator.needs_keyframe or delta is None:
+                message = self.keyframe_bytes()
+            elif spectator.queued and spectator.queued + len(delta) > self.max_buffer:
+                spectator.drop_backlog()
+                message = self.keyframe_bytes()
+            self.enqueue(spectator, message)
+            self.flush(spectator)
+
+    def enqueue(self, spectator, message):
+        """
+        Queues a message for a spectator.
+        - Worst-case O(1): Appending to the queue.
+        - Average-case O(1): Same as worst-case.
+        """
+        spectator.messages.append(message)
+        spectator.queued += len(message)
+        spectator.needs_keyframe = False
+
+    def flush(self, spectator):
+        """
+        Writes as much of a spectator's queue as its socket takes without
+        blocking, and waits for writability if anything is left.
+        - Worst-case O(M): Where M is the number of queued messages.
+        - Average-case O(1): One message is usually queued.
+        """
+        connection = spectator.connection
+        try:
+            while spectator.messages:
+                message = spectator.messages[0]
+                sent = connection.send(message[spectator.offset :])
+                spectator.offset += sent
+                spectator.queued -= sent
+                if spectator.offset < len(message):
+                    break
+                spectator.messages.popleft()
+                spectator.offset = 0
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.disconnect(spectator)
+            return
+        events = selectors.EVENT_READ
+        if spectator.messages:
+            events |= selectors.EVENT_WRITE
+        self.selector.modify(connection, events, spectator)
+
+    def close(self):
+        """
+        Stops the worker and closes every connection.
+        - Worst-case O(S): Closing the connections.
+        - Average-case O(S): Same as worst-case.
+        """
+        self.running = False
+        self.wake()
+        self.worker.join(5)
+        self.selector.close()
+        self.listener.close()
+        self.wakeup_reader.close()
+        self.wakeup_writer.close()
+
+
+def watch(host, port):
+    """
+    Prints the updates of a game as a spectator, applying deltas to the last keyframe.
+    - Worst-case O(L): Per message, where L is its size.
+    - Average-case O(L): Same as worst-case.
+    """
+    state = None
+    with socket.create_connection((host, port)) as connection:
+        for line in connection.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+            if message["type"] == "keyframe":
+                state = message["state"]
+            elif state is not None:
+                for key, value in message["changes"].items():
+                    if key == "estates":
+                        for position, entry in value.items():
+                            state["estates"][int(position)] = entry
+                    else:
+                        state[key] = value
+            if state is None:
+                continue
+            players = ", ".join(
+                f"{name} ${balance} @{position}" for name, _, balance, position, _ in state["players"]
+            )
+            print(f"[{message['sequence']}] {players}")
+
+
+def main():
+    """
+    Command line entry point for watching a game.
+    - Worst-case O(L): Reading the stream.
+    - Average-case O(L): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Watch a Monopoly game as a spectator")
+    parser.add_argument(
+        "--connect", default=f"localhost:{DEFAULT_PORT}", help="HOST:PORT of the game"
+    )
+    args = parser.parse_args()
+    host, _, port = args.connect.rpartition(":")
+    watch(host or "localhost", int(port))
+
+
+if __name__ == "__main__":
+    main()
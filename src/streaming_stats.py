@@ -0,0 +1,357 @@
+"""
+Streaming statistics module
+
+Aggregators that summarize a stream of values in constant memory and can be
+merged, so every worker of a simulation run keeps its own and the results are
+combined at the end:
+
+- RunningStats: count, mean, variance, min and max (Welford's algorithm).
+- QuantileSketch: log-linear histogram of non-negative integers with about 6%
+  relative error on quantiles, using the same buckets as the profiler.
+- CountMinSketch: approximate counts per key in a fixed-size table.
+
+RunMetrics bundles the run-wide metrics of headless games on top of them.
+"""
+
+import numpy as np
+from profiling import BUCKET_COUNT, LINEAR_LIMIT, SUB_BUCKET_BITS, bucket_index, bucket_value
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream of numbers.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty statistics.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def update(self, value):
+        """
+        Adds one value.
+        - Worst-case O(1): Welford's update.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def update_many(self, values):
+        """
+        Adds an array of values at once.
+        - Worst-case O(k): Where k is the number of values.
+        - Average-case O(k): Same as worst-case.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Adds the values summarized by other (Chan et al.'s parallel update).
+        - Worst-case O(1): Combining the moments.
+        - Average-case O(1): Same as worst-case.
+        """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        """
+        Returns the sample variance, or 0 with fewer than two values.
+        - Worst-case O(1): One division.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        """
+        Returns the sample standard deviation.
+        - Worst-case O(1): One square root.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.variance() ** 0.5
+
+    def summary(self):
+        """
+        Returns the statistics as a dictionary.
+        - Worst-case O(1): A fixed number of fields.
+        - Average-case O(1): Same as worst-case.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std(),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+
+def bucket_indices(values):
+    """
+    Vectorized bucket_index of the profiler: maps non-negative integers to
+    their log-linear histogram buckets.
+    - Worst-case O(k): Where k is the number of values.
+    - Average-case O(k): Same as worst-case.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    _, exponent = np.frexp(np.maximum(values, 1).astype(np.float64))
+    shift = np.maximum(exponent.astype(np.int64) - SUB_BUCKET_BITS - 1, 0)
+    return np.where(
+        values < LINEAR_LIMIT, values, (shift << SUB_BUCKET_BITS) + (values >> shift)
+    )
+
+
+class QuantileSketch:
+    """
+    Mergeable log-linear histogram of non-negative integers.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty sketch.
+        - Worst-case O(B): Where B is the fixed number of buckets.
+        - Average-case O(B): Same as worst-case.
+        """
+        self.counts = np.zeros(BUCKET_COUNT, dtype=np.int64)
+        self.count = 0
+        self.max = 0
+
+    def update(self, value):
+        """
+        Adds one value.
+        - Worst-case O(1): One bucket increment.
+        - Average-case O(1): Same as worst-case.
+        """
+        value = int(value)
+        if value < 0:
+            raise ValueError("QuantileSketch only holds non-negative values")
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def update_many(self, values):
+        """
+        Adds an array of values at once.
+        - Worst-case O(k + B): Where k is the number of values.
+        - Average-case O(k + B): Same as worst-case.
+        """
+        values = np.asarray(values, dtype=np.int64)
+        if not len(values):
+            return
+        if values.min() < 0:
+            raise ValueError("QuantileSketch only holds non-negative values")
+        self.counts += np.bincount(bucket_indices(values), minlength=BUCKET_COUNT)
+        self.count += len(values)
+        self.max = max(self.max, int(values.max()))
+
+    def merge(self, other):
+        """
+        Adds the values summarized by other.
+        - Worst-case O(B): Adding the bucket counts.
+        - Average-case O(B): Same as worst-case.
+        """
+        self.counts += other.counts
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def quantile(self, fraction):
+        """
+        Returns the approximate value below which the given fraction of values fall.
+        - Worst-case O(B): A cumulative sum over the buckets.
+        - Average-case O(B): Same as worst-case.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, int(fraction * self.count + 0.5))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(bucket_value(index), self.max)
+
+
+# Mersenne prime used by the count-min hash functions
+HASH_PRIME = (1 << 31) - 1
+
+
+class CountMinSketch:
+    """
+    Approximate counts per non-negative integer key in depth x width counters.
+    Estimates never undercount; they overcount by at most total / width * e
+    with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, width=2048, depth=4, seed=0):
+        """
+        Initializes the counters and hash functions. Sketches can only be
+        merged if they were created with the same width, depth and seed.
+        - Worst-case O(W * D): Allocating the table.
+        - Average-case O(W * D): Same as worst-case.
+        """
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, HASH_PRIME, size=(depth, 1), dtype=np.uint64)
+        self.b = rng.integers(0, HASH_PRIME, size=(depth, 1), dtype=np.uint64)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def columns(self, keys):
+        """
+        Returns the counter column of every key in every row, as a depth x k array.
+        - Worst-case O(D * k): Where k is the number of keys.
+        - Average-case O(D * k): Same as worst-case.
+        """
+        keys = np.asarray(keys, dtype=np.uint64) % np.uint64(HASH_PRIME)
+        return ((self.a * keys + self.b) % np.uint64(HASH_PRIME)) % np.uint64(self.width)
+
+    def update_many(self, keys, counts=1):
+        """
+        Adds counts (one per key, or the same for all) to the given keys.
+        - Worst-case O(D * k): Where k is the number of keys.
+        - Average-case O(D * k): Same as worst-case.
+        """
+        keys = np.asarray(keys)
+        if not len(keys):
+            return
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.int64), keys.shape)
+        columns = self.columns(keys).astype(np.intp)
+        for row in range(self.depth):
+            row_counts = np.bincount(columns[row], weights=counts, minlength=self.width)
+            self.table[row] += row_counts.astype(np.int64)
+        self.total += int(counts.sum())
+
+    def estimate(self, keys):
+        """
+        Returns the estimated counts of the given keys.
+        - Worst-case O(D * k): Where k is the number of keys.
+        - Average-case O(D * k): Same as worst-case.
+        """
+        columns = self.columns(np.atleast_1d(keys)).astype(np.intp)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other):
+        """
+        Adds the counts of a sketch created with the same parameters.
+        - Worst-case O(W * D): Adding the tables.
+        - Average-case O(W * D): Same as worst-case.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Count-min sketches must share width, depth and seed to merge")
+        self.table += other.table
+        self.total += other.total
+
+
+class RunMetrics:
+    """
+    Run-wide metrics of headless games: landings and rent per square, rent
+    payment sizes, turns spent in jail, turns to the first monopoly and game length.
+    Turn columns come from a TurnRecorder flush and game totals from the engine.
+    """
+
+    def __init__(self, num_squares):
+        """
+        Initializes empty aggregators for a board of num_squares.
+        - Worst-case O(N + B): Where N is the number of squares.
+        - Average-case O(N + B): Same as worst-case.
+        """
+        self.num_squares = num_squares
+        self.landings = CountMinSketch()
+        self.rent_by_square = np.zeros(num_squares, dtype=np.int64)
+        self.rent_payments = QuantileSketch()
+        self.jail_turns = RunningStats()
+        self.first_monopoly = RunningStats()
+        self.first_monopoly_quantiles = QuantileSketch()
+        self.game_length = RunningStats()
+        self.game_length_quantiles = QuantileSketch()
+
+    def update_turns(self, columns):
+        """
+        Adds a chunk of landing columns (position, roll, rent) to the per-square metrics.
+        Turns spent in jail (roll 0) are not landings.
+        - Worst-case O(k + N): Where k is the number of rows.
+        - Average-case O(k + N): Same as worst-case.
+        """
+        moved = columns["roll"] > 0
+        self.landings.update_many(columns["position"][moved])
+        rent = columns["rent"]
+        paid = rent > 0
+        self.rent_by_square += np.bincount(
+            columns["position"][paid], weights=rent[paid], minlength=self.num_squares
+        ).astype(np.int64)
+        self.rent_payments.update_many(rent[paid])
+
+    def end_game(self, engine):
+        """
+        Adds the totals of a finished game.
+        - Worst-case O(P): Where P is the number of players.
+        - Average-case O(P): Same as worst-case.
+        """
+        self.jail_turns.update_many(engine.jail_time)
+        if engine.first_monopoly_turn >= 0:
+            self.first_monopoly.update(engine.first_monopoly_turn)
+            self.first_monopoly_quantiles.update(engine.first_monopoly_turn)
+        self.game_length.update(engine.turn)
+        self.game_length_quantiles.update(engine.turn)
+
+    def merge(self, other):
+        """
+        Adds the metrics collected by another worker.
+        - Worst-case O(N + B): Adding the tables.
+        - Average-case O(N + B): Same as worst-case.
+        """
+        self.landings.merge(other.landings)
+        self.rent_by_square += other.rent_by_square
+        self.rent_payments.merge(other.rent_payments)
+        self.jail_turns.merge(other.jail_turns)
+        self.first_monopoly.merge(other.first_monopoly)
+        self.first_monopoly_quantiles.merge(other.first_monopoly_quantiles)
+        self.game_length.merge(other.game_length)
+        self.game_length_quantiles.merge(other.game_length_quantiles)
+
+    def summary(self):
+        """
+        Returns the headline figures as a dictionary.
+        - Worst-case O(N + B): Reading the tables.
+        - Average-case O(N + B): Same as worst-case.
+        """
+
+        def quantiles(sketch):
+            return {f"p{int(q * 100)}": sketch.quantile(q) for q in (0.5, 0.9, 0.99)}
+
+        return {
+            "games": self.game_length.count,
+            "game_length": {**self.game_length.summary(), **quantiles(self.game_length_quantiles)},
+            "turns_to_first_monopoly": {
+                **self.first_monopoly.summary(),
+                **quantiles(self.first_monopoly_quantiles),
+            },
+            "jail_turns_per_player": self.jail_turns.summary(),
+            "rent_payment": quantiles(self.rent_payments),
+            "top_rent_squares": np.argsort(self.rent_by_square)[::-1][:5].tolist(),
+        }
@@ -0,0 +1,267 @@
+"""
+Sweep module
+
+Runs the headless engine over a grid of house-rule variants. Every cell of the
+grid plays the same number of games, spread over a process pool, and game g
+of every cell uses random stream g of the sweep seed (common random numbers),
+so the dice and card orders are shared and differences between cells come
+from the rules rather than from luck. One row per game, and optionally one per landing, is
+written to a new results store (see results_store.py); a store that already
+holds games is refused, since its cells and game ids would mix with the new run's. Run-wide distributions
+(rent per square, time in jail, turns to the first monopoly) can be collected
+as streaming statistics that each worker merges into its cell's totals.
+
+Usage:
+    python src/sweep.py --games 200 --output sweep_results
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from board_data import load_board
+from large_table import LargeTableEngine
+from rng import GameRandom
+from results_store import (
+    GAMES,
+    TURNS,
+    GAME_SCHEMA,
+    TURN_SCHEMA,
+    ResultsStore,
+    TurnRecorder,
+)
+from rules import Rules
+from streaming_stats import RunMetrics
+
+
+# Values tried for every rule; the sweep runs every combination
+SWEEP_GRID = {
+    "starting_balance": (1000, 1500, 2000),
+    "go_salary": (100, 200, 400),
+    "jail_turns": (1, 3),
+    "house_cost_ratio": (0.5, 0.75),
+    "free_parking_jackpot": (False, True),
+}
+
+RULE_SCHEMA = (
+    ("starting_balance", "<i4"),
+    ("go_salary", "<i4"),
+    ("jail_turns", "<i4"),
+    ("house_cost_ratio", "<f8"),
+    ("free_parking_jackpot", "|b1"),
+)
+
+# Game ids are cell * GAME_ID_STRIDE + game index, unique across the cells of a sweep
+GAME_ID_STRIDE = 1 << 32
+
+# Games are handed to workers in chunks to amortize the inter-process overhead
+CHUNK_GAMES = 25
+
+
+def grid_cells(grid):
+    """
+    Returns the Rules of every combination of the grid values, in a fixed order.
+    - Worst-case O(C): Where C is the number of cells.
+    - Average-case O(C): Same as worst-case.
+    """
+    names = list(grid)
+    return [Rules(**dict(zip(names, values))) for values in itertools.product(*grid.values())]
+
+
+def sweep_schemas(record_turns=False):
+    """
+    Returns the results store schemas of a sweep: the game table with one
+    column per rule, and the turn table when turns are recorded.
+    - Worst-case O(1): A fixed number of columns.
+    - Average-case O(1): Same as worst-case.
+    """
+    schemas = {GAMES: GAME_SCHEMA + RULE_SCHEMA}
+    if record_turns:
+        schemas[TURNS] = TURN_SCHEMA
+    return schemas
+
+
+def play_games(
+    path, cell, rules, seed, games, num_players, max_turns, board_path, record_turns, collect_stats
+):
+    """
+    Plays the given game indices under the given rules, game g on random stream
+    g of seed, and appends their rows to
+    the results store at path, in this worker's shard. Returns the streaming
+    metrics of the games if collect_stats, else None.
+    - Worst-case O(S * T): Where S is the number of games and T the turn budget.
+    - Average-case O(S * T): Same as worst-case.
+    """
+    board = load_board(board_path) if board_path else load_board()
+    store = ResultsStore(path)
+    count = len(games)
+    columns = {
+        "game": np.asarray(games, dtype=np.int64) + cell * GAME_ID_STRIDE,
+        "cell": np.full(count, cell, dtype=np.int32),
+        "seed": np.full(count, seed, dtype=np.int64),
+        "num_players": np.full(count, num_players, dtype=np.int32),
+        "winner": np.empty(count, dtype=np.int32),
+        "turns": np.empty(count, dtype=np.int32),
+        "active_players": np.empty(count, dtype=np.int32),
+        "max_balance": np.empty(count, dtype=np.int64),
+    }
+    for field, value in rules.as_dict().items():
+        columns[field] = np.full(count, value)
+    metrics = RunMetrics(board.size) if collect_stats else None
+    with store.writer() as writer:
+        recorder = None
+        if record_turns or collect_stats:
+            recorder = TurnRecorder(writer if record_turns else None, metrics=metrics)
+        for row in range(count):
+            if recorder is not None:
+                recorder.game = columns["game"][row]
+            engine = LargeTableEngine(
+                board,
+                num_players,
+                rules=rules,
+                recorder=recorder,
+                rng=GameRandom.stream(seed, games[row]),
+            )
+            columns["winner"][row] = engine.run(max_turns)
+            columns["turns"][row] = engine.turn
+            columns["active_players"][row] = engine.active_players
+            columns["max_balance"][row] = engine.balance.max()
+            if recorder is not None:
+                recorder.flush()
+            if metrics is not None:
+                metrics.end_game(engine)
+        writer.append(GAMES, columns)
+    return metrics
+
+
+def run_sweep(
+    path,
+    grid=None,
+    games=100,
+    num_players=4,
+    max_turns=2000,
+    seed=0,
+    board_path=None,
+    workers=None,
+    record_turns=False,
+    collect_stats=False,
+):
+    """
+    Plays games per cell of the grid (SWEEP_GRID by default) on a process pool
+    and writes one row per game (and per landing if record_turns) to a new
+    results store at path. Raises FileExistsError if the store already holds games.
+    Returns the store and, if collect_stats, a list of the merged RunMetrics of every cell.
+    - Worst-case O(C * games * T / W): Where C is the number of cells and W the number of workers.
+    - Average-case O(C * games * T / W): Same as worst-case.
+    """
+    store = ResultsStore(path, sweep_schemas(record_turns))
+    if store.rows(GAMES):
+        raise FileExistsError(f"{path} already holds {store.rows(GAMES)} games of an earlier sweep")
+    cells = grid_cells(SWEEP_GRID if grid is None else grid)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                play_games,
+                path,
+                cell,
+                rules,
+                seed,
+                range(start, min(start + CHUNK_GAMES, games)),
+                num_players,
+                max_turns,
+                board_path,
+                record_turns,
+                collect_stats,
+            )
+            for cell, rules in enumerate(cells)
+            for start in range(0, games, CHUNK_GAMES)
+        ]
+        chunk_metrics = [future.result() for future in futures]
+    if not collect_stats:
+        return store, None
+    cell_metrics = [None] * len(cells)
+    chunks_per_cell = len(chunk_metrics) // len(cells)
+    for index, metrics in enumerate(chunk_metrics):
+        cell = index // chunks_per_cell
+        if cell_metrics[cell] is None:
+            cell_metrics[cell] = metrics
+        else:
+            cell_metrics[cell].merge(metrics)
+    return store, cell_metrics
+
+
+def summarize(store):
+    """
+    Returns one line per cell with its rules, the share of games that finished
+    within the turn budget and the average length of those games.
+    - Worst-case O(R): Where R is the number of games.
+    - Average-case O(R): Same as worst-case.
+    """
+    columns = {
+        name: store.column(GAMES, name)
+        for name in ("cell", "winner", "turns") + Rules.FIELDS
+    }
+    lines = []
+    cells = columns["cell"]
+    for cell in np.unique(cells):
+        rows = cells == cell
+        finished = columns["winner"][rows] >= 0
+        rules = ", ".join(f"{field}={columns[field][rows][0]}" for field in Rules.FIELDS)
+        length = columns["turns"][rows][finished].mean() if finished.any() else float("nan")
+        lines.append(
+            f"{rules}: {finished.mean():.0%} finished, {length:.0f} turns on average"
+        )
+    return lines
+
+
+def main(argv=None):
+    """
+    Runs the sweep from the command line into a results store.
+    - Worst-case O(C * games * T / W): The sweep itself.
+    - Average-case O(C * games * T / W): Same as worst-case.
+    """
+    parser = argparse.ArgumentParser(description="Sweep house-rule variants headlessly")
+    parser.add_argument("--games", type=int, default=100, help="games per grid cell")
+    parser.add_argument("--players", type=int, default=4, help="players per game")
+    parser.add_argument("--max-turns", type=int, default=2000, help="turn budget per game")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the sweep's random streams")
+    parser.add_argument("--board", metavar="PATH", help="board data file to play on")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument(
+        "--output", default="sweep_results", help="new results store directory to write"
+    )
+    parser.add_argument(
+        "--record-turns", action="store_true", help="also store one row per landing"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print streaming statistics (game length, jail time, first monopoly) per cell",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        store, cell_metrics = run_sweep(
+            args.output,
+            games=args.games,
+            num_players=args.players,
+            max_turns=args.max_turns,
+            seed=args.seed,
+            board_path=args.board,
+            workers=args.workers,
+            record_turns=args.record_turns,
+            collect_stats=args.stats,
+        )
+    except FileExistsError as error:
+        parser.error(f"{error}; choose a new --output")
+    for cell, line in enumerate(summarize(store)):
+        print(line)
+        if cell_metrics is not None:
+            print(json.dumps(cell_metrics[cell].summary(), indent=2))
+    print(f"{store.rows(GAMES)} games stored in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+"""
+Trade engine module
+
+Trades between two players can bundle properties, cash and Get Out of Jail
+Free cards in both directions. The evaluator scores a proposal for each side
+from the expected-income tables, and the search finds mutually beneficial
+deals across all player pairs. Ownership is tracked as one bitmask per player
+(bit i set when the player owns square i), so checking whether a player can
+complete a group from another player is a couple of integer operations.
+
+In the game window's trade popup a player puts together a bundle from both
+sides and the other player accepts or declines it; the evaluator and the
+search are not offered there. The fuzzer plays the best
+deal the search finds for the current player, so its proposals are checked
+against the rule invariants. The headless engine runs the same search at the
+start of every bot turn through a subclass that reads its arrays in place of
+Game objects, so its bots can complete groups.
+"""
+
+from board_data import KIND_PROPERTY, KIND_STATION, KIND_UTILITY, HOTEL_LEVEL
+from expected_income import expected_rent_per_opponent_turn
+from utils import quick_sorts
+
+
+# Number of turns of expected income a trade is valued over
+HORIZON_TURNS = 30
+# Value given to a Get Out of Jail Free card
+JAIL_CARD_VALUE = 50
+# Build level assumed for a completed colour group
+BUILD_TARGET_LEVEL = 3
+
+TRADEABLE_KINDS = (KIND_PROPERTY, KIND_STATION, KIND_UTILITY)
+
+
+class TradeProposal:
+    """
+    A trade offered by one player (the proposer) to another (the responder).
+    """
+
+    def __init__(
+        self,
+        proposer,
+        responder,
+        give_estates=(),
+        take_estates=(),
+        give_cash=0,
+        take_cash=0,
+        give_cards=0,
+        take_cards=0,
+    ):
+        """
+        Initializes a proposal. "give" is what the proposer hands over, "take"
+        what the responder hands over; cards are counts of Get Out of Jail Free cards.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.proposer = proposer
+        self.responder = responder
+        self.give_estates = list(give_estates)
+        self.take_estates = list(take_estates)
+        self.give_cash = give_cash
+        self.take_cash = take_cash
+        self.give_cards = give_cards
+        self.take_cards = take_cards
+
+    def __str__(self):
+        """
+        String representation of the proposal.
+        - Worst-case O(E): Where E is the number of estates in the proposal.
+        - Average-case O(E): Same as worst-case.
+        """
+        return (
+            f"{self.proposer.name} gives {self.describe_give()}"
+            f" for {self.describe_take()} from {self.responder.name}"
+        )
+
+    def describe_give(self):
+        """
+        Lists what the proposer hands over, e.g. "Boardwalk, $200, 1 jail card".
+        - Worst-case O(E): Where E is the number of estates given.
+        - Average-case O(E): Same as worst-case.
+        """
+        return describe_side(self.give_estates, self.give_cash, self.give_cards)
+
+    def describe_take(self):
+        """
+        Lists what the responder hands over.
+        - Worst-case O(E): Where E is the number of estates taken.
+        - Average-case O(E): Same as worst-case.
+        """
+        return describe_side(self.take_estates, self.take_cash, self.take_cards)
+
+    def is_empty(self):
+        """
+        Checks whether neither side hands over anything.
+        - Worst-case O(1): Constant.
+        - Average-case O(1): Same as worst-case.
+        """
+        return not (
+            self.give_estates
+            or self.take_estates
+            or self.give_cash
+            or self.take_cash
+            or self.give_cards
+            or self.take_cards
+        )
+
+    def fork(self, players, estates):
+        """
+        Returns a copy of the proposal for a forked game, given the fork's
+        twin of every player and its list of estates.
+        - Worst-case O(E): Where E is the number of estates in the proposal.
+        - Average-case O(E): Same as worst-case.
+        """
+        return TradeProposal(
+            players[self.proposer],
+            players[self.responder],
+            [estates[estate.index] for estate in self.give_estates],
+            [estates[estate.index] for estate in self.take_estates],
+            self.give_cash,
+            self.take_cash,
+            self.give_cards,
+            self.take_cards,
+        )
+
+
+def describe_side(estates, cash, cards):
+    """
+    Lists one side of a trade: its estates, cash and jail cards.
+    - Worst-case O(E): Where E is the number of estates.
+    - Average-case O(E): Same as worst-case.
+    """
+    parts = [estate.name for estate in estates]
+    if cash:
+        parts.append(f"${cash}")
+    if cards:
+        parts.append(f"{cards} jail card{'s' if cards > 1 else ''}")
+    return ", ".join(parts) or "nothing"
+
+
+def jail_cards(player):
+    """
+    Returns the player's Get Out of Jail Free cards.
+    - Worst-case O(C): Where C is the number of cards the player holds.
+    - Average-case O(C): Same as worst-case.
+    """
+    return [card for card in player.community_chest_cards if card.is_get_out_of_jail]
+
+
+def ownership_mask(player):
+    """
+    Returns the bitmask of the squares the player owns.
+    - Worst-case O(n): Where n is the number of estates the player owns.
+    - Average-case O(n): Same as worst-case.
+    """
+    mask = 0
+    for estate in player.estates:
+        mask |= 1 << estate.index
+    return mask
+
+
+def mask_positions(mask):
+    """
+    Yields the positions of the set bits of a mask, lowest first.
+    - Worst-case O(k): Where k is the number of set bits.
+    - Average-case O(k): Same as worst-case.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def is_valid(game, proposal):
+    """
+    Checks that both sides own what they offer and can pay for it. Estates of a
+    group with buildings cannot be traded; the buildings have to be sold first.
+    - Worst-case O(E * g + C): Where E is the number of estates, g the size of their groups and C the number of cards involved.
+    - Average-case O(E * g + C): Same as worst-case.
+    """
+    proposer, responder = proposal.proposer, proposal.responder
+    if proposer is responder:
+        return False
+    for estates, owner in (
+        (proposal.give_estates, proposer),
+        (proposal.take_estates, responder),
+    ):
+        for estate in estates:
+            if estate.owner is not owner:
+                return False
+            if any(other.houses or other.hotel for other in game.group_estates[estate.group]):
+                return False
+    return (
+        proposal.give_cash >= 0
+        and proposal.take_cash >= 0
+        and proposer.balance >= proposal.give_cash
+        and responder.balance >= proposal.take_cash
+        and len(jail_cards(proposer)) >= proposal.give_cards
+        and len(jail_cards(responder)) >= proposal.take_cards
+    )
+
+
+def transfer_estate(game, estate, seller, buyer):
+    """
+    Moves an estate between players, keeping the buyer's list ordered by board position.
+    - Worst-case O(n): Where n is the number of estates either player owns.
+    - Average-case O(n): Same as worst-case.
+    """
+    seller.estates.remove(estate)
+    if not seller.estates:
+        game.players_with_estates -= 1
+    if not buyer.estates:
+        game.players_with_estates += 1
+    buyer.insert_estate_sorted(estate, game)
+    estate.owner = buyer
+
+
+def transfer_cards(seller, buyer, count):
+    """
+    Moves count Get Out of Jail Free cards from one player to another.
+    - Worst-case O(C): Where C is the number of cards the seller holds.
+    - Average-case O(C): Same as worst-case.
+    """
+    for card in jail_cards(seller)[:count]:
+        seller.community_chest_cards.remove(card)
+        buyer.community_chest_cards.append(card)
+
+
+def execute_trade(game, proposal):
+    """
+    Carries out a valid proposal. Returns False without changing anything if it is not valid.
+    - Worst-case O(E * n + C): Where E is the number of estates traded.
+    - Average-case O(E * n + C): Same as worst-case.
+    """
+    if not is_valid(game, proposal):
+        return False
+    proposer, responder = proposal.proposer, proposal.responder
+    for estate in proposal.give_estates:
+        transfer_estate(game, estate, proposer, responder)
+    for estate in proposal.take_estates:
+        transfer_estate(game, estate, responder, proposer)
+    proposer.update_balance(proposal.take_cash - proposal.give_cash)
+    responder.update_balance(proposal.give_cash - proposal.take_cash)
+    transfer_cards(proposer, responder, proposal.give_cards)
+    transfer_cards(responder, proposer, proposal.take_cards)
+    return True
+
+
+class TradeEvaluator:
+    """
+    Scores trades for each side from the expected-income tables of the board.
+    The game state is read through a few accessors over squares and players,
+    which large_table.EngineTradeEvaluator overrides for the array engine.
+    """
+
+    def __init__(self, game, horizon=HORIZON_TURNS):
+        """
+        Prepares the per-board lookup tables used for scoring.
+        - Worst-case O(N): Where N is the number of squares.
+        - Average-case O(N): Same as worst-case.
+        """
+        board = game.board
+        self.game = game
+        self.horizon = horizon
+        self.income = expected_rent_per_opponent_turn(board, game.rules).tolist()
+        self.kind = board.kind.tolist()
+        self.group_id = board.group_id.tolist()
+        self.group_members = board.group_members
+        self.group_mask = [
+            sum(1 << position for position in members) for members in board.group_members
+        ]
+        self.mortgage_value = (board.price // 2).tolist()
+
+    def owner(self, position):
+        """
+        Returns the owner of a square, or None.
+        - Worst-case O(1): Reading the estate.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.game.estates[position].owner
+
+    def building_level(self, position):
+        """
+        Returns the building level of a square (HOTEL_LEVEL for a hotel).
+        - Worst-case O(1): Reading the estate.
+        - Average-case O(1): Same as worst-case.
+        """
+        estate = self.game.estates[position]
+        return HOTEL_LEVEL if estate.hotel else estate.houses
+
+    def is_mortgaged(self, position):
+        """
+        Checks whether a square is mortgaged.
+        - Worst-case O(1): Reading the estate.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.game.estates[position].mortgaged
+
+    def holdings_mask(self, player):
+        """
+        Returns the bitmask of the squares the player owns.
+        - Worst-case O(n): Where n is the number of estates the player owns.
+        - Average-case O(n): Same as worst-case.
+        """
+        return ownership_mask(player)
+
+    def partial_groups(self, player, mask):
+        """
+        Yields the tradeable groups the player owns part, but not all, of.
+        - Worst-case O(n): Where n is the number of estates the player owns.
+        - Average-case O(n): Same as worst-case.
+        """
+        seen = set()
+        for position in mask_positions(mask):
+            group = self.group_id[position]
+            if group in seen or self.kind[position] not in TRADEABLE_KINDS:
+                continue
+            seen.add(group)
+            if self.group_mask[group] & ~mask:
+                yield group
+
+    def active_players(self):
+        """
+        Returns the players still in the game.
+        - Worst-case O(1): The game's list.
+        - Average-case O(1): Same as worst-case.
+        """
+        return self.game.players
+
+    def opponents(self):
+        """
+        Returns the number of opponents who can land on a player's squares.
+        - Worst-case O(1): A list length.
+        - Average-case O(1): Same as worst-case.
+        """
+        return max(1, len(self.game.players) - 1)
+
+    def proposal(self, proposer, responder, give, take):
+        """
+        Returns a proposal exchanging the squares of the give and take masks.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        estates = self.game.estates
+        return TradeProposal(
+            proposer,
+            responder,
+            give_estates=[estates[p] for p in mask_positions(give)],
+            take_estates=[estates[p] for p in mask_positions(take)],
+        )
+
+    def proposal_masks(self, proposal):
+        """
+        Returns the (give, take) masks of the squares a proposal exchanges.
+        - Worst-case O(k): Where k is the number of squares exchanged.
+        - Average-case O(k): Same as worst-case.
+        """
+        give = sum(1 << estate.index for estate in proposal.give_estates)
+        take = sum(1 << estate.index for estate in proposal.take_estates)
+        return give, take
+
+    def valid(self, proposal):
+        """
+        Checks that a proposal can be carried out (see is_valid).
+        - Worst-case O(E * g + C): See is_valid.
+        - Average-case O(E * g + C): Same as worst-case.
+        """
+        return is_valid(self.game, proposal)
+
+    def group_value(self, mask, group):
+        """
+        Returns the expected income per opponent turn of the owned squares of one group.
+        - Worst-case O(g): Where g is the size of the group.
+        - Average-case O(g): Same as worst-case.
+        """
+        owned = mask & self.group_mask[group]
+        if not owned:
+            return 0.0
+        members = self.group_members[group]
+        kind = self.kind[members[0]]
+        complete = owned == self.group_mask[group]
+        count = bin(owned).count("1")
+        value = 0.0
+        for position in mask_positions(owned):
+            if self.is_mortgaged(position):
+                continue
+            if kind == KIND_PROPERTY:
+                level = self.building_level(position)
+                if complete:
+                    level = max(level, BUILD_TARGET_LEVEL)
+                value += self.income[position][level]
+            else:
+                value += self.income[position][count]
+        return value
+
+    def side_gain(self, mask, gained, lost, cash, cards):
+        """
+        Returns the value a player owning the squares of mask gains from
+        receiving the squares in `gained` and handing over those in `lost`,
+        plus net cash and jail cards.
+        - Worst-case O(k * g): Where k is the number of groups touched.
+        - Average-case O(k * g): Same as worst-case.
+        """
+        after = (mask | gained) & ~lost
+        groups = {self.group_id[position] for position in mask_positions(gained | lost)}
+        income_change = sum(
+            self.group_value(after, group) - self.group_value(mask, group)
+            for group in groups
+        )
+        asset_change = sum(self.mortgage_value[p] for p in mask_positions(gained)) - sum(
+            self.mortgage_value[p] for p in mask_positions(lost)
+        )
+        return (
+            income_change * self.horizon * self.opponents()
+            + asset_change
+            + cash
+            + cards * JAIL_CARD_VALUE
+        )
+
+    def score(self, proposal):
+        """
+        Returns the (proposer, responder) gains of a proposal.
+        - Worst-case O(n + k * g): Building the ownership masks and scoring both sides.
+        - Average-case O(n + k * g): Same as worst-case.
+        """
+        give, take = self.proposal_masks(proposal)
+        cash = proposal.take_cash - proposal.give_cash
+        cards = proposal.take_cards - proposal.give_cards
+        proposer_gain = self.side_gain(
+            self.holdings_mask(proposal.proposer), take, give, cash, cards
+        )
+        responder_gain = self.side_gain(
+            self.holdings_mask(proposal.responder), give, take, -cash, -cards
+        )
+        return proposer_gain, responder_gain
+
+    def mask_of(self, masks, player):
+        """
+        Returns the player's ownership mask from the masks built so far, building it on first use.
+        - Worst-case O(n): Building the mask.
+        - Average-case O(1): Already built.
+        """
+        mask = masks.get(player)
+        if mask is None:
+            mask = masks[player] = self.holdings_mask(player)
+        return mask
+
+    def completable_groups(self, player, masks):
+        """
+        Yields (group, missing mask, holder) for every group the player owns
+        part of whose remaining squares are all held by one other player
+        without buildings.
+        - Worst-case O(n): Where n is the number of estates the player owns.
+        - Average-case O(k * g): Where k is the number of groups the player owns part of.
+        """
+        for group in self.partial_groups(player, self.mask_of(masks, player)):
+            holder = None
+            missing = 0
+            for position in self.group_members[group]:
+                owner = self.owner(position)
+                if owner == player:
+                    continue
+                if owner is None or holder not in (None, owner) or self.building_level(position):
+                    break
+                holder = owner
+                missing |= 1 << position
+            else:
+                yield group, missing, holder
+
+    def balanced(self, proposer, responder, give, take, proposer_gain, responder_gain):
+        """
+        Builds a proposal for an estate exchange with the given gains, adding
+        the cash payment that splits the combined gain evenly. Returns
+        (proposal, proposer gain, responder gain), or None if there is no
+        surplus or the paying side cannot afford it.
+        - Worst-case O(E * g): Checking the proposal is valid.
+        - Average-case O(E * g): Same as worst-case.
+        """
+        if proposer_gain + responder_gain <= 0:
+            return None
+        proposal = self.proposal(proposer, responder, give, take)
+        payment = int((proposer_gain - responder_gain) / 2)
+        if payment > 0:
+            proposal.give_cash = payment
+        else:
+            proposal.take_cash = -payment
+        if not self.valid(proposal):
+            return None
+        return proposal, proposer_gain - payment, responder_gain + payment
+
+    def find_trades(self, players=None):
+        """
+        Searches the given proposers (all active players by default) for
+        mutually beneficial trades in which the proposer completes a group,
+        either for cash or by swapping for the other group in which the two
+        players hold every square that adds the most to the exchange, which
+        completes it for the other player. Returns (proposal, proposer gain,
+        responder gain) tuples, best combined gain first. Gains are additive
+        over groups, so each group is scored once per pair and a swap just adds
+        up the two groups' scores.
+        - Worst-case O(P * (k * g + m * (log m + E * g))): Where P is the number of proposers, k the number of groups they own part of, m the number completable from one holder and E * g the cost of checking a proposal.
+        - Average-case O(P * k * g): Few groups are completable.
+        """
+        masks = {}
+        found = []
+        for proposer in players if players is not None else self.active_players():
+            by_holder = {}
+            for group, take, holder in self.completable_groups(proposer, masks):
+                by_holder.setdefault(holder, []).append((group, take))
+            mask = masks[proposer]
+            for responder, groups in by_holder.items():
+                other = self.mask_of(masks, responder)
+                # (squares, proposer gain, responder gain) for handing over each side of each group
+                taken = [
+                    (
+                        take,
+                        self.side_gain(mask, take, 0, 0, 0),
+                        self.side_gain(other, 0, take, 0, 0),
+                    )
+                    for _, take in groups
+                ]
+                given = [
+                    (
+                        give,
+                        self.side_gain(mask, 0, give, 0, 0),
+                        self.side_gain(other, give, 0, 0, 0),
+                    )
+                    for give in (self.group_mask[group] & mask for group, _ in groups)
+                ]
+                # A group cannot be swapped for itself, so the two best to give cover every take
+                best_given = quick_sorts(
+                    list(range(len(given))),
+                    key=lambda j: given[j][1] + given[j][2],
+                    reverse=True,
+                )[:2]
+                for i, (take, proposer_take, responder_take) in enumerate(taken):
+                    trades = [
+                        self.balanced(proposer, responder, 0, take, proposer_take, responder_take)
+                    ]
+                    swap = next((j for j in best_given if j != i), None)
+                    if swap is not None:
+                        give, proposer_give, responder_give = given[swap]
+                        trades.append(
+                            self.balanced(
+                                proposer,
+                                responder,
+                                give,
+                                take,
+                                proposer_take + proposer_give,
+                                responder_take + responder_give,
+                            )
+                        )
+                    for trade in trades:
+                        if trade is not None and trade[1] > 0 and trade[2] > 0:
+                            found.append(trade)
+        return quick_sorts(found, key=lambda trade: trade[1] + trade[2], reverse=True)
@@ -0,0 +1,226 @@
+"""
+Turn state machine module
+
+A turn goes through explicit phases: roll, doubles check, move, resolve the
+landing square, optional actions (buy, build, mortgage, trade) and end turn.
+Rolling doubles sends the player back to the roll phase after their actions,
+and a third double in a row sends them straight to jail. Every transition is
+checked against the transition table and can be recorded, so a turn can be
+logged and replayed.
+
+Landing resolution and card effects are table driven: the board is compiled
+once into a square handler id per position and every card into an effect
+record (opcode, target, value, get out of jail) with its target square
+resolved, so resolving a landing or a card is one index and one dispatch.
+"""
+
+from board_data import (
+    KIND_PROPERTY,
+    KIND_STATION,
+    KIND_UTILITY,
+    KIND_TAX,
+    KIND_CHANCE,
+    KIND_COMMUNITY_CHEST,
+    KIND_GO_TO_JAIL,
+    KIND_FREE_PARKING,
+)
+
+
+# Turn phases
+PHASE_ROLL = "roll"
+PHASE_DOUBLES = "doubles"
+PHASE_MOVE = "move"
+PHASE_RESOLVE = "resolve"
+PHASE_ACTIONS = "actions"
+PHASE_END = "end"
+
+# Allowed transitions; a jailed player's roll skips straight to the actions
+TRANSITIONS = {
+    PHASE_ROLL: (PHASE_DOUBLES, PHASE_ACTIONS),
+    PHASE_DOUBLES: (PHASE_MOVE, PHASE_ACTIONS),
+    PHASE_MOVE: (PHASE_RESOLVE,),
+    PHASE_RESOLVE: (PHASE_ACTIONS,),
+    PHASE_ACTIONS: (PHASE_ROLL, PHASE_END),
+    PHASE_END: (PHASE_ROLL,),
+}
+
+# Doubles in a row that send a player to jail
+DOUBLES_TO_JAIL = 3
+
+# Square handler ids
+SQUARE_NONE = 0
+SQUARE_ESTATE = 1
+SQUARE_TAX = 2
+SQUARE_CHANCE = 3
+SQUARE_COMMUNITY_CHEST = 4
+SQUARE_GO_TO_JAIL = 5
+SQUARE_FREE_PARKING = 6
+SQUARE_HANDLER_COUNT = 7
+
+HANDLER_OF_KIND = {
+    KIND_PROPERTY: SQUARE_ESTATE,
+    KIND_STATION: SQUARE_ESTATE,
+    KIND_UTILITY: SQUARE_ESTATE,
+    KIND_TAX: SQUARE_TAX,
+    KIND_CHANCE: SQUARE_CHANCE,
+    KIND_COMMUNITY_CHEST: SQUARE_COMMUNITY_CHEST,
+    KIND_GO_TO_JAIL: SQUARE_GO_TO_JAIL,
+    KIND_FREE_PARKING: SQUARE_FREE_PARKING,
+}
+
+# Card effect opcodes
+CARD_CASH = 0  # Only the card's value (and a Get Out of Jail Free card)
+CARD_MOVE_TO = 1
+CARD_NEAREST_UTILITY = 2
+CARD_NEAREST_STATION = 3
+CARD_BACK = 4
+CARD_JAIL = 5
+CARD_OPCODE_COUNT = 6
+
+OPCODE_OF_MOVE = {
+    None: CARD_CASH,
+    "nearest Utility": CARD_NEAREST_UTILITY,
+    "nearest Railroad": CARD_NEAREST_STATION,
+    "back 3 spaces": CARD_BACK,
+    "Jail": CARD_JAIL,
+}
+
+# Squares moved back by a CARD_BACK card
+BACK_STEPS = 3
+
+
+def compile_square_handlers(board):
+    """
+    Returns the handler id of every square of the board, indexed by position.
+    - Worst-case O(N): Where N is the number of squares.
+    - Average-case O(N): Same as worst-case.
+    """
+    return [HANDLER_OF_KIND.get(kind, SQUARE_NONE) for kind in board.kind.tolist()]
+
+
+def card_opcode(move_to):
+    """
+    Returns the effect opcode of a card from its move_to field; any other
+    target is a square the card moves the player to.
+    - Worst-case O(1): A dictionary lookup.
+    - Average-case O(1): Same as worst-case.
+    """
+    return OPCODE_OF_MOVE.get(move_to, CARD_MOVE_TO)
+
+
+def compile_cards(cards):
+    """
+    Returns the effect record (opcode, target, value, is_get_out_of_jail) of
+    every compiled card of a deck, indexed like the deck. The target is the
+    position of the square a CARD_MOVE_TO card moves to, -1 for other cards.
+    - Worst-case O(C): Where C is the number of cards.
+    - Average-case O(C): Same as worst-case.
+    """
+    return [
+        (card_opcode(move_to), -1 if target is None else target, value, is_get_out_of_jail)
+        for _, value, is_get_out_of_jail, move_to, target in cards
+    ]
+
+
+def card_destination(board, opcode, target, position):
+    """
+    Returns the square a card effect moves a player on position to, position
+    itself for cash cards and -1 for jail or a nearest square the board lacks.
+    - Worst-case O(1): Lookups in the board's topology index.
+    - Average-case O(1): Same as worst-case.
+    """
+    if opcode == CARD_MOVE_TO:
+        return target
+    if opcode == CARD_NEAREST_UTILITY:
+        return board.nearest_utility[position]
+    if opcode == CARD_NEAREST_STATION:
+        return board.nearest_station[position]
+    if opcode == CARD_BACK:
+        return (position - BACK_STEPS) % board.size
+    if opcode == CARD_JAIL:
+        return -1
+    return position
+
+
+class TurnMachine:
+    """
+    Phase and doubles count of the current turn.
+    """
+
+    def __init__(self, record=False):
+        """
+        Initializes the machine at the roll phase. With record, every
+        transition is kept as a (player, from phase, to phase, detail) tuple.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.phase = PHASE_ROLL
+        self.doubles = 0
+        self.player = None
+        self.history = [] if record else None
+
+    def fork(self, player):
+        """
+        Returns a copy of the machine for a forked game, where player is the
+        fork's copy of the current player. Transitions are not recorded.
+        - Worst-case O(1): Copying the counters.
+        - Average-case O(1): Same as worst-case.
+        """
+        twin = TurnMachine()
+        twin.phase = self.phase
+        twin.doubles = self.doubles
+        twin.player = player
+        return twin
+
+    def advance(self, phase, detail=None):
+        """
+        Moves to the next phase. Raises ValueError on a transition the table does not allow.
+        - Worst-case O(1): A table lookup.
+        - Average-case O(1): Same as worst-case.
+        """
+        if phase not in TRANSITIONS[self.phase]:
+            raise ValueError(f"Invalid turn transition {self.phase} -> {phase}")
+        if self.history is not None:
+            self.history.append((self.player, self.phase, phase, detail))
+        self.phase = phase
+
+    def rolled(self, die1, die2):
+        """
+        Records a roll and moves to the doubles check. Returns True if the roll
+        is the third double in a row, which sends the player to jail.
+        - Worst-case O(1): Two transitions.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.advance(PHASE_DOUBLES, (die1, die2))
+        if die1 == die2:
+            self.doubles += 1
+        else:
+            self.doubles = 0
+        return self.doubles >= DOUBLES_TO_JAIL
+
+    def rolls_again(self):
+        """
+        Checks whether the player gets another roll: they rolled doubles and
+        were not sent to jail.
+        - Worst-case O(1): A comparison.
+        - Average-case O(1): Same as worst-case.
+        """
+        return 0 < self.doubles < DOUBLES_TO_JAIL
+
+    def start_turn(self, player):
+        """
+        Starts the turn of a player at the roll phase.
+        - Worst-case O(1): Resetting the counters.
+        - Average-case O(1): Same as worst-case.
+        """
+        if self.phase == PHASE_ACTIONS:
+            self.advance(PHASE_END)
+        if self.phase == PHASE_END:
+            self.advance(PHASE_ROLL)
+        elif self.phase != PHASE_ROLL:
+            # The previous player left the game in the middle of their turn
+            if self.history is not None:
+                self.history.append((self.player, self.phase, PHASE_ROLL, "left"))
+            self.phase = PHASE_ROLL
+        self.doubles = 0
+        self.player = player
@@ -1,4 +1,6 @@
 class Node:
+    __slots__ = ("data", "next")
+
     def __init__(self, data):
         self.data = data
         self.next = None
@@ -7,17 +9,30 @@ class Node:
 class LinkedList:
     def __init__(self):
         self.head = None
+        self.tail = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
 
     # Adds a new node with the given data to the end of the linked list
     def append(self, data):
         new_node = Node(data)
+        self.size += 1
         if not self.head:
-            self.head = new_node
+            self.head = self.tail = new_node
             return
-        last = self.head
-        while last.next:
-            last = last.next
-        last.next = new_node
+        self.tail.next = new_node
+        self.tail = new_node
+
+    # Removes and returns the data of the first node
+    def pop_first(self):
+        node = self.head
+        self.head = node.next
+        if self.head is None:
+            self.tail = None
+        self.size -= 1
+        return node.data
 
     # Returns a list of all data elements in the linked list
     def display(self):
@@ -32,8 +47,7 @@ class LinkedList:
     def remove(self, key):
         current = self.head
         if current and current.data == key:
-            self.head = current.next
-            current = None
+            self.pop_first()
             return
         prev = None
         while current and current.data != key:
@@ -42,6 +56,9 @@ class LinkedList:
         if current is None:
             return
         prev.next = current.next
+        if current is self.tail:
+            self.tail = prev
+        self.size -= 1
         current = None
 
 
@@ -52,15 +69,16 @@ class Queue:
     def is_empty(self):
         return self.items.head is None
 
+    def __len__(self):
+        return len(self.items)
+
     def enqueue(self, item):
         self.items.append(item)
 
     def dequeue(self):
         if self.is_empty():
             raise IndexError("Dequeue from empty queue")
-        dequeued_item = self.items.head.data
-        self.items.remove(dequeued_item)
-        return dequeued_item
+        return self.items.pop_first()
 
     # Returns the item at the front of the queue without removing it
     def peek(self):
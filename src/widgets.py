@@ -0,0 +1,345 @@
+"""
+Widget module
+
+Retained-mode user interface. The screen is a stack of layers (the action
+buttons, then popups on top); each layer is a list of widgets built by a
+layout function. A layer keeps its widgets until the state it was built
+from changes: every layer has a key function returning that state as a
+cheap, comparable value, and the layout is only rebuilt when the key
+differs from the one it was built with. Drawing and click handling both use
+the same widgets, so what is on screen is what gets clicked.
+
+Clicks are resolved through a grid over the screen: every widget that can
+take clicks is listed in the cells its rectangle covers, so a click only
+tests the few widgets in its cell instead of rebuilding or scanning every
+popup's geometry.
+"""
+
+import pygame
+
+
+# Side of the square cells of the hit-testing grid, in pixels
+GRID_CELL = 50
+SCREEN_SIZE = (1000, 700)
+BUTTON_COLOR = (200, 200, 200)
+DISABLED_COLOR = (128, 128, 128)
+TEXT_COLOR = (0, 0, 0)
+
+
+class Widget:
+    """
+    A rectangle on screen that may take clicks.
+    """
+
+    def __init__(self, rect, action=None, enabled=True):
+        """
+        Initializes the widget. Widgets with an action take clicks; widgets
+        without one still block clicks to the layers below.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.rect = pygame.Rect(rect)
+        self.action = action
+        self.enabled = enabled
+
+    def blocks(self):
+        """
+        Checks whether the widget catches clicks inside its rectangle.
+        - Worst-case O(1): Constant.
+        - Average-case O(1): Same as worst-case.
+        """
+        return True
+
+    def draw(self, game):
+        """
+        Draws the widget on the game's screen; plain widgets are invisible.
+        - Worst-case O(1): Nothing to draw.
+        - Average-case O(1): Same as worst-case.
+        """
+
+
+class Panel(Widget):
+    """
+    White popup background with a border; catches the clicks that miss its buttons.
+    """
+
+    def draw(self, game):
+        """
+        Draws the background and border.
+        - Worst-case O(1): Two rectangles.
+        - Average-case O(1): Same as worst-case.
+        """
+        pygame.draw.rect(game.screen, (255, 255, 255), self.rect)
+        pygame.draw.rect(game.screen, (0, 0, 0), self.rect, 2)
+
+
+class Label(Widget):
+    """
+    A line of text, rendered once when first drawn. Labels do not take clicks.
+    """
+
+    def __init__(self, position, text, color=TEXT_COLOR, max_width=None):
+        """
+        Initializes the label at the top left position; with a max_width the
+        text is scaled down to fit it.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().__init__((position, (0, 0)))
+        self.text = text
+        self.color = color
+        self.max_width = max_width
+        self.surface = None
+
+    def blocks(self):
+        """
+        Labels never catch clicks.
+        - Worst-case O(1): Constant.
+        - Average-case O(1): Same as worst-case.
+        """
+        return False
+
+    def draw(self, game):
+        """
+        Draws the text, rendering it on first use.
+        - Worst-case O(L): Where L is the length of the text, on the first draw.
+        - Average-case O(1): One blit.
+        """
+        if self.surface is None:
+            if self.max_width is None:
+                self.surface = game.font.render(self.text, True, self.color)
+            else:
+                self.surface = game.assets.fitted_text(
+                    game.font, self.text, self.color, self.max_width
+                )
+        game.blit(self.surface, self.rect.topleft)
+
+
+class Button(Widget):
+    """
+    A filled, bordered rectangle with a label. A disabled button is greyed out
+    and ignores clicks.
+    """
+
+    def __init__(
+        self,
+        rect,
+        text,
+        action=None,
+        color=BUTTON_COLOR,
+        text_offset=(10, 10),
+        enabled=True,
+        fit=False,
+    ):
+        """
+        Initializes the button; the label is drawn at text_offset from its top
+        left corner, scaled down to the button's width if fit is set.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().__init__(rect, action, enabled)
+        self.color = color
+        self.label = Label(
+            (self.rect.x + text_offset[0], self.rect.y + text_offset[1]),
+            text,
+            max_width=self.rect.width - 2 * text_offset[0] if fit else None,
+        )
+
+    def draw(self, game):
+        """
+        Draws the button and its label.
+        - Worst-case O(L): Rendering the label on the first draw.
+        - Average-case O(1): Two rectangles and a blit.
+        """
+        pygame.draw.rect(game.screen, self.color if self.enabled else DISABLED_COLOR, self.rect)
+        pygame.draw.rect(game.screen, (0, 0, 0), self.rect, 2)
+        self.label.draw(game)
+
+
+class Backdrop(Widget):
+    """
+    Invisible widget covering the whole screen under a popup, so clicks
+    outside the popup go to its action (e.g. closing it) or nowhere.
+    """
+
+    def __init__(self, action=None):
+        """
+        Initializes the backdrop over the whole screen.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().__init__(((0, 0), SCREEN_SIZE), action)
+
+
+class Layer:
+    """
+    Widgets built by a layout function and kept until the layout's key changes.
+    """
+
+    def __init__(self, name, build, key):
+        """
+        Initializes an unbuilt layer. key() returns the state the layout depends
+        on, or None while the layer is hidden; build() returns its widgets.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.name = name
+        self.build = build
+        self.key = key
+        self.built_key = None
+        self.widgets = []
+        self.stale = True
+
+    def refresh(self):
+        """
+        Rebuilds the widgets if the key changed or the layer was invalidated.
+        Returns whether it was rebuilt.
+        - Worst-case O(K + W): Computing the key and building W widgets.
+        - Average-case O(K): Only computing the key.
+        """
+        key = self.key()
+        if not self.stale and key == self.built_key:
+            return False
+        self.widgets = [] if key is None else self.build()
+        self.built_key = key
+        self.stale = False
+        return True
+
+
+class WidgetTree:
+    """
+    Stack of layers with a grid index for hit-testing; layers added later are drawn on top.
+    """
+
+    def __init__(self, size=SCREEN_SIZE, cell=GRID_CELL):
+        """
+        Initializes an empty tree covering a screen of the given size.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        self.cell = cell
+        self.columns = (size[0] + cell - 1) // cell
+        self.rows = (size[1] + cell - 1) // cell
+        self.layers = []
+        self.by_name = {}
+        self.grid = None  # Cell -> widgets covering it, bottom to top; None when stale
+
+    def add_layer(self, name, build, key):
+        """
+        Adds a layer on top of the existing ones (see Layer).
+        - Worst-case O(1): Appending the layer.
+        - Average-case O(1): Same as worst-case.
+        """
+        layer = Layer(name, build, key)
+        self.layers.append(layer)
+        self.by_name[name] = layer
+        self.grid = None
+
+    def invalidate(self, name=None):
+        """
+        Forces one layer, or every layer, to be rebuilt on next use.
+        - Worst-case O(L): Where L is the number of layers.
+        - Average-case O(1): One layer.
+        """
+        for layer in [self.by_name[name]] if name else self.layers:
+            layer.stale = True
+
+    def refresh(self):
+        """
+        Rebuilds the layers whose state changed and drops the grid if any was rebuilt.
+        - Worst-case O(L * (K + W)): Every layer rebuilt.
+        - Average-case O(L * K): Only the keys are computed.
+        """
+        for layer in self.layers:
+            if layer.refresh():
+                self.grid = None
+
+    def draw(self, game, name):
+        """
+        Draws the widgets of one layer, rebuilding it first if its state changed.
+        - Worst-case O(K + W): Rebuilding and drawing the layer.
+        - Average-case O(K + W): Drawing its retained widgets.
+        """
+        layer = self.by_name[name]
+        if layer.refresh():
+            self.grid = None
+        for widget in layer.widgets:
+            widget.draw(game)
+
+    def index(self):
+        """
+        Returns the hit-testing grid, building it from the current widgets if needed.
+        - Worst-case O(W * C): Where C is the number of cells a widget covers.
+        - Average-case O(1): Already built.
+        """
+        if self.grid is None:
+            grid = {}
+            for layer in self.layers:
+                for widget in layer.widgets:
+                    if not widget.blocks():
+                        continue
+                    rect = widget.rect.clip(0, 0, self.columns * self.cell, self.rows * self.cell)
+                    for row in range(rect.top // self.cell, (rect.bottom - 1) // self.cell + 1):
+                        for column in range(
+                            rect.left // self.cell, (rect.right - 1) // self.cell + 1
+                        ):
+                            grid.setdefault((column, row), []).append(widget)
+            self.grid = grid
+        return self.grid
+
+    def hit(self, pos):
+        """
+        Returns the top-most widget that catches a click at pos, or None.
+        - Worst-case O(L * K + D): Refreshing the layers, where D is the number of widgets in the cell.
+        - Average-case O(L * K): A cell holds a few widgets.
+        """
+        self.refresh()
+        cell = (pos[0] // self.cell, pos[1] // self.cell)
+        for widget in reversed(self.index().get(cell, ())):
+            if widget.rect.collidepoint(pos):
+                return widget
+        return None
+
+    def click(self, pos):
+        """
+        Runs the action of the widget clicked at pos, if it is enabled. Returns
+        whether a widget caught the click, even without acting on it.
+        - Worst-case O(L * K + D + A): Hit-testing plus the action.
+        - Average-case O(L * K + A): Same as worst-case with a small cell.
+        """
+        widget = self.hit(pos)
+        if widget is None:
+            return False
+        if widget.enabled and widget.action is not None:
+            widget.action()
+        return True
+
+
+class ActionButton(Widget):
+    """
+    One of the game's action buttons: black when enabled, grey when not, with
+    its label scaled to fit and centered.
+    """
+
+    def __init__(self, rect, text, action, enabled=True):
+        """
+        Initializes the button.
+        - Worst-case O(1): Assigning attributes.
+        - Average-case O(1): Same as worst-case.
+        """
+        super().__init__(rect, action, enabled)
+        self.text = text
+
+    def draw(self, game):
+        """
+        Draws the button with its cached, fitted label.
+        - Worst-case O(L): Rendering the label the first time it is drawn.
+        - Average-case O(1): A rectangle and a blit.
+        """
+        pygame.draw.rect(game.screen, (0, 0, 0) if self.enabled else DISABLED_COLOR, self.rect)
+        text = game.assets.fitted_text(
+            game.font, self.text, (255, 255, 255), self.rect.width - 20  # Add some padding
+        )
+        text_rect = text.get_rect()
+        text_rect.center = self.rect.center
+        game.blit(text, text_rect)